@@ -0,0 +1,65 @@
+# benchmarks/bench_analysis.py
+"""
+Escala da análise estatística (src/analysis.py) com as contagens da
+planilha de medição: compara o p-valor por permutação vetorizado (tabelas
+sorteadas de uma vez com as margens fixas) com um laço Python que embaralha
+os rótulos a cada réplica, o jeito direto de fazer a mesma conta, e mede a
+análise inteira em série e no pool.
+
+    python -m benchmarks.bench_analysis [--resamples 20000] [--workers 4]
+"""
+from __future__ import annotations
+import argparse
+import time
+
+import numpy as np
+
+from src.analysis import analyze, comparisons, random_tables, tally_from_sheet
+
+
+def _chi2(table: np.ndarray, expected: np.ndarray) -> float:
+    return float(((table - expected) ** 2 / expected).sum())
+
+
+def _loop(table: np.ndarray, n: int, rng: np.random.Generator) -> float:
+    """Referência: embaralha os rótulos e reconta a tabela a cada réplica."""
+    expected = np.outer(table.sum(1), table.sum(0)) / table.sum()
+    observed = _chi2(table, expected)
+    labels = np.repeat(np.arange(table.shape[1]), table.sum(0))
+    groups = np.repeat(np.arange(table.shape[0]), table.sum(1))
+    ge = 0
+    for _ in range(n):
+        perm = np.zeros_like(table)
+        np.add.at(perm, (groups, rng.permutation(labels)), 1)
+        ge += _chi2(perm, expected) >= observed - 1e-9
+    return (ge + 1) / (n + 1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--resamples", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    table = comparisons(tally_from_sheet())[0].table  # ZS vs FS
+    expected = np.outer(table.sum(1), table.sum(0)) / table.sum()
+    t0 = time.perf_counter()
+    tables = random_tables(np.random.default_rng(1), table.sum(1), table.sum(0), args.resamples)
+    p_vec = ((((tables - expected) ** 2 / expected).sum(axis=(1, 2)) >= _chi2(table, expected) - 1e-9).sum() + 1) \
+        / (args.resamples + 1)
+    vec = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    p_loop = _loop(table, args.resamples, np.random.default_rng(1))
+    loop = time.perf_counter() - t0
+    print(f"permutação ZS vs FS ({args.resamples} réplicas): vetorizado {vec:.3f}s p={p_vec:.4f} | "
+          f"laço Python {loop:.2f}s p={p_loop:.4f} ({loop / vec:.0f}x)")
+
+    for workers in (0, args.workers):
+        t0 = time.perf_counter()
+        result = analyze("planilha", resamples=args.resamples, workers=workers)
+        print(f"análise completa, {len(result.comparisons)} comparações, workers={workers}: "
+              f"{time.perf_counter() - t0:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
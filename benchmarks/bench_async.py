@@ -0,0 +1,96 @@
+# benchmarks/bench_async.py
+"""
+Runner síncrono (1 aba, um artigo depois do outro) x runner async (N abas ao
+mesmo tempo) no stand-in local benchmarks/pages/stream.html, com o fluxo
+completo de envio: prompt sem anexo, preenchimento, envio, streaming,
+validação do JSON.
+
+    python -m benchmarks.bench_async [--messages 6] [--tabs 3] [--cps 600] [--delay 800]
+
+--jitter mantém as pausas "humanas" (desligadas por padrão nos dois lados).
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import time
+from pathlib import Path
+
+from playwright.async_api import async_playwright
+from playwright.sync_api import sync_playwright
+
+import src.async_runner as async_runner
+import src.browser_utils as browser_utils
+from src.async_runner import send_prompt_and_get_json_async
+from src.chatgpt_runner import send_prompt_and_get_json
+
+PAGE = Path(__file__).resolve().parent / "pages" / "stream.html"
+ARTICLE = "Stand-in article body. " * 200
+
+
+def _no_jitter() -> None:
+    for mod in (browser_utils, async_runner):
+        mod.JITTER_SHORT = mod.JITTER_MED = (0.0, 0.0)
+
+
+def run_sync(url: str, messages: int, headed: bool) -> float:
+    with sync_playwright() as pw:
+        browser = pw.chromium.launch(headless=not headed)
+        try:
+            page = browser.new_page()
+            page.goto(url)
+            t0 = time.perf_counter()
+            for i in range(messages):
+                send_prompt_and_get_json(page, file_title=f"standin-{i}", text=ARTICLE)
+            return time.perf_counter() - t0
+        finally:
+            browser.close()
+
+
+async def run_async(url: str, messages: int, tabs: int, headed: bool) -> float:
+    async with async_playwright() as pw:
+        browser = await pw.chromium.launch(headless=not headed)
+        try:
+            pages = [await browser.new_page() for _ in range(tabs)]
+            for page in pages:
+                await page.goto(url)
+            queue: asyncio.Queue = asyncio.Queue()
+            for i in range(messages):
+                queue.put_nowait(i)
+
+            async def worker(page) -> None:
+                while not queue.empty():
+                    i = queue.get_nowait()
+                    await send_prompt_and_get_json_async(page, file_title=f"standin-{i}", text=ARTICLE)
+
+            t0 = time.perf_counter()
+            await asyncio.gather(*(worker(p) for p in pages))
+            return time.perf_counter() - t0
+        finally:
+            await browser.close()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--messages", type=int, default=6)
+    ap.add_argument("--tabs", type=int, default=3)
+    ap.add_argument("--cps", type=int, default=600)
+    ap.add_argument("--delay", type=int, default=800)
+    ap.add_argument("--jitter", action="store_true")
+    ap.add_argument("--headed", action="store_true")
+    args = ap.parse_args()
+    if not args.jitter:
+        _no_jitter()
+    url = PAGE.as_uri() + f"?cps={args.cps}&delay={args.delay}"
+
+    sync_s = run_sync(url, args.messages, args.headed)
+    one_s = asyncio.run(run_async(url, args.messages, 1, args.headed))
+    many_s = asyncio.run(run_async(url, args.messages, args.tabs, args.headed))
+    print(f"{args.messages} mensagens (stand-in: {args.cps} chars/s, 1º token em {args.delay} ms)\n")
+    print(f"síncrono, 1 aba      {sync_s:7.2f}s  ({args.messages / sync_s:.2f} msg/s)")
+    print(f"async, 1 aba         {one_s:7.2f}s  ({args.messages / one_s:.2f} msg/s)")
+    print(f"async, {args.tabs} abas       {many_s:7.2f}s  ({args.messages / many_s:.2f} msg/s, "
+          f"{sync_s / many_s:.1f}x o síncrono)")
+
+
+if __name__ == "__main__":
+    main()
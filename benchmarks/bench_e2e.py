@@ -0,0 +1,138 @@
+# benchmarks/bench_e2e.py
+"""
+Vazão ponta a ponta: roda pipeline.main (ou o async) contra o stand-in local
+benchmarks/standin/ com PDFs sintéticos, pastas temporárias e sem pausa de
+login, e mostra artigos/minuto e o tempo por estágio (src/metrics.py).
+
+    python -m benchmarks.bench_e2e [--articles 6] [--tabs 1] [--async]
+        [--delay 800] [--cps 600] [--upload-ms 1500] [--malformed 0.1] [--overlay 0.05]
+        [--no-attach] [--jitter] [--headed]
+
+O ambiente (CHAT_URL, PDF_DIR, OUTPUT_DIR, PLAYWRIGHT_PROFILE, MANUAL_LOGIN=0...)
+é montado antes de importar src/, porque src/config.py lê tudo no import.
+"""
+from __future__ import annotations
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.standin.server import StandinServer, add_arguments, config_from_args
+
+_PARAGRAPH = (
+    "This synthetic article exists only to exercise the extraction and upload path of the "
+    "benchmark. It describes a study with a clear objective, a method, results and limitations."
+)
+
+
+def _pdf_bytes(title: str, lines: int = 40) -> bytes:
+    """PDF mínimo de uma página com texto extraível (Helvetica), sem dependências."""
+    rows = [title] + [f"{i:02d} {_PARAGRAPH[:90]}" for i in range(lines)]
+    esc = lambda s: s.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    stream = "BT /F1 9 Tf 40 800 Td 11 TL " + " ".join(f"({esc(r)}) '" for r in rows) + " ET"
+    objs = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+        "/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream",
+    ]
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for n, body in enumerate(objs, start=1):
+        offsets.append(len(out))
+        out += f"{n} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objs) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{o:010d} 00000 n \n" for o in offsets).encode()
+    out += f"trailer\n<< /Size {len(objs) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return out
+
+
+def _make_pdfs(folder: Path, n: int) -> None:
+    folder.mkdir(parents=True, exist_ok=True)
+    for i in range(n):
+        (folder / f"standin_{i:03d}.pdf").write_bytes(_pdf_bytes(f"Stand-in article {i}"))
+
+
+def _prepare_env(url: str, root: Path, args) -> None:
+    os.environ.update({
+        "CHAT_URL": url,
+        "PDF_DIR": str(root / "PDF"),
+        "OUTPUT_DIR": str(root / "outputs"),
+        "PLAYWRIGHT_PROFILE": str(root / "profile"),
+        "MANUAL_LOGIN": "0",
+        "HEADLESS": "0" if args.headed else "1",
+        "SLOW_MO_MS": "0",
+        "ATTACH_PDF": "0" if args.no_attach else "1",
+        "WAIT_AFTER_SEND_SEC": str(args.gap),
+        "SEND_CHECK_INTERVAL_SEC": "0.2",
+        # os PDFs sintéticos saem do mesmo molde: a deduplicação juntaria todos num grupo
+        # (só 1 enviado); e o benchmark mede o navegador, não o cache de respostas
+        "DEDUP": "0",
+        "RESPONSE_CACHE": "0",
+    })
+
+
+def _no_jitter() -> None:
+    import src.async_runner as async_runner
+    import src.browser_utils as browser_utils
+    for mod in (browser_utils, async_runner):
+        mod.JITTER_SHORT = mod.JITTER_MED = (0.0, 0.0)
+    browser_utils.JITTER_LONG = (0.0, 0.0)
+
+
+def _report(n: int, done: int, wall: float, stages: dict) -> None:
+    print(f"\n{done}/{n} artigo(s) em {wall:.1f}s  →  {done / wall * 60:.1f} artigos/min\n")
+    print(f"{'estágio':<14}{'n':>5}{'total (s)':>12}{'médio (s)':>12}{'% do tempo':>12}")
+    for stage, (count, total) in stages.items():
+        print(f"{stage:<14}{count:>5}{total:>12.2f}{total / max(1, count):>12.2f}{total / wall * 100:>11.0f}%")
+    print("\n(com várias abas os estágios se sobrepõem: a soma passa do tempo total)")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--articles", type=int, default=6)
+    ap.add_argument("--tabs", type=int, default=1)
+    ap.add_argument("--async", dest="use_async", action="store_true")
+    ap.add_argument("--no-attach", action="store_true", help="cola o texto em vez de anexar")
+    ap.add_argument("--gap", type=float, default=1.0, help="WAIT_AFTER_SEND_SEC (mínimo efetivo: 1s)")
+    ap.add_argument("--jitter", action="store_true", help="mantém as pausas 'humanas'")
+    ap.add_argument("--headed", action="store_true")
+    ap.add_argument("--keep", action="store_true", help="não apaga a pasta temporária")
+    add_arguments(ap)
+    args = ap.parse_args()
+
+    root = Path(tempfile.mkdtemp(prefix="tcc-bench-e2e-"))
+    _make_pdfs(root / "PDF", args.articles)
+    with StandinServer(config_from_args(args)) as server:
+        _prepare_env(server.url, root, args)
+        from src import metrics
+        if args.use_async:
+            from src.async_pipeline import main as run
+        else:
+            from src.pipeline import main as run
+        if not args.jitter:
+            _no_jitter()
+
+        print(f"stand-in em {server.url} | {args.articles} PDF(s) em {root} | "
+              f"{args.tabs} aba(s){' async' if args.use_async else ''}")
+        metrics.reset()
+        t0 = time.perf_counter()
+        try:
+            run(max_count=args.articles, tabs=args.tabs)
+        finally:
+            wall = time.perf_counter() - t0
+            done = len(list((root / "outputs" / "json").glob("*.json")))
+            _report(args.articles, done, wall, metrics.stage_totals())
+            if args.keep:
+                print(f"\nsaídas em {root}")
+            else:
+                shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# benchmarks/bench_evaluate.py
+"""
+Escala da avaliação contra o gabarito (src/evaluate.py): gera saídas
+sintéticas a partir do próprio gabarito (palavras trocadas/removidas) para
+as 6 células variante/modo e compara o caminho vetorizado com um laço
+Python por par (Counter + dicionários), o jeito direto de fazer a mesma conta.
+
+    python -m benchmarks.bench_evaluate [--per-cell 500] [--gabarito ARQ.xlsx]
+"""
+from __future__ import annotations
+import argparse
+import math
+import random
+import time
+from collections import Counter
+
+from src.config import GABARITO_PATH
+from src.evaluate import FIELD_ROWS, load_answer_key, evaluate_rows, tokens
+
+CELLS = [(v, m) for v in ("zeroshot", "fewshot", "cot") for m in ("with", "without")]
+
+
+def _noisy(text: str, rng: random.Random) -> str:
+    words = text.split()
+    keep = [w for w in words if rng.random() > 0.3]
+    rng.shuffle(keep) if rng.random() < 0.2 else None
+    return " ".join(keep + rng.sample(words, min(len(words), 5)))
+
+
+def _rows(key, per_cell: int, rng: random.Random):
+    rows = []
+    for variant, mode in CELLS:
+        for i in range(per_cell):
+            j = i % len(key.titles)
+            row = {f: _noisy(key.fields[f][j], rng) for f in FIELD_ROWS}
+            row.update(title=key.titles[j], article=f"art_{i:05d}", variant=variant, mode=mode)
+            rows.append(row)
+    return rows
+
+
+def _loop(rows, key):
+    """Referência: F1 e cosseno TF-IDF par a par em Python puro."""
+    index = {t: j for j, t in enumerate(key.titles)}
+    out = []
+    for name in FIELD_ROWS:
+        docs = [Counter(tokens(t)) for t in key.fields[name]] + [Counter(tokens(r[name])) for r in rows]
+        df = Counter(t for d in docs for t in d)
+        idf = {t: math.log((1 + len(docs)) / (1 + n)) + 1 for t, n in df.items()}
+        for r in rows:
+            a, b = Counter(tokens(r[name])), Counter(tokens(key.fields[name][index[r["title"]]]))
+            overlap = sum((a & b).values())
+            f1 = 2 * overlap / (sum(a.values()) + sum(b.values())) if overlap else 0.0
+            wa = {t: c * idf[t] for t, c in a.items()}
+            wb = {t: c * idf[t] for t, c in b.items()}
+            na = math.sqrt(sum(v * v for v in wa.values())) or 1.0
+            nb = math.sqrt(sum(v * v for v in wb.values())) or 1.0
+            out.append((f1, sum(v * wb.get(t, 0.0) for t, v in wa.items()) / (na * nb)))
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--per-cell", type=int, default=500, help="Saídas por variante/modo")
+    parser.add_argument("--gabarito", default=str(GABARITO_PATH))
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    key = load_answer_key(args.gabarito)
+    print(f"gabarito: {len(key.titles)} artigo(s), carregado em {time.perf_counter() - t0:.3f}s")
+    rows = _rows(key, args.per_cell, random.Random(1))
+    print(f"{len(rows)} saída(s) x {len(FIELD_ROWS)} campos = {len(rows) * len(FIELD_ROWS)} pares")
+
+    t0 = time.perf_counter()
+    result = evaluate_rows(rows, key)
+    vec = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    ref = _loop(rows, key)
+    loop = time.perf_counter() - t0
+
+    diff = max(max(abs(a - f), abs(b - c)) for (f, c), a, b in
+               zip(ref, result.columns["f1"], result.columns["cosine"]))
+    print(f"vetorizado {vec:.2f}s | laço Python {loop:.2f}s ({loop / vec:.1f}x) | maior diferença {diff:.1e}")
+
+
+if __name__ == "__main__":
+    main()
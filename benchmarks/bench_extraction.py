@@ -0,0 +1,76 @@
+# benchmarks/bench_extraction.py
+"""
+Compara a extração antiga (todas as páginas, junta e só então corta em
+TEXT_MAX_CHARS) com a extração por orçamento (para quando enche o orçamento).
+
+    python -m benchmarks.bench_extraction [pasta] [--min-pages 20] [--policy all]
+
+O cache de texto é desligado aqui para medir o parse de verdade.
+"""
+from __future__ import annotations
+import argparse
+import os
+import time
+from pathlib import Path
+
+os.environ["PDF_CACHE"] = "0"  # antes de importar src.*
+
+from PyPDF2 import PdfReader  # noqa: E402
+
+from src.config import PDF_DIR, TEXT_MAX_CHARS  # noqa: E402
+from src.pdf_utils import extract_text_from_pdf, parse_page_policy  # noqa: E402
+
+
+def _legacy_extract(pdf_path: Path, max_chars: int) -> str:
+    reader = PdfReader(str(pdf_path))
+    parts = []
+    for page in reader.pages:
+        try:
+            parts.append(page.extract_text() or "")
+        except Exception:
+            parts.append("")
+    return "\n".join(parts)[:max_chars]
+
+
+def _timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    out = fn(*args, **kwargs)
+    return out, time.perf_counter() - t0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("folder", nargs="?", default=str(PDF_DIR))
+    ap.add_argument("--min-pages", type=int, default=20, help="Só PDFs longos (>= N páginas)")
+    ap.add_argument("--max-chars", type=int, default=TEXT_MAX_CHARS)
+    ap.add_argument("--policy", default="all", help="PAGE_POLICY para o modo por orçamento")
+    args = ap.parse_args()
+
+    policy = parse_page_policy(args.policy)
+    pdfs = []
+    for p in sorted(Path(args.folder).glob("*.pdf")):
+        try:
+            n = len(PdfReader(str(p)).pages)
+        except Exception:
+            continue
+        if n >= args.min_pages:
+            pdfs.append((p, n))
+    if not pdfs:
+        print(f"Nenhum PDF com >= {args.min_pages} páginas em {args.folder}")
+        return
+
+    print(f"{'arquivo':40} {'págs':>5} {'antigo(s)':>10} {'orçam.(s)':>10} {'ganho':>7} {'mesmo texto':>12}")
+    tot_old = tot_new = 0.0
+    for p, n in pdfs:
+        old, t_old = _timed(_legacy_extract, p, args.max_chars)
+        new, t_new = _timed(extract_text_from_pdf, p, max_chars=args.max_chars, policy=policy)
+        tot_old += t_old
+        tot_new += t_new
+        same = "sim" if old == new else "não"
+        print(f"{p.name[:40]:40} {n:>5} {t_old:>10.3f} {t_new:>10.3f} {t_old / max(t_new, 1e-9):>6.1f}x {same:>12}")
+    print(f"\nTotal: antigo {tot_old:.2f}s | por orçamento {tot_new:.2f}s | "
+          f"economia {tot_old - tot_new:.2f}s ({(1 - tot_new / max(tot_old, 1e-9)) * 100:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+# benchmarks/bench_json_extract.py
+"""
+Corpus de fuzz/benchmark do extrator de JSON: compara a cascata de regex antiga
+(_legacy_extract, cópia fiel da versão anterior do chatgpt_runner) com
+src.json_extract.extract_json_object.
+
+Corpus = respostas reais em outputs/debug/*_raw*.txt (quando existirem)
+       + casos sintéticos com gabarito (fences, CoT longo, chaves dentro de
+         strings, comentário depois do JSON, aspas curvas, vírgula sobrando,
+         respostas truncadas e textos patológicos para backtracking).
+
+    python -m benchmarks.bench_json_extract [--repeat 5] [--seed 0]
+"""
+from __future__ import annotations
+import argparse
+import json
+import random
+import re
+import time
+from pathlib import Path
+
+from src.config import OUTPUT_DIR
+from src.json_extract import SUMMARY_KEYS, extract_json_object
+
+
+def _legacy_extract(text: str):
+    REQUIRED_KEYS = SUMMARY_KEYS
+
+    def _normalize(s: str) -> str:
+        s = s.replace("﻿", "")
+        s = s.replace("“", '"').replace("”", '"').replace("‘", "'").replace("’", "'")
+        return s
+
+    def _try_load(cand: str):
+        try:
+            obj = json.loads(cand)
+            return obj if isinstance(obj, dict) else None
+        except Exception:
+            return None
+
+    raw = _normalize(text)
+    m = re.findall(r"```json\s*([\s\S]*?)\s*```", raw, flags=re.I)
+    if m:
+        for block in reversed(m):
+            obj = _try_load(block.strip())
+            if obj is not None: return obj
+    start, depth, best = None, 0, None
+    for i, ch in enumerate(raw):
+        if ch == "{":
+            if depth == 0: start = i
+            depth += 1
+        elif ch == "}":
+            if depth > 0:
+                depth -= 1
+                if depth == 0 and start is not None:
+                    best = raw[start:i+1]
+                    start = None
+    if best:
+        obj = _try_load(best.strip())
+        if obj is not None: return obj
+    kv_lines = re.findall(r'^\s*"[^"]+"\s*:\s*.+$', raw, flags=re.M)
+    if kv_lines:
+        wrapped = "{\n" + "\n".join(kv_lines) + "\n}"
+        obj = _try_load(wrapped)
+        if obj is not None: return obj
+
+    def grab(key: str):
+        pat = rf'"{re.escape(key)}"\s*:\s*(".*?"|\[.*?\]|\{{.*?\}}|.*?)(?:,\s*|$)'
+        m1 = re.search(pat, raw, flags=re.S)
+        if m1:
+            val = m1.group(1).strip()
+            if len(val) >= 2 and val[0] == '"' and val[-1] == '"':
+                val = val[1:-1]
+            return val.strip()
+        pat2 = rf'\b{re.escape(key)}\b\s*:\s*(".*?"|\[.*?\]|\{{.*?\}}|.*?)(?:,\s*|$)'
+        m2 = re.search(pat2, raw, flags=re.S)
+        if m2:
+            val = m2.group(1).strip()
+            if len(val) >= 2 and val[0] == '"' and val[-1] == '"':
+                val = val[1:-1]
+            return val.strip()
+        return None
+
+    recovered = {}
+    for k in REQUIRED_KEYS:
+        v = grab(k)
+        if v is not None:
+            recovered[k] = v.strip().rstrip(",")
+    return recovered if recovered else None
+
+
+# ---------- corpus ----------
+_WORDS = ("model study results software testing quality data analysis method sample "
+          "survey participants significant effect review framework limitation").split()
+
+def _sentence(rng: random.Random, n: int = 14) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(n)).capitalize() + "."
+
+def _summary(rng: random.Random) -> dict:
+    d = {k: " ".join(_sentence(rng) for _ in range(rng.randint(1, 4))) for k in SUMMARY_KEYS}
+    d["title"] = "On {braces} and \"quotes\" in " + rng.choice(_WORDS)
+    return d
+
+def _synthetic(rng: random.Random):
+    """Gera (nome, texto, gabarito) — gabarito None quando não há JSON recuperável."""
+    cases = []
+    for n in range(40):
+        d = _summary(rng)
+        js = json.dumps(d, ensure_ascii=False)
+        pretty = json.dumps(d, ensure_ascii=False, indent=2)
+        cot = "\n".join(_sentence(rng, 25) for _ in range(rng.randint(20, 120)))
+        cases += [
+            ("plain", js, d),
+            ("fenced", f"Here you go:\n```json\n{pretty}\n```\n", d),
+            ("cot_then_json", f"{cot}\nFinal answer:\n{pretty}", d),
+            ("json_then_comment", f"{pretty}\n\nNote: I used {{sections}} from the paper. {cot[:400]}", d),
+            ("brace_in_prose_before", f"Reasoning {{ partial\n{cot[:2000]}\n{js}", d),
+            ("trailing_comma", pretty[:-2] + ",\n}", d),
+            ("smart_quotes", js.replace('": "', '”: “').replace('", "', '”, “'), None),
+            ("truncated", pretty[: len(pretty) * 2 // 3], None),
+        ]
+    # patológico p/ regex lazy + re.S: muitas chaves sem valor fechado
+    junk = "\n".join(f'"{rng.choice(SUMMARY_KEYS)}": "{_sentence(rng, 40)}' for _ in range(3000))
+    cases.append(("pathological_unclosed", junk, None))
+    return cases
+
+def _real(folder: Path):
+    for p in sorted(folder.glob("*_raw*.txt")):
+        yield f"real:{p.name}", p.read_text(encoding="utf-8", errors="replace"), None
+
+
+def _ok(result, expected) -> bool:
+    if expected is None:
+        return bool(result) and sum(1 for k in SUMMARY_KEYS if k in result) >= 6
+    return isinstance(result, dict) and all(result.get(k) == expected[k] for k in SUMMARY_KEYS)
+
+def _run(fn, cases, repeat):
+    hits, t0 = 0, time.perf_counter()
+    per_kind = {}
+    for _ in range(repeat):
+        for kind, text, expected in cases:
+            res = fn(text)
+            ok = _ok(res, expected)
+            hits += ok
+            per_kind.setdefault(kind.split(":")[0], [0, 0])
+            per_kind[kind.split(":")[0]][0] += ok
+            per_kind[kind.split(":")[0]][1] += 1
+    return hits // repeat, time.perf_counter() - t0, per_kind
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--debug-dir", default=str(OUTPUT_DIR / "debug"))
+    args = ap.parse_args()
+
+    cases = _synthetic(random.Random(args.seed)) + list(_real(Path(args.debug_dir)))
+    print(f"{len(cases)} casos ({sum(1 for c in cases if c[0].startswith('real:'))} reais)\n")
+    results = {}
+    for name, fn in (("regex antigo", _legacy_extract), ("varredura linear", extract_json_object)):
+        hits, secs, per_kind = _run(fn, cases, args.repeat)
+        results[name] = per_kind
+        print(f"{name:18} recuperados {hits}/{len(cases)}   tempo {secs / args.repeat * 1000:8.1f} ms/corpus")
+    print(f"\n{'tipo':24} {'antigo':>8} {'novo':>8}")
+    for kind in results["regex antigo"]:
+        old, new = results["regex antigo"][kind], results["varredura linear"][kind]
+        print(f"{kind:24} {old[0]:>4}/{old[1]:<3} {new[0]:>4}/{new[1]:<3}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# benchmarks/bench_page_state.py
+"""
+Custo de UMA volta de um loop de espera, no stand-in benchmarks/pages/stream.html:
+
+  - antigo: verificação humana + overlays + upload + botão enviar + Stop +
+    nº de respostas, cada um com seus count()/is_visible()/get_attribute()
+  - snapshot: src/page_state.snapshot (um page.evaluate)
+
+Conta as chamadas que vão ao navegador (cada uma é um round trip CDP) e o
+tempo por volta. --history N coloca N balões antigos na conversa.
+
+    python -m benchmarks.bench_page_state [--polls 50] [--history 40]
+"""
+from __future__ import annotations
+import argparse
+import statistics
+import time
+from pathlib import Path
+
+from playwright.sync_api import Locator, sync_playwright
+
+from src.page_state import HUMAN_CHECK_FRAMES, HUMAN_CHECK_TEXTS, snapshot
+from src.selectors import (
+    LAST_MESSAGE_SELECTOR, OVERLAY_BUTTONS, SEND_BUTTONS, STOP_GENERATING_BTN, UPLOAD_IN_PROGRESS,
+)
+
+PAGE = Path(__file__).resolve().parent / "pages" / "stream.html"
+
+
+class _Counting:
+    """Proxy que conta chamadas que não devolvem Locator (essas não vão ao navegador)."""
+
+    def __init__(self, target, counter):
+        self._t = target
+        self._n = counter
+
+    def __getattr__(self, name):
+        attr = getattr(self._t, name)
+        if isinstance(attr, Locator):
+            return _Counting(attr, self._n)
+        if not callable(attr):
+            return attr
+        def call(*a, **k):
+            r = attr(*a, **k)
+            if isinstance(r, Locator):
+                return _Counting(r, self._n)
+            self._n[0] += 1
+            return r
+        return call
+
+
+# ---------- uma volta no estilo antigo (cópia das funções de antes) ----------
+def _legacy_poll(page, prev_count: int) -> bool:
+    for sel in HUMAN_CHECK_FRAMES:
+        if page.locator(sel).count() > 0:
+            return False
+    for t in HUMAN_CHECK_TEXTS:
+        if page.get_by_text(t, exact=False).count() > 0:
+            return False
+    for sel in OVERLAY_BUTTONS:
+        btn = page.locator(sel)
+        if btn.count() > 0 and btn.first.is_visible():
+            btn.first.click(timeout=1000)
+    uploading = any(page.locator(sel).count() > 0 for sel in UPLOAD_IN_PROGRESS)
+    enabled = False
+    for sel in SEND_BUTTONS:
+        btn = page.locator(sel)
+        if btn.count() > 0 and btn.first.is_visible():
+            aria = btn.first.get_attribute("aria-disabled") or ""
+            if btn.first.get_attribute("disabled") is None and aria.lower() not in ("true", "1"):
+                enabled = True
+                break
+    stop = page.locator(STOP_GENERATING_BTN).count() > 0
+    count = page.locator(LAST_MESSAGE_SELECTOR).count()
+    return enabled and not uploading and not stop and count >= prev_count
+
+
+def _snapshot_poll(page, prev_count: int) -> bool:
+    snap = snapshot(page)
+    return snap.ready_to_send and not snap.stop and snap.assistant_count >= prev_count
+
+
+_FILL_HISTORY_JS = """(n) => {
+  const thread = document.getElementById('thread');
+  for (let i = 0; i < n; i++) {
+    const u = document.createElement('div');
+    u.className = 'bubble'; u.setAttribute('data-message-author-role', 'user');
+    u.textContent = 'pergunta ' + i + ' '.repeat(10) + 'x'.repeat(2000);
+    const w = document.createElement('div');
+    w.setAttribute('data-message-author-role', 'assistant');
+    const md = document.createElement('div');
+    md.className = 'markdown bubble'; md.textContent = '{"title": "resposta ' + i + '"}' + 'y'.repeat(3000);
+    w.appendChild(md); thread.appendChild(u); thread.appendChild(w);
+  }
+}"""
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--polls", type=int, default=50)
+    ap.add_argument("--history", type=int, default=40)
+    ap.add_argument("--headed", action="store_true")
+    args = ap.parse_args()
+
+    with sync_playwright() as pw:
+        browser = pw.chromium.launch(headless=not args.headed)
+        try:
+            page = browser.new_page()
+            page.goto(PAGE.as_uri())
+            page.evaluate(_FILL_HISTORY_JS, args.history)
+            page.locator("#composer").click()
+            page.keyboard.insert_text("ping")
+            page.locator("#composer").dispatch_event("input")
+
+            print(f"{args.polls} voltas, {args.history} turnos de histórico\n")
+            for name, poll in (("antigo", _legacy_poll), ("snapshot", _snapshot_poll)):
+                counter = [0]
+                wrapped = _Counting(page, counter)
+                times = []
+                for _ in range(args.polls):
+                    t0 = time.perf_counter()
+                    poll(wrapped, 0)
+                    times.append((time.perf_counter() - t0) * 1000)
+                print(f"{name:9} {counter[0] / args.polls:5.1f} round trips/volta | "
+                      f"mediana {statistics.median(times):6.2f} ms | p95 "
+                      f"{sorted(times)[int(0.95 * (len(times) - 1))]:6.2f} ms")
+        finally:
+            browser.close()
+
+
+if __name__ == "__main__":
+    main()
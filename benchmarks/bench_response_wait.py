@@ -0,0 +1,68 @@
+# benchmarks/bench_response_wait.py
+"""
+Mede o "tempo morto" entre o fim do streaming e a detecção de resposta
+completa, no stand-in local benchmarks/pages/stream.html:
+
+  - polling antigo (inner_text 1x/s, 3 leituras iguais após o Stop sumir)
+  - MutationObserver + expose_binding (src/stream_watch.py)
+
+    python -m benchmarks.bench_response_wait [--runs 5] [--cps 600] [--delay 800]
+"""
+from __future__ import annotations
+import argparse
+import statistics
+import time
+from pathlib import Path
+
+from playwright.sync_api import sync_playwright
+
+from src.chatgpt_runner import _assistant_count, _wait_for_response_poll, wait_for_response_complete
+from src.config import RESPONSE_QUIET_SEC
+
+PAGE = Path(__file__).resolve().parent / "pages" / "stream.html"
+
+
+def _one(page, url: str, waiter) -> float:
+    page.goto(url)
+    page.locator("#composer").click()
+    page.keyboard.insert_text("ping")
+    page.locator("#composer").dispatch_event("input")
+    prev = _assistant_count(page)
+    page.locator("#send").click()
+    waiter(page, prev)
+    detected = time.time()
+    ended = page.evaluate("window.__standinEndedAt")
+    if not ended:
+        raise RuntimeError("a espera retornou antes do fim do streaming")
+    return detected - ended / 1000.0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--cps", type=int, default=600)
+    ap.add_argument("--delay", type=int, default=800)
+    ap.add_argument("--headed", action="store_true")
+    args = ap.parse_args()
+    url = PAGE.as_uri() + f"?cps={args.cps}&delay={args.delay}"
+
+    waiters = {
+        "polling (antigo)": lambda page, prev: _wait_for_response_poll(page, timeout=60),
+        "observer": lambda page, prev: wait_for_response_complete(page, timeout=60, prev_count=prev),
+    }
+    with sync_playwright() as pw:
+        browser = pw.chromium.launch(headless=not args.headed)
+        try:
+            print(f"quiet = {RESPONSE_QUIET_SEC}s | {args.runs} execuções cada\n")
+            for name, waiter in waiters.items():
+                page = browser.new_page()  # página nova: o binding é registrado uma vez por página
+                lat = [_one(page, url, waiter) for _ in range(args.runs)]
+                print(f"{name:18} atraso após o último token: mediana {statistics.median(lat):.2f}s "
+                      f"(min {min(lat):.2f}s, max {max(lat):.2f}s)")
+                page.close()
+        finally:
+            browser.close()
+
+
+if __name__ == "__main__":
+    main()
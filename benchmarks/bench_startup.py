@@ -0,0 +1,77 @@
+# benchmarks/bench_startup.py
+"""
+Partida a frio dos subcomandos do run.py: cada comando roda N vezes num
+processo novo (pastas temporárias, PDFs sintéticos) e mostra a mediana,
+comparada com `import src.pipeline` (o que todo comando pagava antes).
+Com -X importtime confere que os comandos sem navegador não carregam
+playwright, pydantic nem rich.
+
+    python -m benchmarks.bench_startup [--repeat 7] [--articles 20]
+"""
+from __future__ import annotations
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bench_e2e import _make_pdfs
+
+ROOT = Path(__file__).resolve().parent.parent
+HEAVY = ("playwright", "pydantic", "rich")
+COMMANDS = {
+    "import src.pipeline": [sys.executable, "-c", "import src.pipeline"],
+    "run.py status": [sys.executable, "run.py", "status"],
+    "run.py plan": [sys.executable, "run.py", "plan", "--count", "5"],
+    "run.py report": [sys.executable, "run.py", "report"],
+}
+
+
+def _time(cmd, env, repeat: int) -> float:
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        runs.append(time.perf_counter() - t0)
+    return statistics.median(runs)
+
+
+def _heavy_imports(cmd, env) -> list:
+    out = subprocess.run([cmd[0], "-X", "importtime", *cmd[1:]], cwd=ROOT, env=env,
+                         stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True).stderr
+    mods = {line.rsplit("|", 1)[-1].strip().split(".")[0] for line in out.splitlines() if "|" in line}
+    return [m for m in HEAVY if m in mods]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--articles", type=int, default=20)
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp(prefix="bench_startup_"))
+    try:
+        _make_pdfs(root / "PDF", args.articles)
+        env = {**os.environ, "PDF_DIR": str(root / "PDF"), "OUTPUT_DIR": str(root / "outputs"), "DEDUP": "0"}
+        before = set((ROOT / "prompts").glob("*"))
+        subprocess.run(COMMANDS["run.py plan"], cwd=ROOT, env=env, stdout=subprocess.DEVNULL, check=True)  # aquece o ledger
+
+        base = None
+        print(f"{'comando':<22}{'mediana':>10}{'vs import':>11}  pesados importados")
+        for name, cmd in COMMANDS.items():
+            sec = _time(cmd, env, args.repeat)
+            base = base or sec
+            heavy = _heavy_imports(cmd, env)
+            print(f"{name:<22}{sec * 1000:>8.0f}ms{sec / base:>10.2f}x  {', '.join(heavy) or '-'}")
+        created = sorted(p.name for p in set((ROOT / "prompts").glob("*")) - before)
+        print(f"\nprompts/ criados pelos comandos: {created or 'nenhum'}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# benchmarks/standin/server.py
+"""
+Servidor HTTP local com um stand-in do chat (benchmarks/standin/chat.html),
+para rodar o pipeline inteiro sem a conta/rede: aponte CHAT_URL para ele.
+
+    python -m benchmarks.standin.server [--port 8765] [--delay 800] [--cps 600]
+        [--upload-ms 1500] [--malformed 0.1] [--overlay 0.05]
+
+Parâmetros (também aceitos na query string, ex.: /?cps=2000&malformed=0):
+  delay       ms entre o envio e o 1º token
+  cps / tick  velocidade do streaming (caracteres/s) e intervalo entre pedaços (ms)
+  upload_ms   tempo fixo de "upload" de cada anexo (+ tamanho / upload_kbps)
+  malformed   fração das respostas com JSON fora do schema (a correção seguinte vem válida)
+  overlay     fração das respostas seguidas de um popup "Got it"
+  seed        semente das duas taxas acima
+"""
+from __future__ import annotations
+import argparse
+import json
+import threading
+from dataclasses import asdict, dataclass, fields
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+
+PAGE = Path(__file__).resolve().parent / "chat.html"
+
+
+@dataclass
+class StandinConfig:
+    delay: int = 800
+    cps: int = 600
+    tick: int = 60
+    upload_ms: int = 1500
+    upload_kbps: int = 2000
+    malformed: float = 0.0
+    overlay: float = 0.0
+    seed: int = 1
+    tail: str = "Let me know if you need anything else."
+
+    def with_query(self, query: str) -> "StandinConfig":
+        """Cópia com os valores da query string aplicados (ignora chaves desconhecidas)."""
+        types = {f.name: f.type for f in fields(self)}
+        data = asdict(self)
+        for k, v in parse_qsl(query):
+            if k in types:
+                try:
+                    data[k] = {"int": int, "float": float}.get(types[k], str)(v)
+                except ValueError:
+                    pass
+        return StandinConfig(**data)
+
+
+def _handler(config: StandinConfig, template: str):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            if parts.path not in ("/", "/index.html"):
+                self.send_error(404)
+                return
+            cfg = config.with_query(parts.query)
+            body = template.replace("/*CONFIG*/{}", json.dumps(asdict(cfg))).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, fmt, *args):
+            pass  # silencioso: o benchmark imprime o que interessa
+
+    return Handler
+
+
+class StandinServer:
+    """Sobe o stand-in numa thread; port=0 escolhe uma porta livre."""
+
+    def __init__(self, config: StandinConfig | None = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or StandinConfig()
+        template = PAGE.read_text(encoding="utf-8")
+        self.httpd = ThreadingHTTPServer((host, port), _handler(self.config, template))
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> "StandinServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "StandinServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def add_arguments(ap: argparse.ArgumentParser) -> None:
+    d = StandinConfig()
+    ap.add_argument("--delay", type=int, default=d.delay, help="ms até o 1º token")
+    ap.add_argument("--cps", type=int, default=d.cps, help="caracteres/s no streaming")
+    ap.add_argument("--upload-ms", type=int, default=d.upload_ms, help="ms de upload por anexo")
+    ap.add_argument("--malformed", type=float, default=d.malformed, help="fração de JSON fora do schema")
+    ap.add_argument("--overlay", type=float, default=d.overlay, help="fração de respostas seguidas de popup")
+    ap.add_argument("--seed", type=int, default=d.seed)
+
+
+def config_from_args(args) -> StandinConfig:
+    return StandinConfig(delay=args.delay, cps=args.cps, upload_ms=args.upload_ms,
+                         malformed=args.malformed, overlay=args.overlay, seed=args.seed)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--port", type=int, default=8765)
+    add_arguments(ap)
+    args = ap.parse_args()
+    server = StandinServer(config_from_args(args), port=args.port)
+    print(f"stand-in em {server.url}  (CHAT_URL={server.url})  — Ctrl+C para sair")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,122 @@
 # run.py
+"""
+    python run.py [run] [--count N] [--tabs N] [--async] [--matrix CÉLULAS]   # processa (navegador)
+    python run.py status                        # PDFs e situação por variante/modo
+    python run.py plan [--count N]              # o que `run` enviaria agora
+    python run.py extract [--count N]           # pré-extrai os PDFs (aquece o cache de texto)
+    python run.py report [--run ID] [--cache]   # tempo por estágio / cache de respostas
+    python run.py evaluate [--gabarito ARQ]     # nota por campo contra o gabarito humano
+    python run.py ground [--threshold T]        # frases do resumo sem trecho que as sustente no PDF
+    python run.py analyze [--source planilha]   # qui-quadrado/Fisher entre estratégias (layout da planilha)
+
+Só `run` importa o navegador; sem subcomando vale `run` (as opções antigas
+continuam funcionando, ex.: `python run.py --count 3`, `python run.py --report`).
+"""
 import argparse
+import sys
 
-if __name__ == "__main__":
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--count", type=int, default=None, help="Quantos PDFs processar nesta execução")
-    args = parser.parse_args()
+COMMANDS = ("run", "status", "plan", "extract", "report", "evaluate", "ground", "analyze")
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="run.py")
+    sub = parser.add_subparsers(dest="command")
+
+    run = sub.add_parser("run", help="Processa os PDFs pendentes no navegador (padrão)")
+    run.add_argument("--count", type=int, default=None, help="Quantos PDFs processar nesta execução")
+    run.add_argument("--rebuild-cache", action="store_true", help="Ignora o cache de texto dos PDFs e reextrai")
+    run.add_argument("--bench-extractors", action="store_true",
+                     help="Compara os backends de extração em PDF/ e escolhe o padrão da pasta")
+    run.add_argument("--tabs", type=int, default=1,
+                     help="Quantas abas (conversas) processam artigos ao mesmo tempo")
+    run.add_argument("--async", dest="use_async", action="store_true",
+                     help="Usa o pipeline asyncio (Playwright async): abas, extração e escrita em paralelo")
+    run.add_argument("--sample", type=int, default=20, help="Quantos PDFs usar no benchmark")
+    run.add_argument("--matrix", default=None, metavar="CÉLULAS",
+                     help="Várias variantes/modos numa sessão: 'all' ou ex. 'cot:with,zeroshot:without'")
+    run.add_argument("--report", action="store_true",
+                     help="Resumo do tempo por estágio (p50/p95/máx) de outputs/metrics.jsonl")
+    run.add_argument("--run", default=None,
+                     help="run_id do --report (padrão: a última execução; 'all' = todas)")
+    run.add_argument("--replay", action="store_true",
+                     help="Refaz JSONs, base consolidada e consolidado.md a partir do cache de respostas, sem navegador")
+    run.add_argument("--cache-stats", action="store_true", help="Resumo do cache de respostas")
+
+    sub.add_parser("status", help="PDFs na pasta e situação de cada variante/modo")
+    plan = sub.add_parser("plan", help="Lista o que `run` enviaria agora (sem navegador)")
+    plan.add_argument("--count", type=int, default=None)
+    extract = sub.add_parser("extract", help="Pré-extrai os PDFs que `run` enviaria (sem navegador)")
+    extract.add_argument("--count", type=int, default=None)
+    extract.add_argument("--rebuild-cache", action="store_true")
+    report = sub.add_parser("report", help="Tempo por estágio (metrics.jsonl) ou cache de respostas")
+    report.add_argument("--run", default=None, help="run_id (padrão: a última execução; 'all' = todas)")
+    report.add_argument("--cache", action="store_true", help="Mostra o cache de respostas")
+    evaluate = sub.add_parser("evaluate", help="F1/cosseno por campo contra o gabarito (Arquivos/Gabarito Artigos.xlsx)")
+    evaluate.add_argument("--gabarito", default=None, help="Planilha do gabarito (padrão: GABARITO_PATH)")
+    ground = sub.add_parser("ground", help="Marca frases dos resumos sem suporte no texto do PDF")
+    ground.add_argument("--threshold", type=float, default=None, help="Cosseno mínimo (padrão: GROUNDING_THRESHOLD)")
+    ground.add_argument("--rebuild", action="store_true", help="Refaz os índices dos PDFs")
+    analyze = sub.add_parser("analyze", help="Qui-quadrado, Fisher e reamostragem entre estratégias e perguntas")
+    analyze.add_argument("--source", choices=("results", "planilha"), default="results",
+                         help="results = saídas + ground/evaluate; planilha = contagens de MEDICAO_PATH")
+    analyze.add_argument("--mode", default=None, help="with | without | all (padrão: PROMPT_MODE)")
+    analyze.add_argument("--resamples", type=int, default=None, help="Reamostragens por comparação (padrão: ANALYSIS_RESAMPLES)")
+    return parser
+
+
+def main(argv) -> None:
+    if not argv or (argv[0] not in COMMANDS and argv[0] not in ("-h", "--help")):
+        argv = ["run", *argv]
+    args = _parser().parse_args(argv)
 
-    from src.pipeline import main  # importa só agora
-    main(max_count=args.count)
+    if args.command != "run":
+        from src import cli
+        if args.command == "status":
+            cli.status()
+        elif args.command == "plan":
+            cli.plan(args.count)
+        elif args.command == "extract":
+            cli.extract(args.count, args.rebuild_cache)
+        elif args.command == "evaluate":
+            cli.evaluate(args.gabarito)
+        elif args.command == "ground":
+            cli.ground(args.threshold, args.rebuild)
+        elif args.command == "analyze":
+            cli.analyze(args.source, args.mode, args.resamples)
+        else:
+            cli.report(args.run, args.cache)
+        return
+
+    # opções antigas que não precisam do navegador
+    if args.report or args.cache_stats:
+        from src import cli
+        cli.report(args.run, cache=args.cache_stats)
+        return
+
+    if args.replay:
+        from src.response_cache import replay
+        replay()
+        return
+
+    if args.bench_extractors:
+        from src.extractor_bench import run_benchmark
+        run_benchmark(sample=args.sample)
+        return
+
+    if args.matrix:
+        from src.matrix import main as run_matrix, parse_cells
+        if args.use_async:
+            print("--matrix roda no pipeline síncrono (ignorando --async).")
+        run_matrix(parse_cells(args.matrix), max_count=args.count,
+                   rebuild_cache=args.rebuild_cache, tabs=args.tabs)
+        return
+
+    if args.use_async:
+        from src.async_pipeline import main as run_pipeline
+    else:
+        from src.pipeline import main as run_pipeline  # importa só agora
+    run_pipeline(max_count=args.count, rebuild_cache=args.rebuild_cache, tabs=args.tabs)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,418 @@
+# src/analysis.py
+"""
+Análise estatística das estratégias de prompt (o estudo de
+Arquivos/Análise CHi2 (1).xlsx, refeito a partir dos dados).
+
+Dados: contagens Acerto/Parcial/Alucinação por estratégia e pergunta, de
+uma de duas fontes:
+
+  - "planilha": as contagens manuais de Medição de Resultados.xlsx (aba
+    "Resultados Extração", bloco Pergunta x estratégia) — reproduz os
+    p-valores da planilha;
+  - "results": um rótulo por (artigo, variante, campo) tirado das saídas,
+    com os campos numerados como as 6 perguntas das planilhas e do gabarito
+    (1 objetivos + perguntas de pesquisa, 2 tipo, 3 metodologia, 4 achados,
+    5 conclusões, 6 limitações; a pergunta 1 tem dois rótulos por artigo):
+    campos de texto pela checagem de suporte (src/grounding.py: nenhuma
+    frase marcada = Acerto, até metade = Parcial, mais = Alucinação) e
+    study_type pelo gabarito (src/evaluate.py: igual = Acerto, com
+    palavras em comum = Parcial, senão Alucinação).
+
+Comparações (as mesmas abas da planilha): estratégia x estratégia (também
+sem Parcial e sem a pergunta 6, limitações), perguntas dentro de cada
+estratégia e cada pergunta contra as outras. Em cada uma: qui-quadrado
+(como CHISQ.TEST, sem correção de Yates), Fisher exato nas tabelas 2x2,
+p-valor por permutação (tabelas sorteadas com as margens fixas,
+hipergeométricas sequenciais) e IC 95% bootstrap das taxas por linha (e da
+diferença, com duas linhas). As reamostragens são sorteios NumPy
+vetorizados (uma chamada para todas as réplicas), repartidos em blocos entre
+processos (ANALYSIS_WORKERS).
+
+    python run.py analyze [--source results|planilha] [--mode with|without|all]
+"""
+from __future__ import annotations
+import csv
+import time
+from dataclasses import dataclass, field
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.config import (
+    ANALYSIS_PATH, ANALYSIS_RESAMPLES, ANALYSIS_SEED, ANALYSIS_WORKERS, MEDICAO_PATH, PROMPT_MODE,
+)
+from src.log import info, warn
+
+LABELS = ("Acerto", "Parcial", "Alucinação")
+# campo do ArticleSummary -> nº da pergunta nas planilhas e no gabarito (objetivos e perguntas = 1)
+QUESTIONS: Dict[str, int] = {
+    "main_objectives": 1, "research_questions": 1, "study_type": 2, "methodology": 3,
+    "main_findings": 4, "conclusions": 5, "limitations": 6,
+}
+SEM_6 = QUESTIONS["limitations"]  # a pergunta que as abas "(sem 6)" / "s6" deixam de fora
+STRATEGIES = {"zeroshot": ("ZS", "Zero"), "fewshot": ("FS", "Few"), "cot": ("COT", "COT")}
+_SHEET_STRATEGIES = {"zero shot": "zeroshot", "few shot": "fewshot", "cot": "cot"}
+H0 = "H0: Não há evidências de que os resultados dependam do tratamento dado."
+HA = "HA: Há evidências de que os resultados sejam dependentes do tratamento dado."
+ALPHA = 0.05
+
+
+def _short(variant: str) -> str:
+    return STRATEGIES.get(variant, (variant.upper(),))[0]
+
+
+# ---------- contagens ----------
+@dataclass
+class Tally:
+    strategies: List[str]   # variantes (zeroshot, fewshot, cot...)
+    questions: List[int]
+    counts: np.ndarray      # [estratégia, pergunta, rótulo]
+    source: str = ""
+
+    @classmethod
+    def from_labels(cls, variants: Sequence[str], questions: Sequence[int], labels: Sequence[int],
+                    source: str = "results") -> "Tally":
+        order = {v: i for i, v in enumerate(STRATEGIES)}
+        strategies = sorted(set(variants), key=lambda v: (order.get(v, len(order)), v))
+        qs = sorted(set(questions))
+        counts = np.zeros((len(strategies), len(qs), len(LABELS)), dtype=np.int64)
+        s_idx = np.array([strategies.index(v) for v in variants], dtype=np.int64)
+        q_idx = np.searchsorted(qs, np.asarray(questions))
+        np.add.at(counts, (s_idx, q_idx, np.asarray(labels, dtype=np.int64)), 1)
+        return cls(strategies, qs, counts, source)
+
+
+def tally_from_sheet(path: Path = MEDICAO_PATH, sheet: str = "Resultados Extração") -> Tally:
+    """Bloco 'Pergunta' x (estratégia: Acertos/Parcial/Alucinação) das contagens manuais."""
+    from openpyxl import load_workbook
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = [list(r) for r in wb[sheet].iter_rows(values_only=True)]
+    finally:
+        wb.close()
+    for r, row in enumerate(rows):
+        if "Pergunta" in row:
+            c0 = row.index("Pergunta")
+            break
+    else:
+        raise ValueError(f"{path.name}/{sheet}: cabeçalho 'Pergunta' não encontrado")
+    header = rows[r - 1]
+    starts = [j for j in range(c0 + 1, len(header)) if str(header[j] or "").strip().lower() in _SHEET_STRATEGIES]
+    strategies = [_SHEET_STRATEGIES[str(header[j]).strip().lower()] for j in starts]
+    questions, blocks = [], []
+    for row in rows[r + 1:]:
+        if not isinstance(row[c0], (int, float)):
+            break
+        questions.append(int(row[c0]))
+        blocks.append([[int(row[j + k] or 0) for k in range(len(LABELS))] for j in starts])
+    counts = np.array(blocks, dtype=np.int64).transpose(1, 0, 2)  # pergunta x estratégia -> estratégia x pergunta
+    return Tally(strategies, questions, counts, f"planilha ({Path(path).name})")
+
+
+def tally_from_results(mode: Optional[str] = PROMPT_MODE) -> Optional[Tally]:
+    """Um rótulo por (artigo, variante, campo): suporte no PDF + gabarito para study_type."""
+    from src.grounding import ground
+    from src.evaluate import evaluate
+    from src.storage import ResultsStore
+    rows = [r for r in ResultsStore().latest_rows() if mode in (None, "all") or r.get("mode") == mode]
+    variants: List[str] = []
+    questions: List[int] = []
+    labels: List[int] = []
+
+    g = ground(rows=rows).columns
+    if len(g["score"]):
+        keys = np.array([f"{a}\t{v}\t{f}" for a, v, f in zip(g["article"], g["variant"], g["field"])])
+        uniq, inv = np.unique(keys, return_inverse=True)
+        frac = np.bincount(inv, g["flagged"].astype(float)) / np.bincount(inv)
+        label = np.where(frac == 0, 0, np.where(frac <= 0.5, 1, 2))
+        for k, lab in zip(uniq, label):
+            _, v, f = k.split("\t")
+            variants.append(v)
+            questions.append(QUESTIONS[f])
+            labels.append(int(lab))
+
+    e = evaluate(rows=rows)
+    if e is not None and len(e):
+        c = e.columns
+        sel = c["field"] == "study_type"
+        for v, exact, f1 in zip(c["variant"][sel], c["exact"][sel], c["f1"][sel]):
+            variants.append(v)
+            questions.append(QUESTIONS["study_type"])
+            labels.append(0 if exact == 1 else (1 if f1 > 0 else 2))
+    if not labels:
+        warn("Nenhum rótulo para analisar (rode `python run.py ground` / confira o gabarito).")
+        return None
+    return Tally.from_labels(variants, questions, labels, f"results (modo {mode or 'all'})")
+
+
+# ---------- comparações ----------
+@dataclass
+class Comparison:
+    name: str                    # nome da aba
+    header: str                  # célula A1 ("Observado", "Observado ZS")
+    rows: List[str]
+    cols: List[str]
+    table: np.ndarray            # observado, linhas x colunas
+    # preenchidos por run_tests
+    expected: Optional[np.ndarray] = None
+    chi2: float = float("nan")
+    dof: int = 0
+    p_chi2: float = float("nan")
+    p_fisher: float = float("nan")
+    p_perm: float = float("nan")
+    rate_ci: Optional[np.ndarray] = None   # [linha, coluna, (baixo, alto)]
+    diff_ci: Optional[np.ndarray] = None   # [coluna, (baixo, alto)] da linha 0 - linha 1
+    resamples: int = 0
+
+
+def comparisons(t: Tally) -> List[Comparison]:
+    """As abas da planilha do qui-quadrado, geradas para as estratégias/perguntas presentes."""
+    out: List[Comparison] = []
+    labels = list(LABELS)
+    q_all = list(range(len(t.questions)))
+    q_no6 = [i for i, q in enumerate(t.questions) if q != SEM_6]
+    pairs = list(combinations(range(len(t.strategies)), 2))
+    if len(pairs) == 3:
+        pairs = [(0, 1), (1, 2), (2, 0)]  # ZS vs FS, FS vs COT, COT vs ZS (como na planilha)
+    for a, b in pairs:
+        name = f"{_short(t.strategies[a])} vs {_short(t.strategies[b])}"
+        # as abas derivadas citam o par na ordem das estratégias ("ZS vs COT (sem parcial)")
+        derived = f"{_short(t.strategies[min(a, b)])} vs {_short(t.strategies[max(a, b)])}"
+        rows = [STRATEGIES.get(t.strategies[i], (None, t.strategies[i]))[1] for i in (a, b)]
+        both = t.counts[[a, b]]
+        out.append(Comparison(name, "Observado", rows, labels, both[:, q_all].sum(1)))
+        out.append(Comparison(f"{derived} (sem parcial)", "Observado", rows, [LABELS[0], LABELS[2]],
+                              both[:, q_all].sum(1)[:, [0, 2]]))
+        if len(q_no6) < len(q_all):
+            out.append(Comparison(f"{derived} (sem 6)", "Observado", rows, labels, both[:, q_no6].sum(1)))
+    for s, variant in enumerate(t.strategies):
+        short = _short(variant)
+        out.append(Comparison(f"Questões ({short})", f"Observado {short}", [str(q) for q in t.questions],
+                              labels, t.counts[s]))
+        for i, q in enumerate(t.questions):
+            for suffix, others in (("", q_all), (" s6", q_no6)):
+                if suffix and q == SEM_6 or suffix and len(q_no6) == len(q_all):
+                    continue
+                rest = [k for k in others if k != i]
+                if rest:
+                    out.append(Comparison(f"{q} vs outras {short}{suffix}", f"Observado {short}", ["outras", str(q)],
+                                          labels, np.stack([t.counts[s, rest].sum(0), t.counts[s, i]])))
+    return out
+
+
+def _drop_empty(table: np.ndarray) -> np.ndarray:
+    """Sem linhas/colunas zeradas (esperado 0 não entra no qui-quadrado)."""
+    return table[table.sum(1) > 0][:, table.sum(0) > 0]
+
+
+def _chi2_stat(tables: np.ndarray, expected: np.ndarray) -> np.ndarray:
+    return ((tables - expected) ** 2 / expected).sum(axis=(-2, -1))
+
+
+def random_tables(rng: np.random.Generator, row_sums: np.ndarray, col_sums: np.ndarray, n: int) -> np.ndarray:
+    """n tabelas com as margens dadas, sorteadas como permutações dos rótulos (hipergeométricas em sequência)."""
+    r, c = len(row_sums), len(col_sums)
+    out = np.zeros((n, r, c), dtype=np.int64)
+    left = np.tile(np.asarray(col_sums, dtype=np.int64), (n, 1))   # rótulos ainda não distribuídos
+    for i in range(r - 1):
+        need = np.full(n, row_sums[i], dtype=np.int64)
+        pool = left.sum(1)
+        for j in range(c - 1):
+            pool = pool - left[:, j]  # rótulos das colunas depois de j
+            x = rng.hypergeometric(left[:, j], pool, need)
+            out[:, i, j] = x
+            left[:, j] -= x
+            need -= x
+        out[:, i, c - 1] = need
+        left[:, c - 1] -= need
+    out[:, r - 1] = left
+    return out
+
+
+def _resample_job(table: np.ndarray, n: int, seed: np.random.SeedSequence) -> Tuple[int, np.ndarray]:
+    """Roda no processo filho: (nº de permutações com qui-quadrado >= observado, taxas bootstrap [n, linhas, colunas])."""
+    rng = np.random.default_rng(seed)
+    rows, cols = table.sum(1), table.sum(0)
+    expected = np.outer(rows, cols) / table.sum()
+    observed = _chi2_stat(table, expected)
+    perm = _chi2_stat(random_tables(rng, rows, cols, n), expected)
+    ge = int((perm >= observed - 1e-9).sum())
+    boot = np.stack([rng.multinomial(rows[i], table[i] / rows[i], size=n) / rows[i] for i in range(len(rows))], axis=1)
+    return ge, boot.astype(np.float32)
+
+
+def run_tests(cmps: List[Comparison], resamples: int = ANALYSIS_RESAMPLES, workers: int = ANALYSIS_WORKERS,
+              seed: int = ANALYSIS_SEED, chunk: int = 5000) -> List[Comparison]:
+    """Qui-quadrado/Fisher exatos + permutação e bootstrap, com as reamostragens em blocos no pool."""
+    from scipy.stats import chi2_contingency, fisher_exact
+    jobs: List[Tuple[int, np.ndarray, int]] = []
+    for k, c in enumerate(cmps):
+        table = _drop_empty(c.table)
+        if table.shape[0] < 2 or table.shape[1] < 2:
+            continue  # uma linha/coluna só: nada a testar
+        c.chi2, c.p_chi2, c.dof, _ = chi2_contingency(table, correction=False)
+        c.expected = np.outer(c.table.sum(1), c.table.sum(0)) / c.table.sum()
+        if c.table.shape == (2, 2):
+            c.p_fisher = float(fisher_exact(c.table).pvalue)
+        for start in range(0, resamples, chunk):
+            jobs.append((k, table, min(chunk, resamples - start)))
+
+    seeds = np.random.SeedSequence(seed).spawn(len(jobs))
+    args = [(table, n, s) for (_, table, n), s in zip(jobs, seeds)]
+    if workers > 0 and len(jobs) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_resample_job, *zip(*args), chunksize=max(1, len(args) // (workers * 4))))
+    else:
+        results = [_resample_job(*a) for a in args]
+
+    merged: Dict[int, Tuple[int, List[np.ndarray]]] = {}
+    for (k, _, _), (ge, boot) in zip(jobs, results):
+        total, boots = merged.setdefault(k, (0, []))
+        boots.append(boot)
+        merged[k] = (total + ge, boots)
+    for k, (ge, boots) in merged.items():
+        c = cmps[k]
+        boot = np.concatenate(boots)
+        c.resamples = len(boot)
+        c.p_perm = (ge + 1) / (len(boot) + 1)
+        # o bootstrap rodou sem as linhas/colunas zeradas: volta para o formato da tabela (taxa 0, IC [0; 0])
+        rows, cols = np.flatnonzero(c.table.sum(1) > 0), np.flatnonzero(c.table.sum(0) > 0)
+        full = np.zeros((len(boot), *c.table.shape), dtype=np.float32)
+        full[:, rows[:, None], cols] = boot
+        c.rate_ci = np.moveaxis(np.percentile(full, [2.5, 97.5], axis=0), 0, -1)
+        if c.table.shape[0] == 2:
+            c.diff_ci = np.moveaxis(np.percentile(full[:, 0] - full[:, 1], [2.5, 97.5], axis=0), 0, -1)
+    return cmps
+
+
+# ---------- saída ----------
+def _rates(c: Comparison) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return c.table / c.table.sum(1, keepdims=True)
+
+
+def export_xlsx(t: Tally, cmps: List[Comparison], path: Path = ANALYSIS_PATH) -> Path:
+    """Aba 'Dados' (Pergunta x estratégia) + uma aba por comparação no layout da planilha do qui-quadrado."""
+    from openpyxl import Workbook
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Dados"
+    ws.cell(1, 1, f"Fonte: {t.source}")
+    ws.cell(2, 1, "Pergunta")
+    for s, variant in enumerate(t.strategies):
+        ws.cell(1, 2 + 3 * s, STRATEGIES.get(variant, (variant, variant))[0])
+        for k, lab in enumerate(("Acertos", "Parcial", "Alucinação")):
+            ws.cell(2, 2 + 3 * s + k, lab)
+    for i, q in enumerate(t.questions):
+        ws.cell(3 + i, 1, q)
+        for s in range(len(t.strategies)):
+            for k in range(len(LABELS)):
+                ws.cell(3 + i, 2 + 3 * s + k, int(t.counts[s, i, k]))
+    total = t.counts.sum(1)
+    for s in range(len(t.strategies)):
+        for k in range(len(LABELS)):
+            ws.cell(3 + len(t.questions), 2 + 3 * s + k, int(total[s, k]))
+
+    for c in cmps:
+        ws = wb.create_sheet(c.name[:31])
+        r, k = c.table.shape
+        ws.cell(1, 1, c.header)
+        for j, lab in enumerate(c.cols + ["Total"]):
+            ws.cell(1, 2 + j, lab)
+        for i, lab in enumerate(c.rows):
+            ws.cell(2 + i, 1, int(lab) if lab.isdigit() else lab)
+            for j in range(k):
+                ws.cell(2 + i, 2 + j, int(c.table[i, j]))
+            ws.cell(2 + i, 2 + k, int(c.table[i].sum()))
+        row = 3 + r
+        ws.cell(row, 1, "Esperado")
+        if c.expected is not None:
+            for i in range(r):
+                for j in range(k):
+                    ws.cell(row + i, 2 + j, round(float(c.expected[i, j]), 4))
+        row += r + 1
+        ws.cell(row, 1, "Estatística")
+        ws.cell(row, 2, round(float(c.chi2), 6))
+        ws.cell(row, 3, f"gl = {c.dof}")
+        row += 2
+        ws.cell(row, 1, "p-valor")
+        ws.cell(row, 2, float(c.p_chi2))
+        ws.cell(row, 3, H0)
+        ws.cell(row + 1, 2, "< 5% ------>")
+        ws.cell(row + 1, 3, HA)
+
+        # à direita: Fisher, permutação e IC bootstrap das taxas
+        col = 4 + k + 2
+        ws.cell(1, col, "Fisher exato (2x2)")
+        ws.cell(1, col + 1, None if np.isnan(c.p_fisher) else float(c.p_fisher))
+        ws.cell(2, col, f"Permutação ({c.resamples} tabelas)")
+        ws.cell(2, col + 1, None if np.isnan(c.p_perm) else float(c.p_perm))
+        ws.cell(4, col, "Taxa (IC 95% bootstrap)")
+        for j, lab in enumerate(c.cols):
+            ws.cell(4, col + 1 + j, lab)
+        rates = _rates(c)
+        for i, lab in enumerate(c.rows):
+            ws.cell(5 + i, col, lab)
+            for j in range(k):
+                ci = c.rate_ci[i, j] if c.rate_ci is not None else (np.nan, np.nan)
+                ws.cell(5 + i, col + 1 + j, f"{rates[i, j]:.1%} [{ci[0]:.1%}; {ci[1]:.1%}]")
+        if c.diff_ci is not None:
+            ws.cell(5 + r, col, f"{c.rows[0]} − {c.rows[1]}")
+            for j in range(k):
+                d = rates[0, j] - rates[1, j]
+                ws.cell(5 + r, col + 1 + j, f"{d:+.1%} [{c.diff_ci[j, 0]:+.1%}; {c.diff_ci[j, 1]:+.1%}]")
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    wb.save(path)
+    return path
+
+
+def write_csv(cmps: List[Comparison], path: Path) -> Path:
+    """Uma linha por comparação: estatística, p-valores e a diferença de alucinação com IC (2 linhas)."""
+    with Path(path).open("w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["comparison", "n", "chi2", "dof", "p_chi2", "p_fisher", "p_perm", "resamples",
+                    "halluc_diff", "halluc_diff_lo", "halluc_diff_hi"])
+        for c in cmps:
+            diff = lo = hi = ""
+            if c.diff_ci is not None and LABELS[2] in c.cols:
+                j = c.cols.index(LABELS[2])
+                rates = _rates(c)
+                diff, lo, hi = (f"{rates[0, j] - rates[1, j]:.4f}", f"{c.diff_ci[j, 0]:.4f}", f"{c.diff_ci[j, 1]:.4f}")
+            w.writerow([c.name, int(c.table.sum()), f"{c.chi2:.4f}", c.dof, f"{c.p_chi2:.6g}",
+                        "" if np.isnan(c.p_fisher) else f"{c.p_fisher:.6g}", f"{c.p_perm:.6g}", c.resamples,
+                        diff, lo, hi])
+    return Path(path)
+
+
+def report(cmps: List[Comparison]) -> None:
+    print(f"  {'comparação':<28}{'n':>6}{'qui²':>9}{'gl':>4}{'p (qui²)':>11}{'p (Fisher)':>12}{'p (perm.)':>11}")
+    for c in cmps:
+        fisher = "" if np.isnan(c.p_fisher) else f"{c.p_fisher:.4f}"
+        mark = " *" if c.p_chi2 < ALPHA else ""
+        print(f"  {c.name:<28}{int(c.table.sum()):>6}{c.chi2:>9.2f}{c.dof:>4}{c.p_chi2:>11.4f}{fisher:>12}"
+              f"{c.p_perm:>11.4f}{mark}")
+    print(f"  * p < {ALPHA:.0%} no qui-quadrado")
+
+
+@dataclass
+class Analysis:
+    tally: Tally
+    comparisons: List[Comparison] = field(default_factory=list)
+    seconds: float = 0.0
+
+
+def analyze(source: str = "results", mode: Optional[str] = PROMPT_MODE, resamples: int = ANALYSIS_RESAMPLES,
+            workers: int = ANALYSIS_WORKERS) -> Optional[Analysis]:
+    t0 = time.perf_counter()
+    tally = tally_from_sheet() if source == "planilha" else tally_from_results(mode)
+    if tally is None:
+        return None
+    cmps = run_tests(comparisons(tally), resamples=resamples, workers=workers)
+    result = Analysis(tally, cmps, time.perf_counter() - t0)
+    info(f"Análise ({tally.source}): {len(cmps)} comparação(ões), {resamples} reamostragens cada, "
+         f"em {result.seconds:.1f}s")
+    return result
@@ -0,0 +1,190 @@
+# src/async_pipeline.py
+"""
+Pipeline assíncrono (python run.py --async [--tabs N]).
+
+Três estágios rodando ao mesmo tempo num único processo:
+  - extração: PDFs vão para o ProcessPoolExecutor da pré-extração, com uma
+    janela de PREFETCH_AHEAD itens à frente;
+  - abas: N workers (uma conversa cada) puxam da mesma fila e usam
+    send_prompt_and_get_json_async — upload, digitação e geração de abas
+    diferentes se sobrepõem;
+  - escrita: um único escritor grava JSON/results.jsonl numa thread
+    (sem corrida) e atualiza o ledger no loop.
+
+`main()` é o invólucro síncrono (asyncio.run) usado pelo run.py.
+"""
+from __future__ import annotations
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from src.config import (
+    ATTACH_PDF,
+    LAZY_EXTRACT,
+    PREFETCH_AHEAD,
+    PREFETCH_WORKERS,
+    PROMPT_MODE,
+    PROMPT_VARIANT,
+    WAIT_AFTER_SEND_SEC,
+)
+from src.log import info, warn, error
+from src.browser_utils import set_tab_label
+from src.prefetch import _extract_job
+from src.storage import ResultsStore, new_run_id
+from src.metrics import ArticleTrace, bind, record
+from src.async_runner import send_prompt_and_get_json_async
+from src.plan import link_dups, plan
+from src.session import ensure_dirs, persist, run_session_async
+
+
+async def _extract_stage(todo, hashes, ledger, jobs: asyncio.Queue, tabs: int,
+                         full_text: bool, refresh: bool, pool, run_id: str) -> None:
+    """Extrai com até `ahead` PDFs em voo e entrega na fila, na ordem."""
+    loop = asyncio.get_running_loop()
+    pending = iter(enumerate(todo, start=1))
+    window: deque = deque()
+
+    def _submit() -> None:
+        nxt = next(pending, None)
+        if nxt is not None:
+            idx, path = nxt
+            window.append((idx, path, loop.run_in_executor(pool, _extract_job, str(path), full_text, refresh)))
+
+    for _ in range(max(1, PREFETCH_AHEAD)):
+        _submit()
+    try:
+        while window:
+            idx, pdf_path, fut = window.popleft()
+            _submit()  # repõe a janela antes de esperar
+            sha = hashes[pdf_path]
+            trace = ArticleTrace(run_id, pdf_path.stem, sha, PROMPT_VARIANT, PROMPT_MODE)
+            try:
+                text, has_text, seconds = await fut
+            except Exception as e:
+                error(f"Falha ao extrair texto de {pdf_path.name}: {e}")
+                ledger.mark_failed(sha, PROMPT_VARIANT, PROMPT_MODE, f"extração: {e}")
+                trace.write("failed", f"extração: {e}")
+                continue
+            with bind(trace):
+                record("extract", seconds)
+            if not has_text:
+                warn(f"Sem texto extraído — pulando: {pdf_path.name}")
+                ledger.mark_failed(sha, PROMPT_VARIANT, PROMPT_MODE, "sem texto extraído")
+                trace.write("failed", "sem texto extraído")
+                continue
+            await jobs.put((idx, pdf_path, sha, text, trace))
+    finally:
+        for _ in range(tabs):
+            await jobs.put(None)  # um "fim" por aba
+
+
+async def _tab_worker(page, label: str, jobs: asyncio.Queue, writes: asyncio.Queue,
+                      ledger, total: int, gate: asyncio.Lock, last_send: list) -> None:
+    set_tab_label(page, label)
+    while True:
+        t0 = time.monotonic()
+        job = await jobs.get()
+        if job is None:
+            return
+        idx, pdf_path, sha, text, trace = job
+        trace.tab = label
+        with bind(trace):
+            record("extract_wait", time.monotonic() - t0)  # aba parada esperando a extração
+        # respiro mínimo entre dois envios de qualquer aba (evita bloqueios/limites)
+        async with gate:
+            gap = max(1.0, WAIT_AFTER_SEND_SEC) - (time.monotonic() - last_send[0])
+            if gap > 0:
+                await asyncio.sleep(gap)
+            last_send[0] = time.monotonic()
+
+        info(f"[{idx}/{total}] [{label}] {pdf_path.name}")
+        ledger.mark_in_flight(sha, PROMPT_VARIANT, PROMPT_MODE)
+        stats: dict = {}
+        t0 = time.monotonic()
+        try:
+            with bind(trace):
+                summary = await send_prompt_and_get_json_async(
+                    page,
+                    file_title=pdf_path.stem,
+                    text=text or "",
+                    file_path=str(pdf_path) if ATTACH_PDF else None,
+                    stats=stats,
+                    pdf_sha256=sha,
+                )
+        except Exception as e:
+            error(f"Falha ao obter/validar JSON para {pdf_path.name} [{label}]: {e}")
+            ledger.mark_failed(sha, PROMPT_VARIANT, PROMPT_MODE, str(e))
+            trace.write("failed", str(e))
+            continue
+        await writes.put((pdf_path, sha, summary, stats, trace, f" [{label}, {time.monotonic() - t0:.0f}s]"))
+
+
+async def _writer(writes: asyncio.Queue, store, ledger, run_id: str) -> None:
+    while True:
+        item = await writes.get()
+        if item is None:
+            return
+        pdf_path, sha, summary, stats, trace, tag = item
+        try:
+            with bind(trace):  # to_thread copia o contexto: o span de persist cai no trace
+                out_path = await asyncio.to_thread(persist, store, run_id, pdf_path, sha, summary, stats)
+        except Exception as e:
+            error(f"Falha ao gravar {pdf_path.name}: {e}")
+            ledger.mark_failed(sha, PROMPT_VARIANT, PROMPT_MODE, f"gravação: {e}")
+            trace.write("failed", f"gravação: {e}")
+            continue
+        info(f"✅{tag} Salvo JSON e consolidado para {pdf_path.name}")
+        ledger.mark_done(sha, PROMPT_VARIANT, PROMPT_MODE, out_path)
+        trace.write("done")
+
+
+async def main_async(max_count: int | None = None, rebuild_cache: bool = False, tabs: int = 1) -> None:
+    ensure_dirs()
+    planned = plan(max_count)
+    if planned is None:
+        return
+    ledger, todo, hashes, links = planned
+
+    run_id = new_run_id()
+    store = ResultsStore()
+    tabs = max(1, min(tabs, len(todo)))
+    info(f"Processando {len(todo)} arquivo(s) nesta execução (run {run_id}, async, {tabs} aba(s))...")
+
+    # com anexo (e modo preguiçoso) o texto completo não é necessário: só checa se há texto
+    full_text = (not ATTACH_PDF) or (not LAZY_EXTRACT)
+    pool = ProcessPoolExecutor(max_workers=PREFETCH_WORKERS) if PREFETCH_WORKERS > 0 else None
+    jobs: asyncio.Queue = asyncio.Queue(maxsize=max(tabs, PREFETCH_AHEAD))
+    writes: asyncio.Queue = asyncio.Queue()
+
+    extract = writer = None
+    try:
+        async with run_session_async(store, ledger,
+                                     lambda: link_dups(store, ledger, links, hashes, run_id)) as session:
+            try:
+                # a extração já começa durante o login manual
+                extract = asyncio.create_task(
+                    _extract_stage(todo, hashes, ledger, jobs, tabs, full_text, rebuild_cache, pool, run_id))
+                writer = asyncio.create_task(_writer(writes, store, ledger, run_id))
+
+                pages = await session.ready(tabs)
+                gate, last_send = asyncio.Lock(), [0.0]
+                await asyncio.gather(*(
+                    _tab_worker(pg, f"aba {i}", jobs, writes, ledger, len(todo), gate, last_send)
+                    for i, pg in enumerate(pages, start=1)
+                ))
+                await extract
+                await writes.put(None)
+                await writer
+            finally:
+                for task in (extract, writer):
+                    if task is not None and not task.done():
+                        task.cancel()
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def main(max_count: int | None = None, rebuild_cache: bool = False, tabs: int = 1) -> None:
+    """Entrada síncrona: só roda o pipeline async."""
+    asyncio.run(main_async(max_count=max_count, rebuild_cache=rebuild_cache, tabs=tabs))
@@ -0,0 +1,500 @@
+# src/async_runner.py
+"""
+Versão asyncio do runner, sobre o Playwright async.
+
+Mesmo fluxo de src/browser_utils.py + src/chatgpt_runner.py, com as mesmas
+decisões (src/runner_core.py: leitura do snapshot, pausas manuais, prompt,
+cache, validação incremental e correção), mas toda chamada à página é
+`await`: upload, digitação e geração de várias abas, extração de PDFs e
+escrita em disco se sobrepõem num único processo. As pausas manuais rodam
+`input()` numa thread e uma de cada vez, sem travar as outras abas.
+"""
+from __future__ import annotations
+import asyncio
+import os
+import random
+import time
+from typing import Optional
+
+from src.config import (
+    CHAT_URL,
+    FILL_STRATEGY,
+    JITTER_MED,
+    JITTER_SHORT,
+    SEND_CHECK_INTERVAL_SEC,
+)
+from src.schema import ArticleSummary
+from src.metrics import current, span
+from src.hashing import file_sha256
+from src.page_state import SNAPSHOT_JS, PageSnapshot
+from src.selector_cache import FINGERPRINT_JS, get_resolver
+from src.selectors import (
+    ATTACH_BUTTONS,
+    COMPOSER_VISIBLE,
+    FILE_INPUTS,
+    LAST_MESSAGE_SELECTOR,
+    OVERLAY_BUTTONS,
+    SEND_BUTTONS,
+    STOP_BUTTONS,
+)
+from src.stream_watch import BINDING, OBSERVER_JS, StreamWatcher
+from src.browser_utils import _TAB_LABELS
+from src.runner_core import (
+    CURSOR_TARGET,
+    EDITOR_TEXT_JS,
+    FILL_CHUNK,
+    AnswerParser,
+    ExchangeCore,
+    StableAnswer,
+    UploadWatch,
+    chunks,
+    cursor_path,
+    editor_matches,
+    fill_mismatch,
+    fill_report,
+    launch_options,
+    manual_resolved,
+    outbound,
+    pause_box,
+    readiness,
+    record_answer_times,
+    send_disabled,
+    send_state,
+)
+
+_manual: Optional[asyncio.Lock] = None  # uma pausa manual por vez (criado dentro do loop)
+
+
+# ---------- utilidades ----------
+async def _sleep_range(rng) -> None:
+    await asyncio.sleep(random.uniform(*rng))
+
+async def human_idle_short() -> None:
+    await _sleep_range(JITTER_SHORT)
+
+async def human_idle_med() -> None:
+    await _sleep_range(JITTER_MED)
+
+async def humanize_cursor_async(page) -> None:
+    """Movimenta o mouse de forma suave até a área do editor (sem clicar)."""
+    try:
+        box = await page.locator(CURSOR_TARGET).first.bounding_box()
+        for x, y, steps in cursor_path(box) if box else ():
+            await page.mouse.move(x, y, steps=steps)
+            await human_idle_short()
+    except Exception:
+        pass
+
+def _manual_lock() -> asyncio.Lock:
+    global _manual
+    if _manual is None:
+        _manual = asyncio.Lock()
+    return _manual
+
+async def _attention(page) -> str:
+    label = _TAB_LABELS.get(id(page))
+    if not label:
+        return ""
+    try:
+        await page.bring_to_front()
+    except Exception:
+        pass
+    return f" [{label}]"
+
+async def _enter(prompt: str) -> None:
+    """input() numa thread: o loop (e as outras abas) segue rodando."""
+    with span("manual_pause"):
+        await asyncio.to_thread(input, prompt)
+
+async def _ask(page, key: str, **fields) -> None:
+    """Caixa de pausa manual (src/runner_core.PAUSES) + ENTER, uma pausa por vez."""
+    async with _manual_lock():
+        await _enter(pause_box(key, await _attention(page), **fields))
+
+async def launch_browser_async():
+    from playwright.async_api import async_playwright
+    pw = await async_playwright().start()
+    browser = await pw.chromium.launch_persistent_context(**launch_options())
+    page = await browser.new_page()
+    return pw, browser, page
+
+
+# ---------- estado da página / seletores ----------
+async def snapshot_async(page, filename: Optional[str] = None) -> PageSnapshot:
+    try:
+        return PageSnapshot.from_dict(await page.evaluate(SNAPSHOT_JS, filename or ""))
+    except Exception:
+        return PageSnapshot(ok=False)
+
+async def _ordered(page, role: str, candidates):
+    """Ordem aprendida (src/selector_cache.py); a impressão digital é avaliada aqui."""
+    res = get_resolver()
+    if not res.knows(page):
+        try:
+            raw = await page.evaluate(FINGERPRINT_JS)
+        except Exception:
+            raw = page.url
+        res.set_fingerprint(page, raw)
+    return res.order(page, role, candidates)
+
+async def _first_visible(page, role: str, candidates):
+    res = get_resolver()
+    ordered = await _ordered(page, role, candidates)
+    for n, sel in enumerate(ordered, start=1):
+        loc = page.locator(sel)
+        try:
+            if await loc.count() > 0 and await loc.first.is_visible():
+                res.record(page, role, sel, missed=ordered[:n - 1])
+                return sel, loc.first
+        except Exception:
+            continue
+    return None, None
+
+
+# ---------- overlays / prontidão ----------
+async def dismiss_overlays_async(page) -> None:
+    try:
+        if await page.locator(", ".join(OVERLAY_BUTTONS)).count() == 0:
+            return
+        for sel in await _ordered(page, "overlay", OVERLAY_BUTTONS):
+            btn = page.locator(sel)
+            if await btn.count() > 0 and await btn.first.is_visible():
+                try:
+                    await btn.first.click(timeout=1000)
+                    get_resolver().record(page, "overlay", sel)
+                except Exception:
+                    pass
+    except Exception:
+        pass
+
+async def pause_until_ready_manual_async(page, reason: str = "login/captcha pendente") -> None:
+    async with _manual_lock():
+        prompt = pause_box("login", await _attention(page), reason=reason)
+        while True:
+            await _enter(prompt)
+            await dismiss_overlays_async(page)
+            if manual_resolved(await snapshot_async(page)):
+                return
+
+async def ensure_ready_async(page, tries: int = 3) -> None:
+    for n in range(tries):
+        state = readiness(await snapshot_async(page))
+        if state == "ready":
+            return
+        if state == "manual" or n == tries - 1:
+            break
+        if state == "overlay":
+            await dismiss_overlays_async(page)
+        else:
+            await asyncio.sleep(0.5)  # retrato falhou (navegação): olha de novo
+    await pause_until_ready_manual_async(page)
+
+async def open_chat_home_async(page) -> None:
+    await page.bring_to_front()
+    await page.goto(CHAT_URL, wait_until="domcontentloaded")
+    await dismiss_overlays_async(page)
+
+
+# ---------- upload ----------
+async def wait_for_upload_complete_async(page, filename: str, soft_timeout: float = 30.0,
+                                         hard_timeout: float = 90.0) -> None:
+    with span("upload_wait"):
+        watch = UploadWatch(soft_timeout, hard_timeout)
+        while True:
+            snap = await snapshot_async(page, filename)
+            if snap.overlay:
+                await dismiss_overlays_async(page)
+            action = watch.step(snap)
+            if action == "done":
+                return
+            if action:
+                await _ask(page, action)
+                watch.asked()
+                continue
+            await asyncio.sleep(watch.interval)
+
+async def attach_file_async(page, file_path: str) -> None:
+    filename = os.path.basename(file_path)
+    res = get_resolver()
+
+    async def _try_set_on_any_input() -> bool:
+        for sel in await _ordered(page, "file_input", FILE_INPUTS):
+            inp = page.locator(sel)
+            try:
+                if await inp.count() == 0:
+                    continue
+                await inp.first.set_input_files(file_path, timeout=1500)
+                res.record(page, "file_input", sel)
+                return True
+            except Exception:
+                continue
+        return False
+
+    await dismiss_overlays_async(page)
+
+    # 1) direto no input
+    if await _try_set_on_any_input():
+        return await wait_for_upload_complete_async(page, filename)
+
+    # 2) clicar em botões e tentar novamente
+    for btn_sel in await _ordered(page, "attach", ATTACH_BUTTONS):
+        btn = page.locator(btn_sel)
+        try:
+            if await btn.count() > 0 and await btn.first.is_visible():
+                await btn.first.click(timeout=1500)
+                await asyncio.sleep(0.3)
+                if await _try_set_on_any_input():
+                    res.record(page, "attach", btn_sel)
+                    return await wait_for_upload_complete_async(page, filename)
+        except Exception:
+            continue
+
+    # 3) interceptar chooser
+    try:
+        async with page.expect_file_chooser(timeout=2500) as fc_info:
+            sel, btn = await _first_visible(page, "attach", ATTACH_BUTTONS)
+            if btn is None:
+                raise RuntimeError("Nenhum botão de anexar abriu o seletor de arquivos.")
+            await btn.click(timeout=1500)
+        file_chooser = await fc_info.value
+        await file_chooser.set_files(file_path)
+        return await wait_for_upload_complete_async(page, filename)
+    except Exception:
+        pass
+
+    # 4) manual
+    await _ask(page, "attach", filename=filename)
+    await dismiss_overlays_async(page)
+    await wait_for_upload_complete_async(page, filename)
+
+
+# ---------- editor / envio ----------
+async def _fill_editor_async(page, text: str, strategy: str = FILL_STRATEGY) -> dict:
+    await dismiss_overlays_async(page)
+    _, editor = await _first_visible(page, "editor", COMPOSER_VISIBLE)
+    if editor is None:
+        await pause_until_ready_manual_async(page, reason="editor do chat não está visível")
+        _, editor = await _first_visible(page, "editor", COMPOSER_VISIBLE)
+        if editor is None:
+            raise RuntimeError("Editor do chat não encontrado/visível.")
+    try: await editor.evaluate("(el) => el.focus()")
+    except Exception: pass
+    try: await editor.click(timeout=1500)
+    except Exception: pass
+    await page.keyboard.press("Control+A")
+    await page.keyboard.press("Backspace")
+    await human_idle_short()
+    await humanize_cursor_async(page)
+
+    t0 = time.perf_counter()
+    used = "chunked"
+    if strategy in ("auto", "bulk"):
+        await page.keyboard.insert_text(text)
+        used = "bulk"
+        if strategy == "auto":
+            try:
+                got = await editor.evaluate(EDITOR_TEXT_JS)
+            except Exception:
+                got = ""
+            if not editor_matches(got, text):
+                fill_mismatch()
+                await page.keyboard.press("Control+A")
+                await page.keyboard.press("Backspace")
+                used = "bulk->chunked"
+    if used != "bulk":
+        for chunk in chunks(text, FILL_CHUNK):
+            await page.keyboard.insert_text(chunk)
+            await asyncio.sleep(0.04)
+    report = fill_report(text, used, t0)
+    await human_idle_med()
+    return report
+
+async def wait_until_send_enabled_async(page, timeout: float = None, interval: float = None) -> bool:
+    interval = interval or SEND_CHECK_INTERVAL_SEC
+    start = time.monotonic()
+    while True:
+        snap = await snapshot_async(page)
+        if snap.overlay:
+            await dismiss_overlays_async(page)
+        state = send_state(snap, start, timeout)
+        if state == "send_button":
+            await _ask(page, state)
+        if state:
+            return True
+        await asyncio.sleep(min(interval, 0.5))
+
+async def _send_click_async(page) -> None:
+    res = get_resolver()
+    last_err = None
+    for sel in await _ordered(page, "send", SEND_BUTTONS):
+        try:
+            btn = page.locator(sel)
+            if await btn.count() == 0:
+                continue
+            btn = btn.first
+            if not await btn.is_visible():
+                continue
+            if send_disabled(await btn.get_attribute("aria-disabled"), await btn.get_attribute("disabled")):
+                continue
+            try: await btn.hover(timeout=1000)
+            except Exception: pass
+            await human_idle_short()
+            await btn.click(timeout=3000)
+            res.record(page, "send", sel)
+            return
+        except Exception as e:
+            last_err = e
+    raise RuntimeError(f"Botão de envio não encontrado ou não habilitado pelos seletores SEND_BUTTONS. Último erro: {last_err}")
+
+async def _ensure_outbound_async(page, prev_count: int, wait_s: float = 8.0) -> None:
+    start = time.monotonic()
+    while time.monotonic() - start < wait_s:
+        if outbound(await snapshot_async(page), prev_count):
+            return
+        await asyncio.sleep(0.4)
+    await _ask(page, "outbound")
+
+
+# ---------- streaming / resposta ----------
+class AsyncStreamWatcher(StreamWatcher):
+    """StreamWatcher com instalação async (o callback do binding continua síncrono)."""
+
+    async def install_async(self) -> bool:
+        if self.installed:
+            return True
+        try:
+            await self.page.expose_binding(BINDING, self._on_event)
+            await self.page.add_init_script(script=OBSERVER_JS)
+            await self.page.evaluate(OBSERVER_JS)
+            self.installed = True
+        except Exception:
+            self.installed = False
+        return self.installed
+
+    async def flush_async(self) -> None:
+        try:
+            await self.page.evaluate("() => window.__tccStreamFlush && window.__tccStreamFlush()")
+        except Exception:
+            pass
+
+_WATCHERS: dict = {}
+
+def watcher_for_async(page) -> AsyncStreamWatcher:
+    w = _WATCHERS.get(id(page))
+    if w is None or w.page is not page:
+        w = AsyncStreamWatcher(page)
+        _WATCHERS[id(page)] = w
+    return w
+
+async def _assistant_text_async(page, idx: int, timeout: float = 120.0) -> str:
+    loc = page.locator(LAST_MESSAGE_SELECTOR)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if await loc.count() > idx:
+                text = await loc.nth(idx).inner_text(timeout=8000)
+                if text and text.strip():
+                    return text
+        except Exception:
+            pass
+        await asyncio.sleep(0.5)
+    return ""
+
+async def _stop_generation_async(page) -> None:
+    _, btn = await _first_visible(page, "stop", STOP_BUTTONS)
+    if btn is not None:
+        try: await btn.click(timeout=2000)
+        except Exception: pass
+
+async def _await_answer_async(page, prev_count: int, timeout: float = 300, poll: float = 0.1,
+                              sent_at: Optional[float] = None):
+    """(dict|None, texto, motivo_fora_do_schema|None), como PendingAnswer do runner síncrono."""
+    watcher = watcher_for_async(page)
+    streaming = await watcher.install_async()
+    answer = AnswerParser(prev_count)
+    answer.hook(watcher, streaming)
+    stable = StableAnswer(prev_count)
+    try:
+        await watcher.flush_async()
+        deadline = time.monotonic() + timeout
+        last_check = time.monotonic()
+        while time.monotonic() < deadline and not answer.done:
+            if streaming:
+                if watcher.is_complete(prev_count):
+                    break
+                # o resto chega pelo observer; só a verificação humana é consultada (~2s)
+                if time.monotonic() - last_check >= 2.0:
+                    last_check = time.monotonic()
+                    if (await snapshot_async(page)).human_check:
+                        await ensure_ready_async(page)
+            else:
+                snap = await snapshot_async(page)
+                if snap.human_check:
+                    await ensure_ready_async(page)
+                if stable.settled(snap):
+                    break
+            await asyncio.sleep(poll if streaming else 1.0)
+    finally:
+        watcher.on_text = None
+        record_answer_times(watcher, sent_at if sent_at is not None else time.monotonic())
+
+    with span("parse"):
+        if answer.should_stop(watcher.generating):
+            await _stop_generation_async(page)
+        early = answer.early()
+        if early is not None:
+            return early
+        return answer.from_content(await _assistant_text_async(page, prev_count))
+
+async def _send_and_wait(page, thinking_pause: bool):
+    with span("send_ready"):
+        await wait_until_send_enabled_async(page)
+    if thinking_pause:
+        await human_idle_med()
+    watcher = watcher_for_async(page)
+    await watcher.install_async()
+    prev = (await snapshot_async(page)).assistant_count
+    watcher.arm(prev)
+    sent_at = time.monotonic()
+    await _send_click_async(page)
+    await _ensure_outbound_async(page, prev)
+    return await _await_answer_async(page, prev, sent_at=sent_at)
+
+
+async def send_prompt_and_get_json_async(page, file_title: str, text: str,
+                                         file_path: Optional[str] = None, *,
+                                         parse_fix_attempts: int = 2,
+                                         stats: Optional[dict] = None,
+                                         pdf_sha256: Optional[str] = None) -> ArticleSummary:
+    """
+    Equivalente async de send_prompt_and_get_json; `stats` recebe estratégia/tempo
+    do preenchimento (ou from_cache=True quando a resposta veio do cache de respostas).
+    Prompt, cache e validação/correção vêm de src/runner_core.py.
+    """
+    ex = ExchangeCore(file_title, text, file_path, parse_fix_attempts=parse_fix_attempts,
+                      trace=current(), pdf_sha256=pdf_sha256)
+    prompt = ex.render()
+    if ex.needs_hash:
+        ex.pdf_sha256 = await asyncio.to_thread(file_sha256, file_path)
+    if ex.lookup(prompt):
+        if stats is not None:
+            stats["from_cache"] = True
+        return ex.summary
+
+    await ensure_ready_async(page)
+    if file_path:
+        with span("attach"):
+            await attach_file_async(page, file_path)
+    ex.debug_prompt(prompt)
+
+    with span("fill"):
+        fill = await _fill_editor_async(page, prompt)
+    if stats is not None:
+        stats.update(fill)
+
+    data, content, off_schema = await _send_and_wait(page, thinking_pause=True)
+    while not ex.accept(data, content, off_schema):
+        with span("fill"):
+            await _fill_editor_async(page, ex.next_fix())
+        data, content, off_schema = await _send_and_wait(page, thinking_pause=False)
+    return ex.summary
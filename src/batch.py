@@ -0,0 +1,158 @@
+# src/batch.py
+"""
+Modo lote (BATCH_SIZE=K > 1): K artigos numa única mensagem.
+
+Com anexo, os K PDFs são anexados juntos; sem anexo, os textos vão
+concatenados dentro de BATCH_MAX_CHARS. O prompt da variante ganha a
+instrução de devolver um array JSON com K objetos (cada um com a chave
+"file"); a resposta é dividida e cada item validado como ArticleSummary.
+Cada objeto é casado pelo "file" (ou título); a posição só vale quando
+nenhum objeto traz um nome reconhecível. Os artigos que ficarem sem par são
+marcados como falha e pedidos de novo um a um, na mesma conversa (sem
+reenviar os anexos); se nem o array veio, vai o prompt de correção.
+"""
+from __future__ import annotations
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from pydantic import ValidationError
+
+from src.config import BATCH_MAX_CHARS
+from src.schema import ArticleSummary
+from src.json_extract import SUMMARY_KEYS, extract_json_objects
+from src.log import info
+from src.metrics import ArticleTrace, record, span
+from src.browser_utils import attach_file, ensure_ready
+from src.chatgpt_runner import ArticleExchange, _fill_editor
+from src.runner_core import save_debug
+from src.prompt_manager import PromptManager
+
+
+@dataclass
+class BatchItem:
+    title: str
+    text: str = ""
+    file_path: Optional[str] = None
+
+
+def _norm(name: str) -> str:
+    name = (name or "").strip().lower()
+    return name[:-4] if name.endswith(".pdf") else name
+
+
+class BatchExchange(ArticleExchange):
+    """
+    Um lote numa conversa, com o mesmo start/step não bloqueante do
+    ArticleExchange. Ao terminar: .results (título -> ArticleSummary) e
+    .errors (título -> motivo) cobrem todos os itens.
+    """
+
+    stream_validate = False  # o 1º objeto válido do array não é a resposta inteira
+
+    def __init__(self, page, items: List[BatchItem], *, parse_fix_attempts: int = 2,
+                 trace: Optional[ArticleTrace] = None, prompts: Optional[PromptManager] = None):
+        super().__init__(page, " + ".join(i.title for i in items), "",
+                         parse_fix_attempts=parse_fix_attempts, trace=trace, prompts=prompts)
+        self.items = items
+        self.attach = any(i.file_path for i in items)
+        self.results: Dict[str, ArticleSummary] = {}
+        self.errors: Dict[str, str] = {}
+        self._requested: List[BatchItem] = list(items)
+        self._singles: Optional[List[BatchItem]] = None  # fila dos pedidos um a um (após casamento incompleto)
+
+    @property
+    def done(self) -> bool:
+        return len(self.results) + len(self.errors) == len(self.items)
+
+    def _prompt(self, items: List[BatchItem]) -> str:
+        if self.attach:
+            return self.pm.render_batch_with_attachment([i.title for i in items])
+        return self.pm.render_batch_without_attachment([(i.title, i.text) for i in items], BATCH_MAX_CHARS)
+
+    def _start(self) -> None:
+        page = self.page
+        ensure_ready(page)
+        if self.attach:
+            with span("attach"):
+                for item in self.items:
+                    attach_file(page, item.file_path)
+        prompt = self._prompt(self.items)
+        if os.getenv("DEBUG_PROMPT", "0") == "1":
+            save_debug(self.items[0].title, "BATCH_PROMPT", prompt)
+        with span("fill"):
+            self.fill = _fill_editor(page, prompt)
+        self._pending = self._send(thinking_pause=True)
+
+    def _absorb(self, objs: List[dict]) -> None:
+        """
+        Casa cada objeto com um item pedido pela chave "file" (ou pelo título) e
+        valida. Pela posição só quando nenhum objeto tem nome reconhecível e a
+        contagem bate: se o modelo reordenar ou trocar um nome, os outros casam
+        pelo nome e o que sobrar fica sem par (não vai para o artigo errado).
+        """
+        known = {_norm(i.title) for i in self.items}
+        by_name = {_norm(i.title): i for i in self._requested}
+        names = [(_norm(str(o.get("file", ""))), _norm(str(o.get("title", "")))) for o in objs]
+        named = any(f in known or t in known for f, t in names)
+        for n, obj in enumerate(objs):
+            f, t = names[n]
+            item = by_name.get(f) or by_name.get(t)
+            if item is None and not named and len(objs) == len(self._requested):
+                item = self._requested[n]
+            if item is None or item.title in self.results:
+                continue
+            try:
+                self.results[item.title] = ArticleSummary(**{k: v for k, v in obj.items() if k in SUMMARY_KEYS})
+            except ValidationError as ve:
+                self.errors[item.title] = f"Validation error: {ve}"
+            else:
+                self.errors.pop(item.title, None)
+
+    def step(self) -> bool:
+        if self.done and self._pending is None:
+            return True
+        return super().step()
+
+    def _step(self) -> bool:
+        if not self._pending.poll():
+            return False
+        with span("parse"):
+            _, content, _ = self._pending.finish()
+            objs = extract_json_objects(content)
+            self._absorb(objs)
+        n = self._attempt
+        if n:
+            record("fix_attempt", time.monotonic() - self._fix_started)
+        if os.getenv("DEBUG_RAW", "0") == "1":
+            save_debug(self.items[0].title, "batch_raw" if n == 0 else f"batch_raw_fix_{n}", content)
+
+        missing = [i for i in self.items if i.title not in self.results]
+        if objs and missing and self._singles is None:
+            # veio array, mas sem par para alguns: falha marcada e um pedido por artigo
+            for item in missing:
+                self.errors.setdefault(item.title, "sem correspondência (file/título) na resposta do lote")
+            self._singles = list(missing)
+            info(f"   ↻ lote incompleto: pedindo de novo {len(missing)} de {len(self.items)} artigo(s), um a um")
+        if not missing or (self._singles is not None and not self._singles):
+            self._pending = None
+            return True
+        if self._singles is None and n >= self.parse_fix_attempts:
+            for item in missing:
+                self.errors.setdefault(item.title, "Could not parse JSON for this article from the batch response.")
+            self._pending = None
+            return True
+
+        save_debug(self.items[0].title, f"batch_raw_partial_{n}", content)
+        self._next_attempt()
+        if self._singles is not None:
+            self._requested = [self._singles.pop(0)]  # o próximo sem par, sozinho
+            prompt = self._prompt(self._requested)
+        else:
+            self._requested = missing  # nenhum objeto: correção do array inteiro
+            prompt = self.pm.get_batch_fix_prompt([i.title for i in missing])
+        with span("fill"):
+            _fill_editor(self.page, prompt)
+        self._pending = self._send(thinking_pause=False)
+        return False
@@ -3,25 +3,54 @@ import os, time, random
 from typing import Optional
 from playwright.sync_api import sync_playwright
 
-from src.config import PLAYWRIGHT_PROFILE, SLOW_MO_MS, HEADLESS, SEND_CHECK_INTERVAL_SEC, SEND_MAX_WAIT_SEC,JITTER_SHORT, JITTER_MED, JITTER_LONG
+from src.config import CHAT_URL, SEND_CHECK_INTERVAL_SEC, JITTER_SHORT, JITTER_MED, JITTER_LONG
 from src.selectors import (
     OVERLAY_BUTTONS,
     COMPOSER_VISIBLE,
     ATTACH_BUTTONS,
     FILE_INPUTS,
-    FILE_PREVIEWS,
-    UPLOAD_IN_PROGRESS,
-    UPLOAD_DONE_HINTS,
-    SEND_BUTTONS,
 )
+from src.selector_cache import get_resolver
+from src.page_state import snapshot
+from src.metrics import span
+from src.runner_core import (
+    CURSOR_TARGET, UploadWatch, cursor_path, launch_options,
+    manual_resolved, pause_box, readiness, send_state,
+)
+
+# lista unida: 1 count() responde "existe algum?" (caso comum: não)
+_OVERLAY_ANY = ", ".join(OVERLAY_BUTTONS)
+
+def _any(page, combined: str) -> bool:
+    try:
+        return page.locator(combined).count() > 0
+    except Exception:
+        return False
 
-COMMON_ARGS = [
-    "--disable-blink-features=AutomationControlled",
-    "--no-default-browser-check",
-    "--disable-dev-shm-usage",
-    "--disable-gpu",
-]
+# rótulo de cada aba no modo multi-aba (--tabs), para as pausas manuais
+_TAB_LABELS: dict = {}
 
+def set_tab_label(page, label: str) -> None:
+    _TAB_LABELS[id(page)] = label
+
+def tab_label(page) -> Optional[str]:
+    return _TAB_LABELS.get(id(page))
+
+def attention(page) -> str:
+    """Traz a aba para frente e devolve ' [aba N]' para as mensagens de pausa ('' com 1 aba)."""
+    label = _TAB_LABELS.get(id(page))
+    if not label:
+        return ""
+    try:
+        page.bring_to_front()
+    except Exception:
+        pass
+    return f" [{label}]"
+
+def wait_enter(prompt: str) -> str:
+    """input() das pausas manuais; o tempo parado entra na métrica manual_pause."""
+    with span("manual_pause"):
+        return input(prompt)
 
 def _sleep_range(rng):
     t = random.uniform(*rng)
@@ -42,198 +71,95 @@ def human_idle_long():
 def humanize_cursor(page):
     """Movimenta o mouse de forma suave até a área do editor (sem clicar)."""
     try:
-        loc = page.locator("textarea, [contenteditable='true']").first
-        box = loc.bounding_box()
-        if box:
-            x = box["x"] + box["width"] * 0.7
-            y = box["y"] + box["height"] * 0.4
-            page.mouse.move(x - 80, y - 20, steps=10)
-            human_idle_short()
-            page.mouse.move(x, y, steps=12)
+        box = page.locator(CURSOR_TARGET).first.bounding_box()
+        for x, y, steps in cursor_path(box) if box else ():
+            page.mouse.move(x, y, steps=steps)
             human_idle_short()
     except Exception:
         pass
 
 def launch_browser():
     pw = sync_playwright().start()
-    browser = pw.chromium.launch_persistent_context(
-        user_data_dir=str(PLAYWRIGHT_PROFILE),
-        headless=HEADLESS,
-        slow_mo=SLOW_MO_MS,
-        args=COMMON_ARGS,
-        user_agent=(
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-            "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
-        ),
-        locale="pt-BR",
-    )
+    browser = pw.chromium.launch_persistent_context(**launch_options())
     page = browser.new_page()
     return pw, browser, page
 
 def open_chat_home(page):
     page.bring_to_front()
-    page.goto("https://chat.openai.com/", wait_until="domcontentloaded")
+    page.goto(CHAT_URL, wait_until="domcontentloaded")
     dismiss_overlays(page)
 
 # ---------- editor / overlays ---------- #
 def find_visible_editor(page):
-    for sel in COMPOSER_VISIBLE:
-        loc = page.locator(sel)
-        try:
-            if loc.count() > 0:
-                cand = loc.first
-                if cand.is_visible():
-                    return cand
-        except Exception:
-            continue
-    return None
-
-def _input_visible(page) -> bool:
-    return find_visible_editor(page) is not None
-
-def looks_like_human_check(page) -> bool:
-    try:
-        for sel in [
-            "iframe[src*='hcaptcha.com']",
-            "iframe[src*='challenges.cloudflare.com']",
-            "iframe[title*='challenge']",
-        ]:
-            if page.locator(sel).count() > 0:
-                return True
-        for t in [
-            "Verify you are human",
-            "Verifique se você é humano",
-            "I am human",
-            "Sou humano",
-            "Please stand by, while we are checking your browser",
-            "Checking if the site connection is secure",
-        ]:
-            if page.get_by_text(t, exact=False).count() > 0:
-                return True
-    except Exception:
-        pass
-    return False
+    return get_resolver().first(page, "editor", COMPOSER_VISIBLE)
 
 def dismiss_overlays(page):
+    # sem overlay (quase sempre): 1 round trip em vez de 12
+    if not _any(page, _OVERLAY_ANY):
+        return
     try:
-        for sel in OVERLAY_BUTTONS:
+        res = get_resolver()
+        for sel in res.order(page, "overlay", OVERLAY_BUTTONS):
             btn = page.locator(sel)
             if btn.count() > 0 and btn.first.is_visible():
                 try:
                     btn.first.click(timeout=1000)
+                    res.record(page, "overlay", sel)
                 except Exception:
                     pass
     except Exception:
         pass
 
 def pause_until_ready_manual(page, reason: str = "login/captcha pendente"):
-    print("\n────────────────────────────────────────────────────────")
-    print("⏸  Automação pausada:", reason)
-    print("    1) Conclua login/captcha e feche popups no navegador.")
-    print("    2) Quando o campo de mensagem do chat aparecer, pressione ENTER aqui.")
-    print("────────────────────────────────────────────────────────\n")
-
+    prompt = pause_box("login", attention(page), reason=reason)
     while True:
-        input("Pressione ENTER depois de resolver (vou verificar o input)... ")
+        wait_enter(prompt)
         dismiss_overlays(page)
-        if _input_visible(page):
-            print("✅ Campo de mensagem detectado. Retomando automação.\n")
+        if manual_resolved(snapshot(page)):
             return
-        if looks_like_human_check(page):
-            print("⚠️  Ainda detecto verificação humana. Resolva e tente novamente.")
-        else:
-            print("⚠️  Ainda não vejo o campo de mensagem. Aguarde e tente novamente.")
 
-def ensure_ready(page):
-    dismiss_overlays(page)
-    if looks_like_human_check(page) or not _input_visible(page):
-        pause_until_ready_manual(page)
-
-# ---------- upload / anexo ---------- #
-def _has_preview(page, filename: str) -> bool:
-    try:
-        if page.get_by_text(filename, exact=False).count() > 0:
-            return True
-    except Exception:
-        pass
-    for sel in FILE_PREVIEWS:
-        try:
-            if page.locator(sel).count() > 0:
-                return True
-        except Exception:
-            pass
-    return False
-
-def _is_uploading(page) -> bool:
-    for sel in UPLOAD_IN_PROGRESS:
-        try:
-            if page.locator(sel).count() > 0:
-                return True
-        except Exception:
-            pass
-    return False
-
-def _upload_done_hints(page) -> bool:
-    for sel in UPLOAD_DONE_HINTS:
-        try:
-            if page.locator(sel).count() > 0:
-                return True
-        except Exception:
-            pass
-    return False
-
-def wait_for_upload_complete(page, filename: str, soft_timeout: float = 30.0, hard_timeout: float = 90.0):
-    start = time.time()
-    # 1) preview
-    while time.time() - start < soft_timeout:
-        dismiss_overlays(page)
-        if _has_preview(page, filename):
+def ensure_ready(page, tries: int = 3):
+    for n in range(tries):
+        state = readiness(snapshot(page))
+        if state == "ready":
+            return
+        if state == "manual" or n == tries - 1:
             break
-        time.sleep(0.4)
-    else:
-        print("\n────────────────────────────────────────────────────────")
-        print("⏸  Não detectei o preview do arquivo ainda.")
-        print("    Anexe manualmente e confirme quando aparecer o chip/preview.")
-        print("────────────────────────────────────────────────────────\n")
-        while True:
-            input("Pressione ENTER quando o preview do arquivo aparecer... ")
+        if state == "overlay":
             dismiss_overlays(page)
-            if _has_preview(page, filename):
-                break
+        else:
+            time.sleep(0.5)  # retrato falhou (navegação): olha de novo
+    pause_until_ready_manual(page)
 
-    # 2) fim do upload
-    start2 = time.time()
+# ---------- upload / anexo ---------- #
+@span("upload_wait")
+def wait_for_upload_complete(page, filename: str, soft_timeout: float = 30.0, hard_timeout: float = 90.0):
+    watch = UploadWatch(soft_timeout, hard_timeout)
     while True:
-        dismiss_overlays(page)
-        if not _is_uploading(page) or _upload_done_hints(page):
-            return
-        if time.time() - start2 > soft_timeout:
-            print("\n────────────────────────────────────────────────────────")
-            print("⏸  O arquivo ainda parece estar subindo.")
-            print("    Confira no navegador. Quando terminar, pressione ENTER aqui.")
-            print("────────────────────────────────────────────────────────\n")
-            input("Pressione ENTER quando o upload tiver terminado... ")
+        snap = snapshot(page, filename)
+        if snap.overlay:
             dismiss_overlays(page)
-            if not _is_uploading(page) or _upload_done_hints(page):
-                return
-            start2 = time.time()
-        if time.time() - start > hard_timeout:
-            raise RuntimeError("Upload do arquivo não finalizou a tempo.")
-        time.sleep(0.5)
+        action = watch.step(snap)
+        if action == "done":
+            return
+        if action:
+            wait_enter(pause_box(action, attention(page)))
+            watch.asked()
+            continue
+        time.sleep(watch.interval)
 
 def attach_file(page, file_path: str, wait_seconds: float = 15.0):
     filename = os.path.basename(file_path)
 
+    res = get_resolver()
+
     def _try_set_on_any_input() -> bool:
-        for sel in FILE_INPUTS:
-            inp = page.locator(sel)
-            if inp.count() > 0:
-                try:
-                    inp.first.set_input_files(file_path, timeout=1500)
-                    return True
-                except Exception:
-                    continue
-        return False
+        def _set(inp) -> bool:
+            if inp.count() == 0:
+                return False
+            inp.first.set_input_files(file_path, timeout=1500)
+            return True
+        return res.resolve(page, "file_input", FILE_INPUTS, check=_set) is not None
 
     dismiss_overlays(page)
 
@@ -243,13 +169,14 @@ def attach_file(page, file_path: str, wait_seconds: float = 15.0):
         return
 
     # 2) clicar em botões e tentar novamente
-    for btn_sel in ATTACH_BUTTONS:
+    for btn_sel in res.order(page, "attach", ATTACH_BUTTONS):
         btn = page.locator(btn_sel)
         if btn.count() > 0 and btn.first.is_visible():
             try:
                 btn.first.click(timeout=1500)
                 time.sleep(0.3)
                 if _try_set_on_any_input():
+                    res.record(page, "attach", btn_sel)
                     wait_for_upload_complete(page, filename)
                     return
             except Exception:
@@ -259,7 +186,7 @@ def attach_file(page, file_path: str, wait_seconds: float = 15.0):
     try:
         with page.expect_file_chooser(timeout=2500) as fc_info:
             clicked = False
-            for btn_sel in ATTACH_BUTTONS:
+            for btn_sel in res.order(page, "attach", ATTACH_BUTTONS):
                 btn = page.locator(btn_sel)
                 if btn.count() > 0 and btn.first.is_visible():
                     try:
@@ -278,53 +205,23 @@ def attach_file(page, file_path: str, wait_seconds: float = 15.0):
         pass
 
     # 4) manual
-    print("\n────────────────────────────────────────────────────────")
-    print("⏸  Anexe o arquivo MANUALMENTE agora.")
-    print(f"    → Clique em 'Attach/Anexar' e selecione: {filename}")
-    print("    → Depois que aparecer o chip/preview e terminar 'Uploading', pressione ENTER aqui.")
-    print("────────────────────────────────────────────────────────\n")
-    input("Pressione ENTER quando o arquivo estiver ANEXADO e o upload CONCLUÍDO... ")
+    wait_enter(pause_box("attach", attention(page), filename=filename))
     dismiss_overlays(page)
     wait_for_upload_complete(page, filename)
 
 
-def _send_button_enabled(page) -> bool:
-    """Retorna True se existir um botão de Enviar visível e habilitado."""
-    for sel in SEND_BUTTONS:
-        btn = page.locator(sel)
-        if btn.count() > 0:
-            b = btn.first
-            try:
-                if b.is_visible():
-                    # tenta pelos atributos clássicos
-                    aria = b.get_attribute("aria-disabled") or ""
-                    disabled = b.get_attribute("disabled")
-                    if disabled is None and aria.lower() not in ("true", "1"):
-                        return True
-            except Exception:
-                continue
-    return False
-
 def wait_until_send_enabled(page, timeout: float = None, interval: float = None):
     """Espera até o botão de enviar estar habilitado e nenhum upload em andamento."""
-    timeout = timeout or SEND_MAX_WAIT_SEC
     interval = interval or SEND_CHECK_INTERVAL_SEC
-
-    start = time.time()
+    start = time.monotonic()
     while True:
-        dismiss_overlays(page)
-        # se houver upload rolando, nem tenta enviar ainda
-        if not _is_uploading(page) and _send_button_enabled(page):
-            return True
-
-        if time.time() - start > timeout:
+        snap = snapshot(page)  # 1 round trip: overlays, upload e botão juntos
+        if snap.overlay:
+            dismiss_overlays(page)
+        state = send_state(snap, start, timeout)
+        if state == "send_button":
             # dá uma última chance: deixa o usuário confirmar manualmente
-            print("\n────────────────────────────────────────────────────────")
-            print("⏸  O botão 'Enviar' não liberou a tempo.")
-            print("    Confirme no navegador se o upload terminou e o botão está ativo.")
-            print("    Depois clique em 'Enviar' manualmente e pressione ENTER aqui.")
-            print("────────────────────────────────────────────────────────\n")
-            input("Pressione ENTER após enviar manualmente (ou quando liberar)... ")
+            wait_enter(pause_box(state, attention(page)))
+        if state:
             return True
-
-        time.sleep(interval)
\ No newline at end of file
+        time.sleep(interval)
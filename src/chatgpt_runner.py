@@ -1,29 +1,26 @@
 # src/chatgpt_runner.py
-import json, re, time, os
+import time
 from typing import Optional
-from pydantic import ValidationError
-from src.config import OUTPUT_DIR
+from src.config import FILL_STRATEGY
 from src.schema import ArticleSummary
 from src.prompt_manager import PromptManager
-from src.selectors import STOP_GENERATING_BTN, LAST_MESSAGE_SELECTOR, SEND_BUTTONS
+from src.stream_watch import watcher_for
+from src.selector_cache import get_resolver
+from src.page_state import snapshot
+from src.metrics import ArticleTrace, bind, current, span
+from src.selectors import STOP_BUTTONS, LAST_MESSAGE_SELECTOR, SEND_BUTTONS
+from src.runner_core import (
+    EDITOR_TEXT_JS, FILL_CHUNK, AnswerParser, ExchangeCore, StableAnswer,
+    editor_matches, fill_mismatch, fill_report, outbound, pause_box,
+    record_answer_times, send_disabled,
+)
 from src.browser_utils import (
-    ensure_ready, looks_like_human_check, attach_file,
+    ensure_ready, attach_file, attention, open_chat_home,
     dismiss_overlays, find_visible_editor, pause_until_ready_manual,
-    wait_until_send_enabled,
-    human_idle_short, human_idle_med, human_idle_long, humanize_cursor,
+    wait_until_send_enabled, wait_enter,
+    human_idle_short, human_idle_med, humanize_cursor,
 )
 
-PM = PromptManager()
-
-def _save_debug(file_title: str, tag: str, text: str):
-    try:
-        d = OUTPUT_DIR / "debug"
-        d.mkdir(parents=True, exist_ok=True)
-        (d / f"{file_title}_{tag}.txt").write_text(text or "", encoding="utf-8")
-    except Exception:
-        pass
-
-
 # ===== editor =====
 def _focus_editor(page):
     dismiss_overlays(page)
@@ -45,33 +42,55 @@ def _clear_editor(page):
     page.keyboard.press("Control+A")
     page.keyboard.press("Backspace")
 
-def _insert_big_text(page, text: str, chunk_size: int = 1800, pause: float = 0.03):
+def _insert_big_text(page, text: str, chunk_size: int = 1800, pause: float = 0.03, editor=None):
+    ed = editor or find_visible_editor(page)  # localizado uma vez, não a cada bloco
     for i in range(0, len(text), chunk_size):
         chunk = text[i:i+chunk_size]
-        ed = find_visible_editor(page)
         if ed:
             try: ed.evaluate("(el) => el.focus()")
             except Exception: pass
         page.keyboard.insert_text(chunk)
         time.sleep(pause)
 
-def _fill_editor(page, text: str):
-    """Preenche o editor digitando (sem Ctrl+V), com toques humanos leves."""
-    _focus_editor(page); _clear_editor(page)
+def _editor_text(editor) -> str:
+    try:
+        return editor.evaluate(EDITOR_TEXT_JS)
+    except Exception:
+        return ""
+
+def _fill_editor(page, text: str, strategy: str = FILL_STRATEGY) -> dict:
+    """
+    Preenche o editor digitando (sem Ctrl+V), com toques humanos leves.
+    auto/bulk: uma única insert_text + verificação; auto volta para blocos se
+    o conteúdo não bater. Retorna {"strategy", "seconds", "chars"}.
+    """
+    editor = _focus_editor(page); _clear_editor(page)
     human_idle_short()
     humanize_cursor(page)
-    _insert_big_text(page, text, chunk_size=1200, pause=0.04)
+    t0 = time.perf_counter()
+    used = "chunked"
+    if strategy in ("auto", "bulk"):
+        page.keyboard.insert_text(text)
+        used = "bulk"
+        if strategy == "auto" and not editor_matches(_editor_text(editor), text):
+            fill_mismatch()
+            _clear_editor(page)
+            used = "bulk->chunked"
+    if used != "bulk":
+        _insert_big_text(page, text, chunk_size=FILL_CHUNK, pause=0.04, editor=editor)
+    report = fill_report(text, used, t0)
     human_idle_med()
+    return report
 
 # ===== envio =====
 def _assistant_count(page) -> int:
-    try: return page.locator(LAST_MESSAGE_SELECTOR).count()
-    except Exception: return 0
+    return snapshot(page).assistant_count
 
 def _send_keys_then_click(page):
     """Envia a mensagem SEM usar tecla Enter – clica no primeiro botão válido de SEND_BUTTONS."""
     last_err = None
-    for sel in SEND_BUTTONS:
+    res = get_resolver()
+    for sel in res.order(page, "send", SEND_BUTTONS):
         try:
             btns = page.locator(sel)
             if btns.count() == 0:
@@ -83,15 +102,14 @@ def _send_keys_then_click(page):
             if not btn.is_visible():
                 continue
             # checa se não está disabled (ARIA ou atributo)
-            aria = (btn.get_attribute("aria-disabled") or "").lower()
-            disabled = btn.get_attribute("disabled")
-            if disabled is not None or aria in ("true", "1"):
+            if send_disabled(btn.get_attribute("aria-disabled"), btn.get_attribute("disabled")):
                 continue
             # aproxima o cursor e dá uma “micro pensada”
             try: btn.hover(timeout=1000)
             except Exception: pass
             human_idle_short()
             btn.click(timeout=3000)
+            res.record(page, "send", sel)
             return  # sucesso
         except Exception as e:
             last_err = e
@@ -101,143 +119,117 @@ def _send_keys_then_click(page):
 def _ensure_outbound_or_pause(page, prev_assistant_count: int, wait_s: float = 8.0):
     start = time.time()
     while time.time() - start < wait_s:
-        if page.locator(STOP_GENERATING_BTN).count() > 0: return
-        if _assistant_count(page) > prev_assistant_count: return
+        if outbound(snapshot(page), prev_assistant_count): return
         time.sleep(0.4)
-    print("\n────────────────────────────────────────────────────────")
-    print("⏸  Parece que a mensagem NÃO foi enviada automaticamente.")
-    print("    Por favor, CLIQUE em 'Enviar' no chat (ou pressione Enter lá).")
-    print("    Assim que começar a gerar, aperte ENTER aqui.")
-    print("────────────────────────────────────────────────────────\n")
-    input("Pressione ENTER para continuar após enviar manualmente... ")
-
-# ===== parser/espera =====
-# === troque a função atual por esta SUPER-robusta ===
-def _extract_json_from_text(text: str):
-    """
-    Tenta extrair um OBJETO JSON (dict). Se não conseguir, retorna None.
-    Nunca retorna string/list/etc.
-    """
-    import json, re
-
-    REQUIRED_KEYS = [
-        "title",
-        "main_objectives",
-        "research_questions",
-        "study_type",
-        "methodology",
-        "main_findings",
-        "conclusions",
-        "limitations",
-        "rationale",
-    ]
-
-    def _normalize(s: str) -> str:
-        s = s.replace("\ufeff", "")
-        s = s.replace("“", '"').replace("”", '"').replace("‘", "'").replace("’", "'")
-        return s
-
-    def _try_load(cand: str):
-        try:
-            obj = json.loads(cand)
-            return obj if isinstance(obj, dict) else None
-        except Exception:
-            return None
-
-    raw = _normalize(text)
-
-    # 1) ```json ... ```
-    m = re.findall(r"```json\s*([\s\S]*?)\s*```", raw, flags=re.I)
-    if m:
-        for block in reversed(m):
-            obj = _try_load(block.strip())
-            if obj is not None: return obj
-
-    # 2) maior { ... } balanceado
-    start, depth, best = None, 0, None
-    for i, ch in enumerate(raw):
-        if ch == "{":
-            if depth == 0: start = i
-            depth += 1
-        elif ch == "}":
-            if depth > 0:
-                depth -= 1
-                if depth == 0 and start is not None:
-                    best = raw[start:i+1]
-                    start = None
-    if best:
-        obj = _try_load(best.strip())
-        if obj is not None: return obj
-
-    # 3) pares "key": value linha a linha -> embrulha
-    kv_lines = re.findall(r'^\s*"[^"]+"\s*:\s*.+$', raw, flags=re.M)
-    if kv_lines:
-        wrapped = "{\n" + "\n".join(kv_lines) + "\n}"
-        obj = _try_load(wrapped)
-        if obj is not None: return obj
-
-    # 4) fallback: extrai campo a campo (aceita sem chaves)
-    def grab(key: str) -> str | None:
-        pat = rf'"{re.escape(key)}"\s*:\s*(".*?"|\[.*?\]|\{{.*?\}}|.*?)(?:,\s*|$)'
-        m1 = re.search(pat, raw, flags=re.S)
-        if m1:
-            val = m1.group(1).strip()
-            if len(val) >= 2 and val[0] == '"' and val[-1] == '"':
-                val = val[1:-1]
-            return val.strip()
-        pat2 = rf'\b{re.escape(key)}\b\s*:\s*(".*?"|\[.*?\]|\{{.*?\}}|.*?)(?:,\s*|$)'
-        m2 = re.search(pat2, raw, flags=re.S)
-        if m2:
-            val = m2.group(1).strip()
-            if len(val) >= 2 and val[0] == '"' and val[-1] == '"':
-                val = val[1:-1]
-            return val.strip()
-        return None
-
-    recovered = {}
-    for k in REQUIRED_KEYS:
-        v = grab(k)
-        if v is not None:
-            recovered[k] = v.strip().rstrip(",")
-
-    return recovered if recovered else None
-
-
-
-def wait_for_response_complete(page, timeout=300):
-    start = time.time(); last_stable = ""; stable_rounds = 0
+    wait_enter(pause_box("outbound", attention(page)))
+
+# ===== espera =====
+def _wait_for_response_poll(page, timeout=300, prev_count: Optional[int] = None):
+    """Polling 1x/s (3 retratos iguais após o Stop sumir): fallback sem binding."""
+    start = time.time(); stable = StableAnswer(prev_count)
     while True:
-        if looks_like_human_check(page): ensure_ready(page)
-        stop_count = page.locator(STOP_GENERATING_BTN).count()
-        last_el = page.locator(LAST_MESSAGE_SELECTOR).last
-        try: txt = last_el.inner_text(timeout=2000)
-        except Exception: txt = ""
-        if stop_count == 0 and txt.strip():
-            if txt.strip() == last_stable.strip():
-                stable_rounds += 1
-                if stable_rounds >= 3: return
-            else:
-                stable_rounds = 0; last_stable = txt
+        snap = snapshot(page)
+        if snap.human_check: ensure_ready(page)
+        if stable.settled(snap): return
         if time.time() - start > timeout: return
         time.sleep(1.0)
 
-# ===== fluxo principal =====
-from typing import Optional
-from src.config import OUTPUT_DIR
-
-def _save_debug(file_title: str, tag: str, text: str):
-    """Salva conteúdo bruto da resposta para depuração."""
+def wait_for_response_complete(page, timeout=300, prev_count: Optional[int] = None, until=None):
+    """
+    Espera a resposta terminar via MutationObserver (src/stream_watch.py):
+    retorna assim que o Stop some e o DOM fica quieto por RESPONSE_QUIET_SEC.
+    prev_count = nº de balões do assistente antes do envio.
+    until() -> True encerra antes (ex.: JSON já validado durante o streaming).
+    """
+    if prev_count is None:
+        prev_count = max(0, snapshot(page).assistant_count - 1)
+    watcher = watcher_for(page)
+    if not watcher.install():
+        return _wait_for_response_poll(page, timeout, prev_count)
+
+    last_check = [time.monotonic()]
+    def _tick() -> bool:
+        # o resto chega pelo observer; só a verificação humana é consultada (~2s)
+        if time.monotonic() - last_check[0] >= 2.0:
+            last_check[0] = time.monotonic()
+            if snapshot(page).human_check: ensure_ready(page)
+        return bool(until and until())
+
+    watcher.wait_complete(prev_count, timeout=timeout, on_tick=_tick)
+
+def _stop_generation(page) -> bool:
+    """Clica no Stop se a resposta ainda está sendo gerada."""
+    btn = get_resolver().first(page, "stop", STOP_BUTTONS)
+    if btn is None:
+        return False
     try:
-        dbg_dir = OUTPUT_DIR / "debug"
-        dbg_dir.mkdir(parents=True, exist_ok=True)
-        (dbg_dir / f"{file_title}_{tag}.txt").write_text(text or "", encoding="utf-8")
+        btn.click(timeout=2000)
+        return True
     except Exception:
-        pass
+        return False
 
+class PendingAnswer:
+    """
+    Resposta em andamento no balão prev_count, validada durante o streaming.
+    poll() não bloqueia (os eventos do observer chegam enquanto qualquer
+    chamada do Playwright espera, inclusive de outra aba); finish() devolve
+    (dict|None, texto, motivo_fora_do_schema|None).
+    Sem binding (ou STREAM_VALIDATE=0, ou validate=False, ex.: lote com array)
+    cai na extração depois do fim; sem binding, poll() olha um retrato por
+    segundo (StableAnswer) e também não bloqueia.
+    """
 
-from typing import Optional
-from pydantic import ValidationError
+    def __init__(self, page, prev_count: int, timeout: float = 300, sent_at: Optional[float] = None,
+                 validate: bool = True):
+        self.page = page
+        self.prev_count = prev_count
+        self.watcher = watcher_for(page)
+        self.streaming = self.watcher.install()
+        self.answer = AnswerParser(prev_count, validate)
+        self.answer.hook(self.watcher, self.streaming)
+        self.started = time.monotonic()
+        self.sent_at = sent_at if sent_at is not None else self.started
+        self.deadline = self.started + timeout
+        self._last_check = self.started
+        self._stable = StableAnswer(prev_count)  # fallback sem binding: 1 retrato por segundo
+
+    def _poll_snapshot(self, now: float) -> bool:
+        """Sem binding: no máximo um retrato por segundo, sem bloquear as outras abas."""
+        if now - self._last_check < 1.0:
+            return now > self.deadline
+        self._last_check = now
+        snap = snapshot(self.page)
+        if snap.human_check: ensure_ready(self.page)
+        return self._stable.settled(snap) or now > self.deadline
+
+    def poll(self) -> bool:
+        """True quando a resposta terminou (ou o JSON já fechou válido / saiu do schema)."""
+        now = time.monotonic()
+        if not self.streaming:
+            return self._poll_snapshot(now)
+        # o resto chega pelo observer; só a verificação humana é consultada (~2s)
+        if now - self._last_check >= 2.0:
+            self._last_check = now
+            if snapshot(self.page).human_check: ensure_ready(self.page)
+        return self.answer.done or self.watcher.is_complete(self.prev_count) or now > self.deadline
+
+    def finish(self):
+        self.watcher.on_text = None
+        record_answer_times(self.watcher, self.sent_at)
+        if self.answer.should_stop(self.watcher.generating):
+            _stop_generation(self.page)
+        early = self.answer.early()
+        if early is not None:
+            return early
+        return self.answer.from_content(_get_assistant_text_by_index(self.page, self.prev_count))
+
+    def wait(self, poll_ms: int = 100):
+        self.watcher.flush()
+        while not self.poll():
+            self.page.wait_for_timeout(poll_ms)  # deixa o Playwright despachar os eventos
+        return self.finish()
 
+# ===== fluxo principal =====
 
 def _get_assistant_text_by_index(page, idx: int, timeout_ms: int = 120000) -> str:
     """Lê o balão de ASSISTANT de índice idx (0-based) aguardando o conteúdo.
@@ -260,78 +252,123 @@ def _get_assistant_text_by_index(page, idx: int, timeout_ms: int = 120000) -> st
         return ""
 
 
-def send_prompt_and_get_json(page, file_title: str, text: str, file_path: Optional[str] = None,
-                             *, parse_fix_attempts: int = 2) -> "ArticleSummary":
-    ensure_ready(page)
-
-    if file_path:
-        attach_file(page, file_path)
-        prompt = PM.render_with_attachment(file_title=file_title)
-    else:
-        prompt = PM.render_without_attachment(file_title=file_title, article_text=text)
-
-    if os.getenv("DEBUG_PROMPT", "0") == "1":
-        try:
-            dbgdir = OUTPUT_DIR / "debug"
-            dbgdir.mkdir(parents=True, exist_ok=True)
-            (dbgdir / f"{file_title}_PROMPT.txt").write_text(prompt, encoding="utf-8")
-        except Exception:
-            pass
-
-    # 1) digita o prompt inteiro no editor
-    _fill_editor(page, prompt)
-
-    # 2) espera o botão habilitar + “pensadinha”
-    wait_until_send_enabled(page)
-    human_idle_med()  # 👈 apenas pausa; não envia nada
+class ArticleExchange(ExchangeCore):
+    """
+    Um artigo numa conversa: prompt principal + até parse_fix_attempts
+    correções, em passos não bloqueantes (start/step) para o modo multi-aba
+    revezar várias conversas numa thread só. run() faz tudo em sequência.
+    prompts = PromptManager da variante (padrão: get_pm()); new_chat=True abre
+    uma conversa nova antes do envio (sem respostas anteriores no contexto).
+    Com o cache de respostas ligado, entradas idênticas (prompt, template,
+    PDF, modo) a uma resposta já aceita não vão ao navegador: from_cache=True.
+    Prompt, cache e validação/correção vêm de src/runner_core.py.
+    """
 
-    # 3) mede quantos turnos do assistant existem e envia (APENAS clique)
-    prev_assistant = _assistant_count(page)
-    _send_keys_then_click(page)                 # 👈 envia pelo botão
-    _ensure_outbound_or_pause(page, prev_assistant)
+    stream_validate = True  # aceita o 1º objeto válido durante o streaming
+
+    def __init__(self, page, file_title: str, text: str, file_path: Optional[str] = None,
+                 *, parse_fix_attempts: int = 2, trace: Optional[ArticleTrace] = None,
+                 prompts: Optional[PromptManager] = None, new_chat: bool = False,
+                 pdf_sha256: Optional[str] = None):
+        super().__init__(file_title, text, file_path, parse_fix_attempts=parse_fix_attempts,
+                         trace=trace, prompts=prompts, pdf_sha256=pdf_sha256)
+        self.page = page
+        self.new_chat = new_chat
+        self.fill: dict = {}
+        self._pending: Optional[PendingAnswer] = None
+
+    def _send(self, thinking_pause: bool) -> PendingAnswer:
+        page = self.page
+        # espera o botão habilitar (+ “pensadinha” no prompt principal)
+        with span("send_ready"):
+            wait_until_send_enabled(page)
+        if thinking_pause:
+            human_idle_med()  # 👈 apenas pausa; não envia nada
+        # mede quantos turnos do assistant existem e envia (APENAS clique)
+        watcher = watcher_for(page)
+        prev = _assistant_count(page)
+        watcher.install(); watcher.arm(prev)        # observer antes do envio: pega o 1º token
+        sent_at = time.monotonic()
+        _send_keys_then_click(page)                 # 👈 envia pelo botão
+        _ensure_outbound_or_pause(page, prev)
+        return PendingAnswer(page, prev, sent_at=sent_at, validate=self.stream_validate)
+
+    def start(self) -> None:
+        with bind(self.trace):
+            self._start()
+
+    def _start(self) -> None:
+        page = self.page
+        prompt = self.render()
+        if self.lookup(prompt):
+            return
+        if self.new_chat:
+            open_chat_home(page)  # conversa nova: a resposta não vê as anteriores
+        ensure_ready(page)
+
+        if self.file_path:
+            with span("attach"):
+                attach_file(page, self.file_path)
+        self.debug_prompt(prompt)
+
+        # digita o prompt inteiro no editor e envia
+        with span("fill"):
+            self.fill = _fill_editor(page, prompt)
+        self._pending = self._send(thinking_pause=True)
+
+    @property
+    def done(self) -> bool:
+        return self.summary is not None
+
+    def step(self) -> bool:
+        """
+        Avança sem bloquear na geração: True quando self.summary está pronto.
+        Se a resposta não valida, envia a correção; esgotadas, levanta ValueError.
+        """
+        if self.summary is not None:
+            return True
+        with bind(self.trace):
+            return self._step()
+
+    def _step(self) -> bool:
+        if not self._pending.poll():
+            return False
+        with span("parse"):
+            data, content, off_schema = self._pending.finish()
+        if self.accept(data, content, off_schema):
+            return True
+        # tentativa de correção (fix JSON)
+        with span("fill"):
+            _fill_editor(self.page, self.next_fix())
+        self._pending = self._send(thinking_pause=False)
+        return False
+
+    def wait(self, poll_ms: int = 100) -> ArticleSummary:
+        """Bloqueia até o resultado (ou ValueError), depois de start()."""
+        if self._pending is not None:
+            self._pending.watcher.flush()
+        while not self.step():
+            self.page.wait_for_timeout(poll_ms)
+        return self.summary
+
+    def run(self, poll_ms: int = 100) -> ArticleSummary:
+        self.start()
+        return self.wait(poll_ms)
 
-    # 4) espera terminar e lê exatamente o novo balão
-    wait_for_response_complete(page)
-    content = _get_assistant_text_by_index(page, prev_assistant)
-    if os.getenv("DEBUG_RAW", "0") == "1":
-        _save_debug(file_title, "raw", content)
 
-    data = _extract_json_from_text(content)
-    last_schema_error = None
-    if data:
-        try:
-            return ArticleSummary(**data)
-        except ValidationError as ve:
-            last_schema_error = ve
-            _save_debug(file_title, "raw_bad_schema", content)
-    else:
-        _save_debug(file_title, "raw_no_parse", content)
-
-    # 5) tentativa de correção (fix JSON)
-    for attempt in range(parse_fix_attempts):
-        fix_prompt = PM.get_fix_prompt()
-        _fill_editor(page, fix_prompt)
-        wait_until_send_enabled(page)
-
-        prev2 = _assistant_count(page)
-        _send_keys_then_click(page)
-        _ensure_outbound_or_pause(page, prev2)
-        wait_for_response_complete(page)
-
-        content2 = _get_assistant_text_by_index(page, prev2)
-        if os.getenv("DEBUG_RAW", "0") == "1":
-            _save_debug(file_title, f"raw_fix_{attempt+1}", content2)
-
-        data2 = _extract_json_from_text(content2)
-        if not data2:
-            _save_debug(file_title, f"raw_validation_fix_no_parse_{attempt+1}", content2)
-            continue
-        try:
-            return ArticleSummary(**data2)
-        except ValidationError as ve2:
-            last_schema_error = ve2
-            _save_debug(file_title, f"raw_validation_fix_bad_schema_{attempt+1}", content2)
-
-    if last_schema_error:
-        raise ValueError(f"Validation error after fix: {last_schema_error}")
-    raise ValueError("Could not parse JSON from model response.")
+def send_prompt_and_get_json(page, file_title: str, text: str, file_path: Optional[str] = None,
+                             *, parse_fix_attempts: int = 2, stats: Optional[dict] = None,
+                             pdf_sha256: Optional[str] = None) -> "ArticleSummary":
+    """
+    Um artigo do início ao fim (bloqueante); `stats` recebe estratégia/tempo do
+    preenchimento (ou from_cache=True), como em send_prompt_and_get_json_async.
+    """
+    ex = ArticleExchange(page, file_title, text, file_path, parse_fix_attempts=parse_fix_attempts,
+                         trace=current(), pdf_sha256=pdf_sha256)
+    try:
+        return ex.run()
+    finally:
+        if stats is not None:
+            stats.update(ex.fill)
+            if ex.from_cache:
+                stats["from_cache"] = True
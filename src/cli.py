@@ -0,0 +1,123 @@
+# src/cli.py
+"""
+Subcomandos do run.py que não abrem o navegador. Cada um importa só o que
+usa (nada de Playwright; pydantic/rich só se precisar), então respondem em
+uma fração do tempo de `import src.pipeline` e não criam arquivos em prompts/.
+`python -m benchmarks.bench_startup` mede a partida a frio de cada comando.
+"""
+from __future__ import annotations
+import time
+
+from src.config import LEDGER_DB, PDF_DIR, PROMPT_MODE, PROMPT_VARIANT
+
+
+def status() -> None:
+    """PDFs na pasta e situação de cada variante/modo no ledger."""
+    from src.hashing import file_sha256
+    from src.ledger import Ledger, pending_legacy
+    from src.storage import OUT_JSON_DIR
+    pdfs = sorted(PDF_DIR.glob("*.pdf"))
+    print(f"{PDF_DIR}: {len(pdfs)} PDF(s)")
+    ledger = Ledger() if LEDGER_DB.exists() else None  # status não cria o registro
+    try:
+        hash_of = ledger.hash_file if ledger is not None else file_sha256
+        legacy = pending_legacy(ledger, hash_of, OUT_JSON_DIR)
+        if ledger is None and not legacy:
+            print("Nenhuma execução registrada ainda.")
+            return
+        done = legacy | (ledger.done_hashes(PROMPT_VARIANT, PROMPT_MODE) if ledger is not None else set())
+        left = sum(1 for p in pdfs if hash_of(p) not in done)
+        print(f"{PROMPT_VARIANT}/{PROMPT_MODE} (atual): {len(pdfs) - left} concluído(s), {left} a fazer "
+              f"(duplicatas contam como a fazer; veja `python run.py plan`)")
+        if legacy:
+            print(f"  inclui {len(legacy)} do histórico antigo (sent.json/json), importado no próximo `run`")
+        print()
+        cells = ledger.cell_counts() if ledger is not None else {}
+        if cells:
+            print(f"  {'variante':<10}{'modo':<9}{'done':>7}{'failed':>8}{'in_flight':>11}{'pending':>9}")
+        for (variant, mode), c in sorted(cells.items()):
+            print(f"  {variant:<10}{mode:<9}{c.get('done', 0):>7}{c.get('failed', 0):>8}"
+                  f"{c.get('in_flight', 0):>11}{c.get('pending', 0):>9}")
+    finally:
+        if ledger is not None:
+            ledger.close()
+
+
+def plan(max_count: int | None) -> None:
+    """O que `run` enviaria agora (mesma seleção, sem criar itens no ledger)."""
+    from src.plan import plan as plan_run
+    planned = plan_run(max_count, dry_run=True)
+    if planned is None:
+        return
+    ledger, todo, hashes, links = planned
+    if ledger is not None:
+        ledger.close()
+    print(f"Próxima execução ({PROMPT_VARIANT}/{PROMPT_MODE}): {len(todo)} PDF(s)")
+    for i, p in enumerate(todo, start=1):
+        print(f"  {i:>3}. {p.name}")
+    for member, rep in sorted(links.items()):
+        print(f"   ≈  {member.name} não vai (duplicata de {rep.name})")
+
+
+def extract(max_count: int | None, rebuild_cache: bool = False) -> None:
+    """Extrai (e guarda no cache de texto) os PDFs que `run` enviaria, sem navegador."""
+    from src.plan import plan as plan_run
+    from src.prefetch import PdfPrefetcher
+    planned = plan_run(max_count, dry_run=True)
+    if planned is None:
+        return
+    ledger, todo, _, _ = planned
+    if ledger is not None:
+        ledger.close()
+    t0 = time.perf_counter()
+    chars = 0
+    with PdfPrefetcher(todo, full_text=True, refresh=rebuild_cache) as prefetch:
+        for item in prefetch:
+            if item.error:
+                print(f"  ✗ {item.pdf_path.name}: {item.error}")
+                continue
+            chars += len(item.text or "")
+            print(f"  {'✓' if item.has_text else '∅'} {item.pdf_path.name}: "
+                  f"{len(item.text or '')} chars em {item.seconds:.2f}s")
+    print(f"{len(todo)} PDF(s), {chars} chars em {time.perf_counter() - t0:.1f}s")
+
+
+def report(run_id: str | None = None, cache: bool = False) -> None:
+    if cache:
+        from src.response_cache import ResponseCache
+        ResponseCache().report()
+        return
+    from src.metrics import report as metrics_report
+    metrics_report(run_id=run_id)
+
+
+def evaluate(gabarito: str | None = None) -> None:
+    """Compara os resultados com o gabarito humano e grava outputs/evaluation.csv."""
+    from src.evaluate import evaluate as run_evaluation
+    result = run_evaluation(gabarito)
+    if result is None:
+        return
+    if len(result):
+        print(f"-> {result.write_csv()}")
+    result.report()
+
+
+def ground(threshold: float | None = None, rebuild: bool = False) -> None:
+    """Procura no PDF o trecho que sustenta cada frase dos resumos; grava outputs/grounding.csv."""
+    from src.grounding import GROUNDING_THRESHOLD, ground as run_grounding
+    result = run_grounding(GROUNDING_THRESHOLD if threshold is None else threshold, rebuild=rebuild)
+    if len(result):
+        print(f"-> {result.write_csv()}")
+    result.report()
+
+
+def analyze(source: str = "results", mode: str | None = None, resamples: int | None = None) -> None:
+    """Qui-quadrado/Fisher/permutação/bootstrap entre estratégias e perguntas; grava outputs/analysis.xlsx."""
+    from src.analysis import ANALYSIS_RESAMPLES, analyze as run_analysis, export_xlsx, report as print_report, write_csv
+    result = run_analysis(source, mode or PROMPT_MODE, ANALYSIS_RESAMPLES if resamples is None else resamples)
+    if result is None:
+        return
+    path = export_xlsx(result.tally, result.comparisons)
+    print(f"-> {path}")
+    print(f"-> {write_csv(result.comparisons, path.with_suffix('.csv'))}")
+    print_report(result.comparisons)
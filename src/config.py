@@ -3,26 +3,89 @@ from pathlib import Path
 
 # === Paths base ===
 BASE_DIR = Path(__file__).resolve().parents[1]
-PDF_DIR = BASE_DIR / "PDF"
-OUTPUT_DIR = BASE_DIR / "outputs"
+PDF_DIR = Path(os.environ.get("PDF_DIR", str(BASE_DIR / "PDF")))
+OUTPUT_DIR = Path(os.environ.get("OUTPUT_DIR", str(BASE_DIR / "outputs")))
 JSON_DIR = OUTPUT_DIR / "json"
-SENT_LOG = OUTPUT_DIR / "sent.json"
-MD_PATH = OUTPUT_DIR / "consolidado.md"  # usado no storage
+SENT_LOG = OUTPUT_DIR / "sent.json"  # legado: importado uma vez para o LEDGER_DB
+LEDGER_DB = OUTPUT_DIR / "state.sqlite3"
+MD_PATH = OUTPUT_DIR / "consolidado.md"  # usado no storage (regerado a partir de RESULTS_PATH)
+RESULTS_PATH = OUTPUT_DIR / "results.jsonl"           # base consolidada append-only
+RESULTS_INDEX_PATH = OUTPUT_DIR / "results.idx.jsonl"  # (pdf, variante, modo) -> offset
+METRICS_PATH = OUTPUT_DIR / "metrics.jsonl"  # tempo por estágio, 1 linha por artigo/execução
 
 # === Playwright / Navegador ===
-PLAYWRIGHT_PROFILE = BASE_DIR / ".playwright"
+PLAYWRIGHT_PROFILE = Path(os.environ.get("PLAYWRIGHT_PROFILE", str(BASE_DIR / ".playwright")))
+CHAT_URL = os.environ.get("CHAT_URL", "https://chat.openai.com/")
+# 1 = sempre pausa para login/captcha no início; 0 = só pausa se o editor não estiver visível
+MANUAL_LOGIN = os.environ.get("MANUAL_LOGIN", "1") == "1"
 SLOW_MO_MS = int(os.environ.get("SLOW_MO_MS", "120"))
 HEADLESS = os.environ.get("HEADLESS", "0") == "1"
 
 # === Controles de execução ===
 MAX_ARTIGOS_POR_EXECUCAO = int(os.environ.get("MAX_ARTIGOS_POR_EXECUCAO", "1"))
-BATCH_SIZE = int(os.environ.get("BATCH_SIZE", "1"))
+BATCH_SIZE = int(os.environ.get("BATCH_SIZE", "1"))  # >1 = K artigos por mensagem (resposta em array)
+BATCH_MAX_CHARS = int(os.environ.get("BATCH_MAX_CHARS", "60000"))  # texto do lote sem anexo, dividido entre os K
 TEXT_MAX_CHARS = int(os.environ.get("TEXT_MAX_CHARS", "20000"))
+# 1 = texto sem anexo limpo e repartido por seções (src/text_compact.py); 0 = corte simples em TEXT_MAX_CHARS
+COMPACT_TEXT = os.environ.get("COMPACT_TEXT", "1") == "1"
+COMPACT_READ_CHARS = int(os.environ.get("COMPACT_READ_CHARS", "200000"))  # quanto do PDF ler antes de compactar
+# Quais páginas ler: "all" | "first:N" | "firstlast:N:M" | "noappendix" (combináveis: "first:12,noappendix")
+PAGE_POLICY = os.environ.get("PAGE_POLICY", "all").strip().lower()
 WAIT_AFTER_SEND_SEC = float(os.environ.get("WAIT_AFTER_SEND_SEC", "6"))
+# 1 = anexa o PDF na conversa; 0 = cola o texto extraído no prompt (without_attachment)
+ATTACH_PDF = os.environ.get("ATTACH_PDF", "1") == "1"
+PROMPT_MODE = "with" if ATTACH_PDF else "without"
+
+# === Pré-extração de PDFs (roda em paralelo ao navegador) ===
+PREFETCH_AHEAD = int(os.environ.get("PREFETCH_AHEAD", "3"))      # quantos PDFs à frente
+PREFETCH_WORKERS = int(os.environ.get("PREFETCH_WORKERS", "2"))  # 0 = extrai no próprio processo
+# Com anexo o texto só serve p/ checar se o PDF tem texto: extrai só o necessário p/ isso
+LAZY_EXTRACT = os.environ.get("LAZY_EXTRACT", "1") == "1"
+
+# === Cache de texto extraído (por hash do PDF + versão do extrator) ===
+CACHE_DIR = OUTPUT_DIR / "cache"
+PDF_CACHE_ENABLED = os.environ.get("PDF_CACHE", "1") == "1"
+PDF_CACHE_DIR = CACHE_DIR / "pdf_text"
+PDF_CACHE_MAX_MB = float(os.environ.get("PDF_CACHE_MAX_MB", "256"))  # LRU acima disso
+
+# === Backend de extração: pypdf2 | pypdf | pdfminer | pdftotext | auto ===
+# "auto" usa o escolhido por `python run.py --bench-extractors` para a pasta PDF/ (ou PyPDF2)
+PDF_EXTRACTOR = os.environ.get("PDF_EXTRACTOR", "auto").strip().lower()
+PDF_EXTRACTOR_FALLBACK = os.environ.get("PDF_EXTRACTOR_FALLBACK", "1") == "1"  # tenta outro se vier vazio
+EXTRACTOR_CHOICE_FILE = CACHE_DIR / "extractor_choice.json"
+SELECTOR_CACHE_PATH = CACHE_DIR / "selectors.json"  # seletor vencedor por papel/versão da UI
+# respostas aceitas por (prompt, template, PDF, modo): entradas idênticas não geram de novo
+RESPONSE_CACHE_ENABLED = os.environ.get("RESPONSE_CACHE", "1") == "1"
+RESPONSE_CACHE_DIR = CACHE_DIR / "responses"
+
+# === Avaliação contra o gabarito humano (python run.py evaluate) ===
+GABARITO_PATH = Path(os.environ.get("GABARITO_PATH", str(BASE_DIR / "Arquivos" / "Gabarito Artigos.xlsx")))
+GABARITO_CACHE_PATH = CACHE_DIR / "gabarito.json"  # forma colunar, refeita se a planilha mudar
+EVAL_PATH = OUTPUT_DIR / "evaluation.csv"          # uma linha por (artigo, variante, modo, campo)
+
+# === Checagem de suporte no texto do PDF (python run.py ground) ===
+GROUNDING_CACHE_DIR = CACHE_DIR / "grounding"     # índice de trechos por sha256 do PDF
+GROUNDING_PATH = OUTPUT_DIR / "grounding.csv"     # uma linha por frase checada
+GROUNDING_THRESHOLD = float(os.environ.get("GROUNDING_THRESHOLD", "0.12"))  # abaixo disso: sem suporte
+GROUNDING_PASSAGE_WORDS = int(os.environ.get("GROUNDING_PASSAGE_WORDS", "60"))  # trecho (janela com 50% de sobreposição)
+GROUNDING_WORKERS = int(os.environ.get("GROUNDING_WORKERS", str(PREFETCH_WORKERS)))  # 0 = em série
+
+# === Análise estatística das estratégias (python run.py analyze) ===
+MEDICAO_PATH = Path(os.environ.get("MEDICAO_PATH", str(BASE_DIR / "Arquivos" / "Medição de Resultados.xlsx")))
+ANALYSIS_PATH = OUTPUT_DIR / "analysis.xlsx"      # uma aba por comparação, no layout da planilha do qui-quadrado
+ANALYSIS_RESAMPLES = int(os.environ.get("ANALYSIS_RESAMPLES", "20000"))  # permutação e bootstrap, por comparação
+ANALYSIS_WORKERS = int(os.environ.get("ANALYSIS_WORKERS", str(PREFETCH_WORKERS)))  # 0 = em série
+ANALYSIS_SEED = int(os.environ.get("ANALYSIS_SEED", "1"))
+
+# === Quase-duplicatas (src/dedup.py): só um PDF por grupo é enviado ===
+DEDUP = os.environ.get("DEDUP", "1") == "1"
+DEDUP_THRESHOLD = float(os.environ.get("DEDUP_THRESHOLD", "0.8"))  # similaridade (Jaccard estimado) mínima
+DEDUP_SHINGLE = int(os.environ.get("DEDUP_SHINGLE", "5"))          # palavras por "telha"
+DEDUP_WORKERS = int(os.environ.get("DEDUP_WORKERS", str(PREFETCH_WORKERS)))  # 0 = em série
+DEDUP_CACHE_PATH = CACHE_DIR / "minhash.json"
 
 # === Prompts externos / variantes ===
 PROMPTS_DIR = BASE_DIR / "prompts"
-PROMPTS_DIR.mkdir(parents=True, exist_ok=True)
 
 # Variantes: 'cot', 'baseline', 'contrast'
 PROMPT_VARIANT = os.getenv("PROMPT_VARIANT", "cot").strip().lower()
@@ -44,6 +107,13 @@ CONSOLIDATED_MD = MD_PATH
 # === Controles de envio ===
 SEND_CHECK_INTERVAL_SEC = float(os.environ.get("SEND_CHECK_INTERVAL_SEC", "4"))
 SEND_MAX_WAIT_SEC = float(os.environ.get("SEND_MAX_WAIT_SEC", "240"))  # tempo máximo esperando liberar
+# Resposta completa = botão Stop sumiu + DOM sem mudanças por este tempo
+RESPONSE_QUIET_SEC = float(os.environ.get("RESPONSE_QUIET_SEC", "1.0"))
+# preenchimento do editor: auto (tudo de uma vez + verificação, cai p/ blocos se não bater) | bulk | chunked
+FILL_STRATEGY = os.environ.get("FILL_STRATEGY", "auto").strip().lower()
+# valida o JSON enquanto a resposta chega (aceita no '}' final, interrompe se sair do schema)
+STREAM_VALIDATE = os.environ.get("STREAM_VALIDATE", "1") != "0"
+STREAM_MAX_PREAMBLE = int(os.environ.get("STREAM_MAX_PREAMBLE", "6000"))  # chars sem '{' => fora do schema
 
 
 # === Jitter (aleatoriedade leve) para parecer humano 
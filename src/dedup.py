@@ -0,0 +1,197 @@
+# src/dedup.py
+"""
+Quase-duplicatas em PDF/ (preprint x versão publicada, o mesmo artigo baixado
+duas vezes com outro nome) antes do envio.
+
+Cada PDF vira uma assinatura MinHash das suas "telhas" de DEDUP_SHINGLE
+palavras (texto limpo por src/text_compact, sem cabeçalho/rodapé, e só até
+References/Appendix, onde preprint e versão publicada mais diferem); as
+assinaturas são calculadas em paralelo (ProcessPoolExecutor) e guardadas em
+outputs/cache/minhash.json por sha256 do PDF, então uma nova execução só
+assina os arquivos novos. Pares candidatos saem do LSH (bandas da
+assinatura) e viram grupo se a similaridade estimada for >= DEDUP_THRESHOLD.
+
+Só um representante por grupo é enviado (o já concluído, senão o de texto
+mais longo); quando ele termina, o resultado é ligado aos outros membros:
+linha própria na base consolidada com `duplicate_of` e o item no ledger como
+done apontando para o JSON do representante.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import random
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from src.config import DEDUP_CACHE_PATH, DEDUP_SHINGLE, DEDUP_THRESHOLD, DEDUP_WORKERS
+from src.log import info, warn
+from src.json_extract import SUMMARY_KEYS
+
+NUM_PERM = 128
+BANDS = 32            # 32 bandas x 4 linhas: pares com ~0.5+ de similaridade viram candidatos
+_PRIME = (1 << 61) - 1
+_MAX_WORDS = 30000    # artigos enormes: as primeiras 30k palavras bastam para comparar
+_WORD_RE = re.compile(r"\w+")
+
+_rng = random.Random(1)
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+PARAMS = f"k{DEDUP_SHINGLE}-p{NUM_PERM}-s1-noappendix"  # muda a chave do cache se mudar o método
+
+
+def _shingles(text: str, k: int = DEDUP_SHINGLE) -> Set[int]:
+    words = _WORD_RE.findall(text.lower())[:_MAX_WORDS]
+    out = set()
+    for i in range(max(0, len(words) - k + 1)):
+        h = hashlib.blake2b(" ".join(words[i:i + k]).encode("utf-8"), digest_size=8).digest()
+        out.add(int.from_bytes(h, "little"))
+    return out
+
+
+def minhash(shingles: Set[int]) -> List[int]:
+    return [min((a * h + b) % _PRIME for h in shingles) for a, b in _PERMS]
+
+
+def _signature_job(pdf_path: str) -> Tuple[int, Optional[List[int]]]:
+    """Roda no processo filho. -> (nº de telhas, assinatura ou None se não há texto)."""
+    from src.pdf_utils import PagePolicy, iter_pages
+    from src.text_compact import clean_lines
+    pages = [text for _, text in iter_pages(Path(pdf_path), PagePolicy(skip_appendix=True))]
+    sh = _shingles(" ".join(clean_lines(pages)))
+    return len(sh), (minhash(sh) if sh else None)
+
+
+def similarity(a: List[int], b: List[int]) -> float:
+    """Jaccard estimado: fração das permutações com o mesmo mínimo."""
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+
+class SignatureCache:
+    """sha256 -> {"n": telhas, "sig": [...]} em DEDUP_CACHE_PATH (descartado se PARAMS mudar)."""
+
+    def __init__(self, path: Path = DEDUP_CACHE_PATH):
+        self.path = Path(path)
+        self.items: Dict[str, dict] = {}
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            if data.get("params") == PARAMS:
+                self.items = data.get("items") or {}
+        except (OSError, ValueError, AttributeError):
+            pass
+
+    def save(self) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps({"params": PARAMS, "items": self.items}), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+    def compute(self, pdfs: Iterable[Path], hashes: Dict[Path, str], workers: int = DEDUP_WORKERS) -> None:
+        """Assina só os PDFs cujo sha256 ainda não está no cache."""
+        missing = {}
+        for p in pdfs:
+            if hashes[p] not in self.items:
+                missing.setdefault(hashes[p], p)
+        if not missing:
+            return
+        info(f"Duplicatas: assinando {len(missing)} PDF(s) novo(s)...")
+        paths = [str(p) for p in missing.values()]
+        if workers > 0 and len(paths) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_signature_job, paths, chunksize=4))
+        else:
+            results = [_signature_job(p) for p in paths]
+        for sha, (n, sig) in zip(missing, results):
+            self.items[sha] = {"n": n, "sig": sig}
+        self.save()
+
+
+def _lsh_pairs(sigs: Dict[str, List[int]]) -> Set[Tuple[str, str]]:
+    rows = NUM_PERM // BANDS
+    buckets: Dict[Tuple[int, tuple], List[str]] = {}
+    for sha, sig in sigs.items():
+        for band in range(BANDS):
+            buckets.setdefault((band, tuple(sig[band * rows:(band + 1) * rows])), []).append(sha)
+    pairs = set()
+    for shas in buckets.values():
+        for i in range(len(shas)):
+            for j in range(i + 1, len(shas)):
+                pairs.add((shas[i], shas[j]) if shas[i] < shas[j] else (shas[j], shas[i]))
+    return pairs
+
+
+def duplicate_groups(pdfs: List[Path], hashes: Dict[Path, str], cache: Optional[SignatureCache] = None,
+                     threshold: float = DEDUP_THRESHOLD) -> List[Tuple[List[Path], float]]:
+    """Grupos (>= 2 PDFs) de quase-duplicatas, com a menor similaridade que os ligou."""
+    cache = cache or SignatureCache()
+    cache.compute(pdfs, hashes)
+    sigs = {hashes[p]: cache.items[hashes[p]]["sig"] for p in pdfs if cache.items[hashes[p]]["sig"]}
+
+    parent = {sha: sha for sha in sigs}
+    weakest: Dict[str, float] = {}
+
+    def find(x: str) -> str:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for a, b in _lsh_pairs(sigs):
+        sim = similarity(sigs[a], sigs[b])
+        if sim >= threshold:
+            ra, rb = find(a), find(b)
+            if ra != rb:
+                parent[rb] = ra
+            root = find(a)
+            weakest[root] = min(sim, weakest.get(ra, 1.0), weakest.get(rb, 1.0))
+
+    by_root: Dict[str, List[Path]] = {}
+    for p in pdfs:
+        sha = hashes[p]
+        root = find(sha) if sha in parent else sha
+        by_root.setdefault(root, []).append(p)
+    return [(ps, weakest.get(root, 1.0)) for root, ps in by_root.items() if len(ps) > 1]
+
+
+def plan_duplicates(pdfs: List[Path], hashes: Dict[Path, str], done: Set[str]) -> Dict[Path, Path]:
+    """membro -> representante; o representante é o já concluído, senão o de texto mais longo."""
+    cache = SignatureCache()
+    links: Dict[Path, Path] = {}
+    for group, sim in duplicate_groups(pdfs, hashes, cache):
+        rep = max(group, key=lambda p: (hashes[p] in done, cache.items[hashes[p]]["n"], -group.index(p)))
+        info(f"≈ {rep.name} representa {', '.join(p.name for p in group if p != rep)} (similaridade ≥ {sim:.2f})")
+        for p in group:
+            if p != rep:
+                links[p] = rep
+    return links
+
+
+def link_duplicates(store, ledger, links: Dict[Path, Path], hashes: Dict[Path, str],
+                    variant: str, mode: str, run_id: str) -> int:
+    """Copia o resultado de cada representante concluído para os membros ainda sem resultado."""
+    from src.schema import ArticleSummary
+    linked = 0
+    for member, rep in links.items():
+        m_sha, r_sha = hashes[member], hashes[rep]
+        if m_sha == r_sha or ledger.status(m_sha, variant, mode) == "done":
+            continue  # cópia idêntica (mesmo item no ledger) ou já ligado antes
+        row = store.get(r_sha, variant, mode)
+        if row is None:
+            continue  # representante ainda sem resultado: liga numa próxima execução
+        try:
+            summary = ArticleSummary(**{k: row[k] for k in SUMMARY_KEYS if k in row})
+            store.append(summary, article=member.stem, pdf_sha256=m_sha, variant=variant, mode=mode,
+                         run_id=run_id, duplicate_of=rep.stem, duplicate_sha256=r_sha)
+        except Exception as e:
+            warn(f"Não consegui ligar {member.name} a {rep.name}: {e}")
+            continue
+        ledger.ensure(m_sha, variant, mode, member)
+        ledger.mark_done(m_sha, variant, mode, ledger.output_path(r_sha, variant, mode))
+        linked += 1
+    if linked:
+        info(f"🔗 {linked} duplicata(s) ligada(s) ao resultado do representante.")
+    return linked
@@ -0,0 +1,297 @@
+# src/evaluate.py
+"""
+Avaliação das saídas contra o gabarito humano (Arquivos/Gabarito Artigos.xlsx).
+
+O gabarito tem um artigo por coluna (B..N, título na linha 1) e uma pergunta
+por linha (2 = objetivos e perguntas de pesquisa, 3 = tipo de estudo, 4 =
+metodologia, 5 = achados, 6 = conclusões, 7 = limitações). Ele é lido uma vez
+e guardado em forma colunar em outputs/cache/gabarito.json (campo -> lista de
+textos na ordem dos títulos); a planilha só é aberta de novo se o seu sha256
+mudar.
+
+Cada resultado de outputs/results.jsonl (o mais recente por PDF/variante/modo)
+é ligado a uma coluna do gabarito pelo título (ou pelo nome do PDF) e
+pontuado por campo:
+
+  - f1: sobreposição de tokens (precisão/revocação das palavras, como no SQuAD);
+  - cosine: cosseno TF-IDF (IDF do campo sobre gabarito + saídas);
+  - exact: igualdade normalizada, só em study_type.
+
+Tudo por campo de uma vez: os textos viram matrizes esparsas de contagem
+(scipy.sparse, vocabulário comum) e F1/cosseno saem de operações linha a
+linha entre a matriz das saídas e a do gabarito reindexada — milhares de
+saídas x 8 campos x 6 variantes/modos levam segundos.
+
+    python run.py evaluate [--gabarito ARQ.xlsx]   # grava outputs/evaluation.csv e mostra as médias
+"""
+from __future__ import annotations
+import csv
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from src.config import EVAL_PATH, GABARITO_CACHE_PATH, GABARITO_PATH
+from src.hashing import file_sha256
+from src.log import info, warn
+
+# campo do ArticleSummary -> linha do gabarito (a linha 2 responde objetivos E perguntas de pesquisa)
+FIELD_ROWS: Dict[str, int] = {
+    "title": 1, "main_objectives": 2, "research_questions": 2, "study_type": 3,
+    "methodology": 4, "main_findings": 5, "conclusions": 6, "limitations": 7,
+}
+EXACT_FIELDS = ("study_type",)
+SHEET = "Planilha1"
+TITLE_MATCH = 0.6  # Jaccard mínimo entre os tokens do título (ou nome do PDF) e o título do gabarito
+
+_TOKEN_RE = re.compile(r"[0-9a-zà-ÿ]+")
+_STOPWORDS = frozenset("a an the of and or to in on for with by as is are was were be this that it its".split())
+_LABEL_RE = re.compile(r"[^0-9a-zà-ÿ]+")
+_SEP = "\x00"
+_SPLIT_RE = re.compile(r"[0-9a-zà-ÿ]+|\x00")
+
+
+def tokens(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall((text or "").lower()) if t not in _STOPWORDS]
+
+
+def _label(text: str) -> str:
+    return _LABEL_RE.sub(" ", (text or "").lower()).strip()
+
+
+# ---------- gabarito ----------
+@dataclass
+class AnswerKey:
+    titles: List[str]
+    fields: Dict[str, List[str]]  # campo -> um texto por artigo, na ordem de titles
+    source_sha256: str = ""
+
+
+def _read_xlsx(path: Path) -> AnswerKey:
+    from openpyxl import load_workbook
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb[SHEET] if SHEET in wb.sheetnames else wb.worksheets[0]
+        rows = [list(r) for r in ws.iter_rows(min_row=1, max_row=max(FIELD_ROWS.values()), values_only=True)]
+    finally:
+        wb.close()
+    cell = lambda r, j: str(rows[r - 1][j] or "").strip() if j < len(rows[r - 1]) else ""
+    cols = [j for j in range(1, len(rows[0])) if cell(1, j)]  # coluna A = rótulos das perguntas
+    return AnswerKey(
+        titles=[cell(1, j) for j in cols],
+        fields={f: [cell(r, j) for j in cols] for f, r in FIELD_ROWS.items()},
+    )
+
+
+_KEYS: Dict[str, AnswerKey] = {}
+
+
+def load_answer_key(path: Path = GABARITO_PATH, cache_path: Path = GABARITO_CACHE_PATH) -> AnswerKey:
+    """Gabarito colunar: memória > outputs/cache/gabarito.json > planilha."""
+    sha = file_sha256(path)
+    if sha in _KEYS:
+        return _KEYS[sha]
+    key = None
+    try:
+        data = json.loads(Path(cache_path).read_text(encoding="utf-8"))
+        if data.get("source_sha256") == sha and data.get("rows") == FIELD_ROWS:
+            key = AnswerKey(data["titles"], data["fields"], sha)
+    except (OSError, ValueError, KeyError):
+        pass
+    if key is None:
+        key = _read_xlsx(Path(path))
+        key.source_sha256 = sha
+        try:
+            Path(cache_path).parent.mkdir(parents=True, exist_ok=True)
+            tmp = Path(cache_path).with_suffix(".tmp")
+            tmp.write_text(json.dumps({"source_sha256": sha, "rows": FIELD_ROWS, "titles": key.titles,
+                                       "fields": key.fields}, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, cache_path)
+        except OSError:
+            pass
+    _KEYS[sha] = key
+    return key
+
+
+# ---------- matrizes ----------
+def count_matrices(*groups: Sequence[str]) -> List[sparse.csr_matrix]:
+    """Uma matriz de contagem de tokens (linhas = textos) por grupo, todas no mesmo vocabulário."""
+    vocab: Dict[str, int] = {_SEP: 0}
+    built = []
+    for texts in groups:
+        # um findall no grupo inteiro (textos separados por _SEP) em vez de um por texto
+        flat = _SPLIT_RE.findall(_SEP.join(str(t or "").replace(_SEP, " ") for t in texts).lower())
+        for tok in dict.fromkeys(flat):
+            vocab.setdefault(tok, len(vocab))
+        ids = np.fromiter(map(vocab.__getitem__, flat), dtype=np.int64, count=len(flat))
+        built.append((len(texts), ids))
+    drop = np.zeros(len(vocab), dtype=bool)
+    drop[[vocab[w] for w in _STOPWORDS | {_SEP} if w in vocab]] = True
+    out = []
+    for n, ids in built:
+        row = np.cumsum(ids == 0)  # cada _SEP abre o texto seguinte
+        keep = ~drop[ids]
+        m = sparse.coo_matrix((np.ones(int(keep.sum())), (row[keep], ids[keep])), shape=(n, len(vocab)))
+        out.append(m.tocsr())  # tokens repetidos somam: contagem
+    return out
+
+
+def _rowsum(m) -> np.ndarray:
+    return np.asarray(m.sum(axis=1)).ravel()
+
+
+def l2_rows(m: sparse.csr_matrix) -> sparse.csr_matrix:
+    norms = np.sqrt(_rowsum(m.multiply(m)))
+    norms[norms == 0] = 1.0
+    return sparse.diags(1.0 / norms) @ m
+
+
+def token_f1(out: sparse.csr_matrix, ref: sparse.csr_matrix) -> np.ndarray:
+    """F1 de tokens linha a linha (out[i] x ref[i]); dois textos vazios = 1."""
+    overlap = _rowsum(out.minimum(ref))
+    n_out, n_ref = _rowsum(out), _rowsum(ref)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        f1 = np.where(overlap > 0, 2 * overlap / (n_out + n_ref), 0.0)
+    return np.where((n_out == 0) & (n_ref == 0), 1.0, f1)
+
+
+def tfidf_cosine(out: sparse.csr_matrix, ref: sparse.csr_matrix, corpus: sparse.csr_matrix) -> np.ndarray:
+    """Cosseno TF-IDF linha a linha; IDF suavizado (como no scikit-learn) sobre `corpus`."""
+    df = np.asarray((corpus > 0).sum(axis=0)).ravel()
+    idf = sparse.diags(np.log((1.0 + corpus.shape[0]) / (1.0 + df)) + 1.0)
+    return _rowsum(l2_rows(out @ idf).multiply(l2_rows(ref @ idf)))
+
+
+def match_rows(rows: List[dict], key: AnswerKey) -> np.ndarray:
+    """Coluna do gabarito de cada linha (-1 = sem par): melhor Jaccard entre título/nome do PDF e o título."""
+    if not rows or not key.titles:
+        return np.full(len(rows), -1)
+    ref, by_title, by_name = count_matrices(key.titles, [r.get("title") or "" for r in rows],
+                                            [(r.get("article") or "").replace("_", " ") for r in rows])
+    ref = (ref > 0).astype(np.float64)
+    n_ref = _rowsum(ref)
+    best = np.zeros((len(rows), len(key.titles)))
+    for m in (by_title, by_name):
+        m = (m > 0).astype(np.float64)
+        inter = (m @ ref.T).toarray()
+        union = _rowsum(m)[:, None] + n_ref[None, :] - inter
+        with np.errstate(divide="ignore", invalid="ignore"):
+            best = np.maximum(best, np.where(union > 0, inter / union, 0.0))
+    idx = best.argmax(axis=1)
+    return np.where(best[np.arange(len(rows)), idx] >= TITLE_MATCH, idx, -1)
+
+
+# ---------- avaliação ----------
+@dataclass
+class Evaluation:
+    """Colunas alinhadas, uma posição por (resultado, campo); exact = NaN fora de EXACT_FIELDS."""
+    columns: Dict[str, np.ndarray]
+    unmatched: List[str] = field(default_factory=list)
+    seconds: float = 0.0
+
+    def __len__(self) -> int:
+        return len(self.columns.get("field", ()))
+
+    def means(self) -> Dict[Tuple[str, str, str], Tuple[int, float, float, float]]:
+        """(variante, modo, campo) -> (n, F1 médio, cosseno médio, acerto exato)."""
+        c = self.columns
+        if not len(self):
+            return {}
+        groups = np.char.add(np.char.add(c["variant"].astype(str), "\t"), np.char.add(
+            np.char.add(c["mode"].astype(str), "\t"), c["field"].astype(str)))
+        labels, inv = np.unique(groups, return_inverse=True)
+        n = np.bincount(inv)
+        f1 = np.bincount(inv, c["f1"]) / n
+        cos = np.bincount(inv, c["cosine"]) / n
+        has = ~np.isnan(c["exact"])
+        exact = np.bincount(inv, np.where(has, c["exact"], 0.0)) / np.maximum(np.bincount(inv, has), 1)
+        exact[np.bincount(inv, has, minlength=len(labels)) == 0] = np.nan
+        return {tuple(lab.split("\t")): (int(n[i]), float(f1[i]), float(cos[i]), float(exact[i]))
+                for i, lab in enumerate(labels)}
+
+    def write_csv(self, path: Path = EVAL_PATH) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        names = list(self.columns)
+        with path.open("w", encoding="utf-8", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(names)
+            for row in zip(*(self.columns[k] for k in names)):
+                w.writerow(["" if isinstance(v, float) and np.isnan(v) else
+                            (f"{v:.4f}" if isinstance(v, (float, np.floating)) else v) for v in row])
+        return path
+
+    def report(self) -> None:
+        """Médias por variante/modo: F1 / cosseno de cada campo e acerto exato do tipo de estudo."""
+        means = self.means()
+        if not means:
+            print("Nada para avaliar (nenhum resultado ligado ao gabarito).")
+            return
+        cells = sorted({(v, m) for v, m, _ in means})
+        short = {f: f.replace("main_", "").replace("research_", "") for f in FIELD_ROWS}
+        print("F1 / cosseno TF-IDF médios por campo; exato = study_type igual ao do gabarito")
+        print(f"  {'variante':<10}{'modo':<9}{'n':>4}" + "".join(f"{short[f]:>13}" for f in FIELD_ROWS) + f"{'exato':>8}")
+        for v, m in cells:
+            line = f"  {v:<10}{m:<9}{means.get((v, m, 'title'), (0,))[0]:>4}"
+            for f in FIELD_ROWS:
+                _, f1, cos, _ = means.get((v, m, f), (0, np.nan, np.nan, np.nan))
+                line += f"{f1:>7.2f}/{cos:.2f}"
+            exact = means.get((v, m, EXACT_FIELDS[0]), (0, 0, 0, np.nan))[3]
+            print(line + f"{exact:>8.0%}")
+        if self.unmatched:
+            print(f"\nSem coluna no gabarito ({len(self.unmatched)}): {', '.join(sorted(set(self.unmatched))[:10])}")
+
+
+def evaluate_rows(rows: List[dict], key: AnswerKey) -> Evaluation:
+    t0 = time.perf_counter()
+    rows = [r for r in rows if not r.get("duplicate_of")]  # cópias do representante contariam duas vezes
+    idx = match_rows(rows, key)
+    unmatched = [r.get("article") or "?" for r, j in zip(rows, idx) if j < 0]
+    rows = [r for r, j in zip(rows, idx) if j >= 0]
+    idx = idx[idx >= 0]
+
+    n, nf = len(rows), len(FIELD_ROWS)
+    columns: Dict[str, np.ndarray] = {
+        "article": np.tile(np.array([r.get("article") or "" for r in rows], dtype=object), nf),
+        "gabarito": np.tile(np.array(key.titles, dtype=object)[idx] if n else np.array([], dtype=object), nf),
+        "variant": np.tile(np.array([r.get("variant") or "" for r in rows], dtype=object), nf),
+        "mode": np.tile(np.array([r.get("mode") or "" for r in rows], dtype=object), nf),
+        "field": np.repeat(np.array(list(FIELD_ROWS), dtype=object), n),
+    }
+    f1, cos, exact = [], [], []
+    for name in FIELD_ROWS:
+        outputs = [str(r.get(name) or "") for r in rows]
+        refs = key.fields[name]
+        ref_m, out_m = count_matrices(refs, outputs)
+        aligned = ref_m[idx]
+        f1.append(token_f1(out_m, aligned))
+        cos.append(tfidf_cosine(out_m, aligned, sparse.vstack([ref_m, out_m]).tocsr()))
+        if name in EXACT_FIELDS:
+            labels = np.array([_label(t) for t in refs], dtype=object)
+            exact.append((np.array([_label(t) for t in outputs], dtype=object) == labels[idx]).astype(float))
+        else:
+            exact.append(np.full(n, np.nan))
+    columns.update(f1=np.concatenate(f1), cosine=np.concatenate(cos), exact=np.concatenate(exact))
+    return Evaluation(columns, unmatched, time.perf_counter() - t0)
+
+
+def evaluate(gabarito: Optional[Path] = None, rows: Optional[List[dict]] = None) -> Optional[Evaluation]:
+    """Avalia os resultados mais recentes de outputs/results.jsonl (ou `rows`) contra o gabarito."""
+    path = Path(gabarito or GABARITO_PATH)
+    if not path.exists():
+        warn(f"Gabarito não encontrado: {path}")
+        return None
+    key = load_answer_key(path)
+    if rows is None:
+        from src.storage import ResultsStore
+        rows = ResultsStore().latest_rows()
+    result = evaluate_rows(rows, key)
+    info(f"{len(result) // len(FIELD_ROWS)} resultado(s) x {len(FIELD_ROWS)} campos avaliados "
+         f"contra {len(key.titles)} artigo(s) do gabarito em {result.seconds:.2f}s")
+    return result
@@ -0,0 +1,140 @@
+# src/extractor_bench.py
+"""
+Benchmark dos backends de extração sobre uma amostra de PDF/:
+pages/sec, taxa de páginas vazias e rendimento de caracteres por página.
+O vencedor vira o padrão da pasta (PDF_EXTRACTOR=auto).
+
+    python run.py --bench-extractors [--sample 20]
+"""
+from __future__ import annotations
+import json
+import random
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+from src.config import PDF_DIR, EXTRACTOR_CHOICE_FILE
+from src.extractors import Extractor, available_extractors
+from src.log import info, warn
+
+# Critério de escolha: entre os backends que não perdem texto (taxa de vazias até
+# +2 p.p. da melhor e >= 80% dos caracteres do melhor), vence o mais rápido.
+EMPTY_RATE_TOLERANCE = 0.02
+MIN_YIELD_RATIO = 0.80
+
+
+@dataclass
+class BackendResult:
+    name: str
+    key: str
+    docs: int = 0
+    failures: int = 0
+    pages: int = 0
+    empty_pages: int = 0
+    chars: int = 0
+    seconds: float = 0.0
+
+    @property
+    def pages_per_sec(self) -> float:
+        return self.pages / self.seconds if self.seconds else 0.0
+
+    @property
+    def empty_rate(self) -> float:
+        return self.empty_pages / self.pages if self.pages else 1.0
+
+    @property
+    def chars_per_page(self) -> float:
+        return self.chars / self.pages if self.pages else 0.0
+
+
+def benchmark(pdfs: Sequence[Path], extractors: Sequence[Extractor]) -> List[BackendResult]:
+    """Extrai TODAS as páginas de cada PDF com cada backend (sem cache)."""
+    results = []
+    for ext in extractors:
+        res = BackendResult(name=ext.name, key=ext.key)
+        for pdf in pdfs:
+            t0 = time.perf_counter()
+            try:
+                doc = ext.open(pdf)
+                try:
+                    for i in range(doc.page_count):
+                        try:
+                            text = doc.page_text(i) or ""
+                        except Exception:
+                            text = ""
+                        res.pages += 1
+                        res.chars += len(text.strip())
+                        if not text.strip():
+                            res.empty_pages += 1
+                finally:
+                    doc.close()
+                res.docs += 1
+            except Exception:
+                res.failures += 1
+            res.seconds += time.perf_counter() - t0
+        results.append(res)
+    return results
+
+
+def choose_default(results: Sequence[BackendResult]) -> Optional[BackendResult]:
+    ok = [r for r in results if r.pages]
+    if not ok:
+        return None
+    best_empty = min(r.empty_rate for r in ok)
+    best_yield = max(r.chars_per_page for r in ok)
+    eligible = [
+        r for r in ok
+        if r.empty_rate <= best_empty + EMPTY_RATE_TOLERANCE and r.chars_per_page >= MIN_YIELD_RATIO * best_yield
+    ]
+    return max(eligible or ok, key=lambda r: r.pages_per_sec)
+
+
+def save_choice(folder: Path, winner: BackendResult, results: Sequence[BackendResult]) -> None:
+    path = Path(EXTRACTOR_CHOICE_FILE)
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if not isinstance(data, dict):
+            data = {}
+    except (OSError, ValueError):
+        data = {}
+    data[str(Path(folder).resolve())] = {
+        "extractor": winner.name,
+        "chosen_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "results": [
+            {**asdict(r), "pages_per_sec": r.pages_per_sec, "empty_rate": r.empty_rate,
+             "chars_per_page": r.chars_per_page}
+            for r in results
+        ],
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def run_benchmark(folder: Path = PDF_DIR, sample: int = 20, seed: int = 0, save: bool = True) -> Optional[str]:
+    pdfs = sorted(Path(folder).glob("*.pdf"))
+    if not pdfs:
+        warn(f"Nenhum PDF em {folder} para o benchmark.")
+        return None
+    if sample and len(pdfs) > sample:
+        pdfs = sorted(random.Random(seed).sample(pdfs, sample))
+
+    extractors = available_extractors()
+    info(f"Benchmark de extração: {len(pdfs)} PDF(s) × {len(extractors)} backend(s) "
+         f"({', '.join(e.name for e in extractors)})")
+    results = benchmark(pdfs, extractors)
+
+    print(f"\n{'backend':12} {'págs/s':>8} {'vazias':>8} {'chars/pág':>10} {'falhas':>7} {'tempo(s)':>9}")
+    for r in sorted(results, key=lambda r: -r.pages_per_sec):
+        print(f"{r.name:12} {r.pages_per_sec:>8.1f} {r.empty_rate * 100:>7.1f}% {r.chars_per_page:>10.0f} "
+              f"{r.failures:>7} {r.seconds:>9.2f}")
+
+    winner = choose_default(results)
+    if winner is None:
+        warn("Nenhum backend conseguiu extrair páginas.")
+        return None
+    info(f"\nPadrão escolhido para {folder}: {winner.name}")
+    if save:
+        save_choice(folder, winner, results)
+        info(f"(salvo em {EXTRACTOR_CHOICE_FILE}; use PDF_EXTRACTOR=<nome> para forçar outro)")
+    return winner.name
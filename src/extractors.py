@@ -0,0 +1,213 @@
+# src/extractors.py
+"""
+Backends de extração de texto de PDF. Todos expõem a mesma interface:
+
+    ext = get_extractor("pdfminer")
+    doc = ext.open(path)          # -> page_count, page_text(i), close()
+
+`key` (nome + revisão + versão da lib) entra na chave do cache de texto, então
+trocar/atualizar o backend nunca reaproveita texto de outro extrator.
+"""
+from __future__ import annotations
+import io
+import json
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.config import PDF_EXTRACTOR, EXTRACTOR_CHOICE_FILE, PDF_DIR
+
+
+class Extractor:
+    name = ""
+    revision = "1"  # mude quando a forma de extrair de um backend mudar
+
+    def available(self) -> bool:
+        raise NotImplementedError
+
+    def lib_version(self) -> str:
+        return ""
+
+    @property
+    def key(self) -> str:
+        ver = self.lib_version()
+        return f"{self.name}-{self.revision}" + (f"-{ver}" if ver else "")
+
+    def open(self, pdf_path: Path):
+        raise NotImplementedError
+
+
+# ---------- PyPDF2 / pypdf ----------
+class _PypdfDoc:
+    def __init__(self, reader):
+        self._reader = reader
+        self.page_count = len(reader.pages)
+
+    def page_text(self, idx: int) -> str:
+        return self._reader.pages[idx].extract_text() or ""
+
+    def close(self) -> None:
+        pass
+
+
+class PyPDF2Extractor(Extractor):
+    name = "pypdf2"
+    module = "PyPDF2"
+
+    def _lib(self):
+        return __import__(self.module)
+
+    def available(self) -> bool:
+        try:
+            self._lib()
+            return True
+        except ImportError:
+            return False
+
+    def lib_version(self) -> str:
+        # PyPDF2 mantém a chave antiga do cache ("pypdf2-1")
+        return "" if self.module == "PyPDF2" else getattr(self._lib(), "__version__", "")
+
+    def open(self, pdf_path: Path):
+        return _PypdfDoc(self._lib().PdfReader(str(pdf_path)))
+
+
+class PypdfExtractor(PyPDF2Extractor):
+    """pypdf é o sucessor mantido do PyPDF2 (mesma API, parse mais rápido)."""
+    name = "pypdf"
+    module = "pypdf"
+
+
+# ---------- pdfminer.six ----------
+class _MinerDoc:
+    def __init__(self, pdf_path: Path):
+        from pdfminer.pdfparser import PDFParser
+        from pdfminer.pdfdocument import PDFDocument
+        from pdfminer.pdfpage import PDFPage
+        from pdfminer.pdfinterp import PDFResourceManager
+
+        self._fp = open(pdf_path, "rb")
+        try:
+            doc = PDFDocument(PDFParser(self._fp))
+            # criar os objetos de página é barato; o conteúdo só é interpretado em page_text
+            self._pages = list(PDFPage.create_pages(doc))
+        except Exception:
+            self._fp.close()
+            raise
+        self._rsrc = PDFResourceManager(caching=True)
+        self.page_count = len(self._pages)
+
+    def page_text(self, idx: int) -> str:
+        from pdfminer.converter import TextConverter
+        from pdfminer.layout import LAParams
+        from pdfminer.pdfinterp import PDFPageInterpreter
+
+        out = io.StringIO()
+        device = TextConverter(self._rsrc, out, laparams=LAParams())
+        try:
+            PDFPageInterpreter(self._rsrc, device).process_page(self._pages[idx])
+        finally:
+            device.close()
+        return out.getvalue()
+
+    def close(self) -> None:
+        self._fp.close()
+
+
+class PdfminerExtractor(Extractor):
+    name = "pdfminer"
+
+    def available(self) -> bool:
+        try:
+            import pdfminer  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def lib_version(self) -> str:
+        import pdfminer
+        return getattr(pdfminer, "__version__", "")
+
+    def open(self, pdf_path: Path):
+        return _MinerDoc(pdf_path)
+
+
+# ---------- pdftotext (poppler, binário externo) ----------
+class _PdftotextDoc:
+    def __init__(self, pages: List[str]):
+        self._pages = pages
+        self.page_count = len(pages)
+
+    def page_text(self, idx: int) -> str:
+        return self._pages[idx]
+
+    def close(self) -> None:
+        pass
+
+
+class PdftotextExtractor(Extractor):
+    """Usa o binário `pdftotext` se estiver no PATH (uma chamada por documento)."""
+    name = "pdftotext"
+    _version: Optional[str] = None
+
+    def available(self) -> bool:
+        return shutil.which("pdftotext") is not None
+
+    def lib_version(self) -> str:
+        if PdftotextExtractor._version is None:
+            try:
+                res = subprocess.run(["pdftotext", "-v"], capture_output=True, text=True, timeout=10)
+                first = (res.stderr or res.stdout).strip().splitlines()[0]
+                PdftotextExtractor._version = first.split()[-1]
+            except Exception:
+                PdftotextExtractor._version = ""
+        return PdftotextExtractor._version
+
+    def open(self, pdf_path: Path):
+        res = subprocess.run(
+            ["pdftotext", "-enc", "UTF-8", str(pdf_path), "-"],
+            capture_output=True, timeout=120,
+        )
+        if res.returncode != 0:
+            raise RuntimeError(f"pdftotext falhou ({res.returncode}): {res.stderr.decode(errors='replace')[:200]}")
+        pages = res.stdout.decode("utf-8", errors="replace").split("\f")
+        if pages and not pages[-1].strip():
+            pages.pop()  # o último \f fecha a última página
+        return _PdftotextDoc(pages)
+
+
+# ---------- registro / escolha ----------
+EXTRACTORS: Dict[str, Extractor] = {
+    e.name: e for e in (PypdfExtractor(), PyPDF2Extractor(), PdfminerExtractor(), PdftotextExtractor())
+}
+
+def get_extractor(name: str) -> Extractor:
+    try:
+        return EXTRACTORS[name]
+    except KeyError:
+        raise ValueError(f"Extrator desconhecido: {name!r} (opções: {', '.join(EXTRACTORS)})")
+
+def available_extractors() -> List[Extractor]:
+    return [e for e in EXTRACTORS.values() if e.available()]
+
+def load_corpus_choice(folder: Path = PDF_DIR) -> Optional[str]:
+    """Backend escolhido pelo benchmark para esta pasta de PDFs (se houver)."""
+    try:
+        data = json.loads(Path(EXTRACTOR_CHOICE_FILE).read_text(encoding="utf-8"))
+        return data.get(str(Path(folder).resolve()), {}).get("extractor")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def extractor_chain(primary: Optional[str] = None) -> List[Extractor]:
+    """
+    Ordem de tentativa por documento: o principal (ENV PDF_EXTRACTOR, ou o
+    escolhido pelo benchmark em modo "auto", ou PyPDF2) e depois os demais
+    disponíveis como fallback quando o principal não devolve texto.
+    """
+    name = primary or PDF_EXTRACTOR
+    if name == "auto":
+        name = load_corpus_choice() or "pypdf2"
+    chain = [get_extractor(name)]
+    chain += [e for e in EXTRACTORS.values() if e.name != name and e.available()]
+    return [e for e in chain if e.available()]
@@ -0,0 +1,298 @@
+# src/grounding.py
+"""
+Checagem automática de suporte: cada frase do resumo tem um trecho do PDF
+que a sustente? Serve de triagem para a releitura humana de alucinações.
+
+Índice por PDF: o texto de cada página (sem referências/apêndices, linhas
+limpas por src/text_compact) vira trechos de GROUNDING_PASSAGE_WORDS
+palavras com 50% de sobreposição; cada trecho é um vetor TF-IDF de unigramas
+e bigramas (normalizado). O índice é montado uma vez por sha256 do PDF (em
+paralelo, ProcessPoolExecutor) e guardado em outputs/cache/grounding/, então
+serve a todas as variantes/modos e às próximas execuções.
+
+Checagem: os campos de GROUNDED_FIELDS são quebrados em frases; todas as
+frases de todas as variantes de um PDF vão numa matriz só e uma
+multiplicação esparsa (frases x trechos) dá o cosseno de cada par. O melhor
+trecho de cada frase é o seu suporte (com a página); abaixo de
+GROUNDING_THRESHOLD a frase é marcada. Termos da frase que não aparecem no
+PDF entram na norma com o IDF máximo, então afirmações com vocabulário
+estranho ao artigo pontuam baixo.
+
+    python run.py ground [--threshold 0.12]   # grava outputs/grounding.csv e mostra as frases sem suporte
+"""
+from __future__ import annotations
+import csv
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from src.config import (
+    GROUNDING_CACHE_DIR, GROUNDING_PASSAGE_WORDS, GROUNDING_PATH, GROUNDING_THRESHOLD, GROUNDING_WORKERS, PDF_DIR,
+)
+from src.evaluate import l2_rows, tokens
+from src.log import info, warn
+
+GROUNDED_FIELDS = ("main_objectives", "research_questions", "methodology", "main_findings", "conclusions", "limitations")
+MIN_TOKENS = 4  # frases mais curtas (ex.: "Survey.") não são checadas
+PARAMS = f"w{GROUNDING_PASSAGE_WORDS}-ng2-v1"  # muda a chave do cache se mudar o método
+
+_SENT_RE = re.compile(r"(?<=[.!?;])\s+(?=[A-Z0-9(\"'“])")
+_NOT_STATED_RE = re.compile(r"not (?:explicitly )?(?:stated|mentioned|reported|acknowledged|discussed)"
+                            r"|não (?:são |é )?(?:explicitad|informad|mencionad|declarad)", re.I)
+
+
+def terms(text: str) -> List[str]:
+    """Unigramas (sem stopwords) + bigramas de palavras vizinhas."""
+    toks = tokens(text)
+    return toks + [f"{a} {b}" for a, b in zip(toks, toks[1:])]
+
+
+def sentences(text: str) -> List[str]:
+    """Frases checáveis do campo (sem as curtas e as do tipo 'not explicitly stated')."""
+    parts = (s.strip() for s in _SENT_RE.split(text or ""))
+    return [s for s in parts if len(tokens(s)) >= MIN_TOKENS and not _NOT_STATED_RE.search(s)]
+
+
+def page_passages(pages: Sequence[Tuple[int, str]], words: int = GROUNDING_PASSAGE_WORDS) -> List[Tuple[int, str]]:
+    """[(página, trecho)]: janelas de `words` palavras com passo de meia janela, sem cruzar páginas."""
+    from src.text_compact import clean_lines
+    step = max(1, words // 2)
+    out = []
+    for page, text in pages:
+        ws = " ".join(clean_lines([text])).split()
+        for start in range(0, max(1, len(ws) - step), step):
+            chunk = ws[start:start + words]
+            if len(chunk) >= MIN_TOKENS * 2:
+                out.append((page, " ".join(chunk)))
+    return out
+
+
+# ---------- índice por PDF ----------
+@dataclass
+class PassageIndex:
+    pages: np.ndarray             # página (1-based) de cada trecho
+    passages: List[str]
+    vocab: Dict[str, int]
+    idf: np.ndarray
+    matrix: sparse.csr_matrix     # trechos x termos, TF-IDF com norma 1
+
+    @classmethod
+    def build(cls, pages: Sequence[Tuple[int, str]]) -> "PassageIndex":
+        found = page_passages(pages)
+        vocab: Dict[str, int] = {}
+        indptr, indices = [0], []
+        for _, text in found:
+            indices.extend(vocab.setdefault(t, len(vocab)) for t in terms(text))
+            indptr.append(len(indices))
+        counts = sparse.csr_matrix((np.ones(len(indices)), indices, indptr), shape=(len(found), len(vocab)))
+        counts.sum_duplicates()
+        df = np.asarray((counts > 0).sum(axis=0)).ravel()
+        idf = np.log((1.0 + len(found)) / (1.0 + df)) + 1.0
+        return cls(np.array([p for p, _ in found], dtype=np.int32), [t for _, t in found], vocab, idf,
+                   l2_rows(counts @ sparse.diags(idf)).tocsr())
+
+    @property
+    def idf_max(self) -> float:
+        return float(np.log(1.0 + len(self.passages)) + 1.0)  # termo em nenhum trecho
+
+    def score(self, queries: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """(melhor cosseno, índice do melhor trecho) de cada frase; -1 se o PDF não tem trechos."""
+        if not queries:
+            return np.zeros(0), np.zeros(0, dtype=np.int64)
+        if not self.passages:
+            return np.zeros(len(queries)), np.full(len(queries), -1)
+        vocab = dict(self.vocab)  # termos fora do PDF ganham colunas próprias só nesta consulta
+        indptr, indices = [0], []
+        for q in queries:
+            indices.extend(vocab.setdefault(t, len(vocab)) for t in terms(q))
+            indptr.append(len(indices))
+        n = len(vocab)
+        q = sparse.csr_matrix((np.ones(len(indices)), indices, indptr), shape=(len(queries), n))
+        q.sum_duplicates()
+        idf = np.concatenate([self.idf, np.full(n - len(self.idf), self.idf_max)])
+        q = l2_rows(q @ sparse.diags(idf))
+        p = sparse.csr_matrix((self.matrix.data, self.matrix.indices, self.matrix.indptr),
+                              shape=(self.matrix.shape[0], n))
+        sims = (q @ p.T).toarray()
+        best = sims.argmax(axis=1)
+        return sims[np.arange(len(queries)), best], best
+
+    # ---------- cache em disco ----------
+    def save(self, sha: str, root: Path = GROUNDING_CACHE_DIR) -> None:
+        try:
+            root.mkdir(parents=True, exist_ok=True)
+            m = self.matrix
+            np.savez_compressed(root / f"{sha}.npz", data=m.data, indices=m.indices, indptr=m.indptr,
+                                shape=np.array(m.shape), idf=self.idf, pages=self.pages)
+            terms_by_id = sorted(self.vocab, key=self.vocab.__getitem__)
+            tmp = root / f"{sha}.json.tmp"
+            tmp.write_text(json.dumps({"params": PARAMS, "terms": terms_by_id, "passages": self.passages},
+                                      ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, root / f"{sha}.json")
+        except OSError:
+            pass
+
+    @classmethod
+    def load(cls, sha: str, root: Path = GROUNDING_CACHE_DIR) -> Optional["PassageIndex"]:
+        try:
+            meta = json.loads((root / f"{sha}.json").read_text(encoding="utf-8"))
+            if meta.get("params") != PARAMS:
+                return None
+            with np.load(root / f"{sha}.npz") as z:
+                matrix = sparse.csr_matrix((z["data"], z["indices"], z["indptr"]), shape=tuple(z["shape"]))
+                return cls(z["pages"], meta["passages"], {t: i for i, t in enumerate(meta["terms"])},
+                           z["idf"], matrix)
+        except (OSError, ValueError, KeyError):
+            return None
+
+
+def _index_job(pdf_path: str, sha: str) -> int:
+    """Roda no processo filho: monta e grava o índice; devolve o nº de trechos (-1 = PDF ilegível)."""
+    from src.pdf_utils import PagePolicy, iter_pages
+    try:
+        pages = [(idx + 1, text) for idx, text in iter_pages(Path(pdf_path), PagePolicy(skip_appendix=True))]
+    except Exception:
+        return -1
+    index = PassageIndex.build(pages)
+    index.save(sha)
+    return len(index.passages)
+
+
+def load_indexes(pdfs: Dict[str, Path], workers: int = GROUNDING_WORKERS,
+                 rebuild: bool = False) -> Dict[str, PassageIndex]:
+    """sha256 -> índice; só os PDFs sem índice em cache (ou todos, com rebuild) são processados."""
+    indexes = {} if rebuild else {sha: idx for sha in pdfs if (idx := PassageIndex.load(sha)) is not None}
+    missing = [sha for sha in pdfs if sha not in indexes]
+    if missing:
+        info(f"Suporte: indexando {len(missing)} PDF(s)...")
+        jobs = [(str(pdfs[sha]), sha) for sha in missing]
+        if workers > 0 and len(jobs) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(_index_job, *zip(*jobs)))
+        else:
+            for job in jobs:
+                _index_job(*job)
+        for sha in missing:
+            idx = PassageIndex.load(sha)
+            if idx is None:
+                warn(f"Não consegui indexar {pdfs[sha].name}.")
+            else:
+                indexes[sha] = idx
+    return indexes
+
+
+# ---------- checagem ----------
+@dataclass
+class Grounding:
+    """Uma posição por frase checada."""
+    columns: Dict[str, np.ndarray]
+    threshold: float
+    missing: List[str] = field(default_factory=list)  # artigos sem PDF em PDF_DIR
+    seconds: float = 0.0
+
+    def __len__(self) -> int:
+        return len(self.columns.get("score", ()))
+
+    def write_csv(self, path: Path = GROUNDING_PATH) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        names = list(self.columns)
+        with path.open("w", encoding="utf-8", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(names)
+            for row in zip(*(self.columns[k] for k in names)):
+                w.writerow([f"{v:.4f}" if isinstance(v, (float, np.floating)) else v for v in row])
+        return path
+
+    def report(self, worst: int = 10) -> None:
+        """% de frases sem suporte por variante/modo e campo, e as piores frases."""
+        if not len(self):
+            print("Nenhuma frase checada.")
+            return
+        c = self.columns
+        cells = sorted(set(zip(c["variant"], c["mode"])))
+        print(f"Frases sem suporte (cosseno < {self.threshold:.2f}) por campo")
+        print(f"  {'variante':<10}{'modo':<9}{'frases':>7}{'sem sup.':>9}"
+              + "".join(f"{f.replace('main_', '').replace('research_', '')[:11]:>13}" for f in GROUNDED_FIELDS))
+        for v, m in cells:
+            cell = (c["variant"] == v) & (c["mode"] == m)
+            line = f"  {v:<10}{m:<9}{cell.sum():>7}{c['flagged'][cell].mean():>9.0%}"
+            for f in GROUNDED_FIELDS:
+                sel = cell & (c["field"] == f)
+                line += f"{c['flagged'][sel].mean():>13.0%}" if sel.any() else f"{'-':>13}"
+            print(line)
+        order = np.argsort(c["score"])[:worst]
+        order = [i for i in order if c["flagged"][i]]
+        if order:
+            print(f"\nPiores frases ({len(order)} de {int(c['flagged'].sum())} marcadas):")
+            for i in order:
+                where = f"p. {c['page'][i]}" if c["score"][i] > 0 else "nada parecido"
+                print(f"  {c['score'][i]:.2f} [{c['article'][i]} {c['variant'][i]}/{c['mode'][i]} {c['field'][i]}, "
+                      f"{where}] {c['sentence'][i][:140]}")
+        if self.missing:
+            print(f"\nSem PDF em {PDF_DIR} ({len(self.missing)}): {', '.join(sorted(set(self.missing))[:10])}")
+
+
+def ground_rows(rows: List[dict], pdfs: Dict[str, Path], threshold: float = GROUNDING_THRESHOLD,
+                rebuild: bool = False) -> Grounding:
+    t0 = time.perf_counter()
+    rows = [r for r in rows if not r.get("duplicate_of")]  # mesmo texto do representante
+    missing = [r.get("article") or "?" for r in rows if r.get("pdf_sha256") not in pdfs]
+    by_pdf: Dict[str, List[dict]] = {}
+    for r in rows:
+        if r.get("pdf_sha256") in pdfs:
+            by_pdf.setdefault(r["pdf_sha256"], []).append(r)
+    indexes = load_indexes({sha: pdfs[sha] for sha in by_pdf}, rebuild=rebuild)
+
+    cols: Dict[str, list] = {k: [] for k in ("article", "variant", "mode", "field", "sentence")}
+    scores, pages, passages = [], [], []
+    for sha, group in by_pdf.items():
+        index = indexes.get(sha)
+        if index is None:
+            missing.extend(r.get("article") or "?" for r in group)
+            continue
+        queries = []
+        for r in group:
+            for f in GROUNDED_FIELDS:
+                for s in sentences(str(r.get(f) or "")):
+                    queries.append(s)
+                    for k, v in (("article", r.get("article") or ""), ("variant", r.get("variant") or ""),
+                                 ("mode", r.get("mode") or ""), ("field", f), ("sentence", s)):
+                        cols[k].append(v)
+        best, where = index.score(queries)  # todas as frases do PDF, todas as variantes, de uma vez
+        scores.append(best)
+        pages.append(np.where(where >= 0, index.pages[np.maximum(where, 0)] if len(index.pages) else 0, 0))
+        passages.extend(index.passages[j][:200] if j >= 0 else "" for j in where)
+
+    score = np.concatenate(scores) if scores else np.zeros(0)
+    columns = {k: np.array(v, dtype=object) for k, v in cols.items()}
+    columns.update(score=score, flagged=score < threshold,
+                   page=np.concatenate(pages).astype(np.int32) if pages else np.zeros(0, dtype=np.int32),
+                   passage=np.array(passages, dtype=object))
+    return Grounding(columns, threshold, missing, time.perf_counter() - t0)
+
+
+def ground(threshold: float = GROUNDING_THRESHOLD, rows: Optional[List[dict]] = None,
+           rebuild: bool = False) -> Grounding:
+    """Checa os resultados mais recentes de outputs/results.jsonl (ou `rows`) contra os PDFs de PDF_DIR."""
+    from src.ledger import Ledger
+    if rows is None:
+        from src.storage import ResultsStore
+        rows = ResultsStore().latest_rows()
+    ledger = Ledger()
+    try:
+        pdfs = {ledger.hash_file(p): p for p in sorted(PDF_DIR.glob("*.pdf"))}
+    finally:
+        ledger.close()
+    result = ground_rows(rows, pdfs, threshold, rebuild)
+    info(f"{len(result)} frase(s) de {len({a for a in result.columns['article']})} artigo(s) checadas "
+         f"em {result.seconds:.1f}s; {int(result.columns['flagged'].sum())} sem suporte")
+    return result
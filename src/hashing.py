@@ -0,0 +1,26 @@
+from __future__ import annotations
+import hashlib
+from pathlib import Path
+from typing import Dict, Tuple
+
+# memo por processo: (caminho, tamanho, mtime) -> sha256
+_FILE_HASHES: Dict[Tuple[str, int, int], str] = {}
+
+def file_sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    """Hash do CONTEÚDO do arquivo (independe do nome/pasta)."""
+    path = Path(path)
+    st = path.stat()
+    key = (str(path.resolve()), st.st_size, st.st_mtime_ns)
+    cached = _FILE_HASHES.get(key)
+    if cached:
+        return cached
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            h.update(block)
+    digest = h.hexdigest()
+    _FILE_HASHES[key] = digest
+    return digest
+
+def text_sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
@@ -0,0 +1,305 @@
+# src/json_extract.py
+"""
+Extração do objeto JSON da resposta do modelo, em tempo linear.
+
+Em vez da cascata de regex (fences -> maior {...} -> linhas "k": v -> regex
+por chave com re.S), faz UMA varredura que respeita strings/escapes para achar
+todo objeto de nível superior, decodifica cada candidato com
+JSONDecoder.raw_decode e fica com o que mais bate com as chaves do
+ArticleSummary. Só se nenhum candidato decodificar é que recupera campo a
+campo, também numa passada só.
+"""
+from __future__ import annotations
+import json
+import re
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from src.prompt import SCHEMA_KEYS
+
+SUMMARY_KEYS: List[str] = [*SCHEMA_KEYS, "rationale"]
+
+_DECODER = json.JSONDecoder(strict=False)  # aceita quebras de linha cruas dentro de strings
+_STRUCT_RE = re.compile(r'[{}"\\]')
+_OBJ_START_RE = re.compile(r'\{\s*"')
+_TRAILING_COMMA_RE = re.compile(r",(\s*[}\]])")
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+
+
+def iter_object_spans(text: str) -> Iterator[Tuple[int, int]]:
+    """
+    (início, fim) de cada {...} de nível superior. Chaves dentro de strings
+    JSON não contam; fora de objetos as aspas são texto livre e são ignoradas.
+    Só visita caracteres estruturais (regex), então é linear e rápido.
+    """
+    depth = 0
+    in_str = False
+    start = 0
+    skip_to = -1  # posição logo após um escape (\x)
+    for m in _STRUCT_RE.finditer(text):
+        i = m.start()
+        if i < skip_to:
+            continue
+        ch = text[i]
+        if depth == 0:
+            if ch == "{":
+                depth, start, in_str = 1, i, False
+            continue
+        if in_str:
+            if ch == "\\":
+                skip_to = i + 2
+            elif ch == '"':
+                in_str = False
+            continue
+        if ch == '"':
+            in_str = True
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                yield start, i + 1
+
+
+def _decode_at(text: str, pos: int) -> Optional[dict]:
+    try:
+        obj, _ = _DECODER.raw_decode(text, pos)
+    except ValueError:
+        return None
+    return obj if isinstance(obj, dict) else None
+
+
+def _decode_span(span: str) -> Optional[dict]:
+    obj = _decode_at(span, 0)
+    if obj is not None:
+        return obj
+    # reparos baratos: vírgula antes de } ] e aspas “curvas” estruturais
+    fixed = _TRAILING_COMMA_RE.sub(r"\1", span)
+    obj = _decode_at(fixed, 0) if fixed != span else None
+    if obj is None:
+        obj = _decode_at(fixed.translate(_SMART_QUOTES), 0)
+    return obj
+
+
+def _score(obj: dict, keys: Sequence[str]) -> int:
+    return sum(1 for k in keys if k in obj)
+
+
+def _best(cands: List[dict], keys: Sequence[str]) -> Optional[dict]:
+    best, best_score = None, -1
+    for obj in cands:  # empate: fica o último (a resposta final costuma vir por último)
+        s = _score(obj, keys)
+        if s >= best_score:
+            best, best_score = obj, s
+    return best
+
+
+def _recover_fields(text: str, keys: Sequence[str]) -> dict:
+    """Último recurso: "chave": valor solto no texto, em uma passada só."""
+    key_re = re.compile(r'"?\b(' + "|".join(map(re.escape, keys)) + r')\b"?\s*:\s*')
+    matches = list(key_re.finditer(text))
+    out = {}
+    for n, m in enumerate(matches):
+        key = m.group(1)
+        if key in out:
+            continue
+        pos = m.end()
+        limit = matches[n + 1].start() if n + 1 < len(matches) else len(text)
+        val = None
+        if text.startswith('"', pos):
+            try:
+                val, _ = _DECODER.raw_decode(text, pos)
+            except ValueError:
+                val = None
+            if not isinstance(val, str):
+                val = None
+        if val is None:
+            chunk = text[pos:limit]
+            nl = chunk.find("\n")
+            if nl > 0 and not chunk.startswith('"'):
+                chunk = chunk[:nl]
+            val = chunk.strip().rstrip(",}").strip()
+            if len(val) >= 2 and val[0] == '"' and val[-1] == '"':
+                val = val[1:-1]
+            elif val.startswith('"'):
+                val = val[1:]
+        out[key] = val.strip() if isinstance(val, str) else val
+    return out
+
+
+def extract_json_object(text: str, keys: Sequence[str] = SUMMARY_KEYS) -> Optional[dict]:
+    """
+    Retorna o objeto (dict) que melhor corresponde a `keys`, ou None.
+    Nunca retorna string/list/etc.
+    """
+    if not text:
+        return None
+    raw = text.replace("﻿", "")
+
+    cands = []
+    for a, b in iter_object_spans(raw):
+        obj = _decode_span(raw[a:b])
+        if obj is not None:
+            cands.append(obj)
+    best = _best(cands, keys)
+    if best is not None and _score(best, keys):
+        return best
+
+    # "{" solto na prosa pode engolir o JSON de verdade: tenta cada '{"' diretamente
+    for m in _OBJ_START_RE.finditer(raw):
+        obj = _decode_at(raw, m.start())
+        if obj is not None and _score(obj, keys):
+            cands.append(obj)
+    best2 = _best(cands, keys)
+    if best2 is not None and _score(best2, keys):
+        return best2
+
+    recovered = _recover_fields(raw.translate(_SMART_QUOTES), keys)
+    if recovered:
+        return recovered
+    return best
+
+
+def extract_json_objects(text: str, keys: Sequence[str] = SUMMARY_KEYS) -> List[dict]:
+    """
+    Todos os objetos de nível superior com ao menos uma de `keys`, na ordem
+    (ex.: os itens de um array de resumos, mesmo se o array vier truncado).
+    """
+    if not text:
+        return []
+    raw = text.replace("\ufeff", "")
+    out = []
+    for a, b in iter_object_spans(raw):
+        obj = _decode_span(raw[a:b])
+        if obj is not None and _score(obj, keys):
+            out.append(obj)
+    return out
+
+
+# ---------- parser incremental (alimentado durante o streaming) ---------- #
+class IncrementalSummaryParser:
+    """
+    Recebe os deltas de texto da resposta enquanto ela é gerada e:
+      - acompanha quais campos do ArticleSummary já fecharam (self.fields);
+      - aceita o resultado no instante em que chega o '}' de um objeto com todas
+        as chaves obrigatórias e que passa em `validate` (mesmo que o modelo
+        continue escrevendo comentário depois);
+      - sinaliza cedo quando a saída claramente saiu do schema
+        (self.off_schema_reason): texto demais sem nenhum '{', chaves
+        desconhecidas, campo que deveria ser texto vindo como lista/objeto, ou
+        objeto completo que não valida.
+    """
+
+    _SCAN_RE = re.compile(r'[{}\[\]"\\,]')
+
+    def __init__(
+        self,
+        keys: Sequence[str] = SUMMARY_KEYS,
+        required: Sequence[str] = SCHEMA_KEYS,
+        validate=None,
+        max_preamble: int = 6000,
+        max_unknown_keys: int = 2,
+    ):
+        self.keys = set(keys)
+        self.required = list(required)
+        self.validate = validate
+        self.max_preamble = max_preamble
+        self.max_unknown_keys = max_unknown_keys
+        self.reset()
+
+    def reset(self) -> None:
+        self.text = ""
+        self.result: Optional[dict] = None
+        self.off_schema_reason: Optional[str] = None
+        self.fields: List[str] = []
+        self.unknown_keys: List[str] = []
+        self._pos = 0
+        self._skip_to = -1
+        self._depth = 0
+        self._in_str = False
+        self._start = 0
+        self._str_start = 0
+        self._expect_key = False
+        self._key: Optional[str] = None
+        self._seen_object = False
+
+    @property
+    def done(self) -> bool:
+        return self.result is not None or self.off_schema_reason is not None
+
+    def _flag(self, reason: str) -> None:
+        if self.off_schema_reason is None and self.result is None:
+            self.off_schema_reason = reason
+
+    def _field_done(self) -> None:
+        key = self._key
+        if key is not None and key in self.keys and key not in self.fields:
+            self.fields.append(key)
+        self._key = None
+
+    def _on_key(self, key: str) -> None:
+        self._key = key
+        if key not in self.keys:
+            self.unknown_keys.append(key)
+            if len(self.unknown_keys) > self.max_unknown_keys:
+                self._flag(f"chaves fora do schema: {', '.join(self.unknown_keys)}")
+
+    def _close_object(self, a: int, b: int) -> None:
+        obj = _decode_span(self.text[a:b])
+        if obj is None or not all(k in obj for k in self.required):
+            return  # exemplo/rascunho incompleto: continua esperando
+        if self.validate is not None:
+            try:
+                ok = self.validate(obj)
+            except Exception as e:
+                self._flag(f"objeto não passa no schema: {str(e).splitlines()[0]}")
+                return
+            if not ok:
+                self._flag("objeto não passa no schema")
+                return
+        self.result = obj
+
+    def feed(self, delta: str) -> Optional[dict]:
+        if self.done or not delta:
+            return self.result
+        self.text += delta
+        text = self.text
+        for m in self._SCAN_RE.finditer(text, self._pos):
+            i = m.start()
+            if i < self._skip_to:
+                continue
+            ch = text[i]
+            if self._depth == 0:
+                if ch == "{":
+                    self._depth, self._start, self._in_str = 1, i, False
+                    self._expect_key, self._key, self._seen_object = True, None, True
+                    self.fields, self.unknown_keys = [], []
+                continue
+            if self._in_str:
+                if ch == "\\":
+                    self._skip_to = i + 2  # pode cair no próximo delta
+                elif ch == '"':
+                    self._in_str = False
+                    if self._depth == 1 and self._expect_key:
+                        self._expect_key = False
+                        self._on_key(text[self._str_start + 1:i])
+                continue
+            if ch == '"':
+                self._in_str, self._str_start = True, i
+            elif ch in "{[":
+                if self._depth == 1 and self._key in self.keys:
+                    self._flag(f"'{self._key}' deveria ser texto, veio {'lista' if ch == '[' else 'objeto'}")
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._field_done()
+                    self._close_object(self._start, i + 1)
+            elif ch == "," and self._depth == 1:
+                self._field_done()
+                self._expect_key = True
+            if self.done:
+                break
+        self._pos = len(text)
+        if not self._seen_object and len(text) > self.max_preamble:
+            self._flag(f"{len(text)} caracteres sem nenhum objeto JSON")
+        return self.result
@@ -0,0 +1,279 @@
+# src/ledger.py
+"""
+Registro de estado (SQLite, modo WAL) que substitui outputs/sent.json.
+
+Cada item é (sha256 do PDF, variante de prompt, modo com/sem anexo), então
+mover/renomear a pasta PDF/ não reprocessa nada, e cada atualização é um
+UPDATE de uma linha (O(1)) em vez de regravar o arquivo inteiro.
+
+    status: pending -> in_flight -> done | failed
+"""
+from __future__ import annotations
+import json
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from src.config import LEDGER_DB, SENT_LOG, PDF_DIR
+from src.hashing import file_sha256
+
+PENDING = "pending"
+IN_FLIGHT = "in_flight"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    sha256      TEXT NOT NULL,
+    variant     TEXT NOT NULL,
+    mode        TEXT NOT NULL,
+    path        TEXT,
+    name        TEXT,
+    status      TEXT NOT NULL DEFAULT 'pending',
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    output_path TEXT,
+    error       TEXT,
+    created_at  TEXT NOT NULL,
+    updated_at  TEXT NOT NULL,
+    PRIMARY KEY (sha256, variant, mode)
+);
+CREATE INDEX IF NOT EXISTS items_status ON items (variant, mode, status);
+CREATE TABLE IF NOT EXISTS files (
+    path     TEXT PRIMARY KEY,
+    size     INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256   TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def read_sent_json(sent_path: Path = SENT_LOG, pdf_dir: Path = PDF_DIR) -> List[Path]:
+    """
+    PDFs listados num outputs/sent.json antigo que ainda existem. Caminhos que
+    não existem mais são procurados pelo nome em pdf_dir.
+    Um sent.json corrompido gera erro (antes virava um conjunto vazio em silêncio).
+    """
+    sent_path = Path(sent_path)
+    raw = sent_path.read_text(encoding="utf-8").strip()
+    try:
+        paths = json.loads(raw) if raw else []
+    except ValueError as e:
+        raise ValueError(f"{sent_path} está corrompido; corrija ou remova antes de continuar: {e}")
+    if not isinstance(paths, list):
+        raise ValueError(f"{sent_path}: esperado uma lista de caminhos, veio {type(paths).__name__}")
+    out = []
+    for p in paths:
+        path = Path(str(p))
+        if not path.exists():
+            path = Path(pdf_dir) / path.name
+        if path.exists():
+            out.append(path)
+    return out
+
+
+def pending_legacy(ledger: Optional["Ledger"], hash_of: Callable[[Path], str], json_dir: Path,
+                   sent_path: Path = SENT_LOG, pdf_dir: Path = PDF_DIR) -> Set[str]:
+    """
+    Hashes que import_sent_json/import_json_outputs marcariam como done, sem
+    gravar nada (ledger=None: registro ainda não existe). `plan`, `extract` e
+    `status` contam o histórico antigo; só `run` importa de verdade, na
+    variante/modo da execução.
+    """
+    def _pending(path: Path) -> bool:
+        return path.exists() and (ledger is None or not ledger.imported(path))
+
+    done: Set[str] = set()
+    sent_path, json_dir = Path(sent_path), Path(json_dir)
+    if _pending(sent_path):
+        done.update(hash_of(p) for p in read_sent_json(sent_path, pdf_dir))
+    if json_dir.is_dir() and _pending(json_dir):
+        for path in json_dir.glob("*.json"):
+            pdf = Path(pdf_dir) / f"{path.stem}.pdf"
+            if not pdf.exists():
+                continue
+            from src.schema import ArticleSummary  # pydantic só quando há o que conferir
+            try:
+                ArticleSummary(**json.loads(path.read_text(encoding="utf-8")))
+            except Exception:
+                continue  # import_json_outputs também pula
+            done.add(hash_of(pdf))
+    return done
+
+
+class Ledger:
+    def __init__(self, path: Path = LEDGER_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # autocommit: cada UPDATE já é uma transação atômica
+        self.conn = sqlite3.connect(str(self.path), isolation_level=None, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # ---------- hash dos arquivos (evita re-hash entre execuções) ----------
+    def hash_file(self, path: Path) -> str:
+        path = Path(path)
+        st = path.stat()
+        key = str(path.resolve())
+        row = self.conn.execute(
+            "SELECT size, mtime_ns, sha256 FROM files WHERE path = ?", (key,)
+        ).fetchone()
+        if row and row[0] == st.st_size and row[1] == st.st_mtime_ns:
+            return row[2]
+        sha = file_sha256(path)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO files (path, size, mtime_ns, sha256) VALUES (?, ?, ?, ?)",
+            (key, st.st_size, st.st_mtime_ns, sha),
+        )
+        return sha
+
+    # ---------- itens ----------
+    def ensure(self, sha256: str, variant: str, mode: str, path: Optional[Path] = None) -> None:
+        """Cria o item como pending (se não existir) e atualiza o caminho atual do PDF."""
+        now = _now()
+        p = str(path) if path else None
+        name = Path(path).name if path else None
+        self.conn.execute(
+            "INSERT INTO items (sha256, variant, mode, path, name, status, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (sha256, variant, mode) DO UPDATE SET "
+            "path = COALESCE(excluded.path, path), name = COALESCE(excluded.name, name)",
+            (sha256, variant, mode, p, name, PENDING, now, now),
+        )
+
+    def status(self, sha256: str, variant: str, mode: str) -> Optional[str]:
+        row = self.conn.execute(
+            "SELECT status FROM items WHERE sha256 = ? AND variant = ? AND mode = ?",
+            (sha256, variant, mode),
+        ).fetchone()
+        return row[0] if row else None
+
+    def output_path(self, sha256: str, variant: str, mode: str) -> Optional[str]:
+        row = self.conn.execute(
+            "SELECT output_path FROM items WHERE sha256 = ? AND variant = ? AND mode = ?",
+            (sha256, variant, mode),
+        ).fetchone()
+        return row[0] if row else None
+
+    def done_hashes(self, variant: str, mode: str) -> Set[str]:
+        rows = self.conn.execute(
+            "SELECT sha256 FROM items WHERE variant = ? AND mode = ? AND status = ?",
+            (variant, mode, DONE),
+        )
+        return {r[0] for r in rows}
+
+    def _set(self, sha256: str, variant: str, mode: str, sql: str, params: Iterable) -> None:
+        self.conn.execute(
+            f"UPDATE items SET {sql}, updated_at = ? WHERE sha256 = ? AND variant = ? AND mode = ?",
+            (*params, _now(), sha256, variant, mode),
+        )
+
+    def mark_in_flight(self, sha256: str, variant: str, mode: str) -> None:
+        self._set(sha256, variant, mode, "status = ?, attempts = attempts + 1, error = NULL", (IN_FLIGHT,))
+
+    def mark_done(self, sha256: str, variant: str, mode: str, output_path: Optional[Path] = None) -> None:
+        self._set(sha256, variant, mode, "status = ?, output_path = ?, error = NULL",
+                  (DONE, str(output_path) if output_path else None))
+
+    def mark_failed(self, sha256: str, variant: str, mode: str, error: str) -> None:
+        self._set(sha256, variant, mode, "status = ?, error = ?", (FAILED, (error or "")[:2000]))
+
+    def counts(self, variant: Optional[str] = None, mode: Optional[str] = None) -> Dict[str, int]:
+        sql = "SELECT status, COUNT(*) FROM items"
+        where, params = [], []
+        if variant:
+            where.append("variant = ?"); params.append(variant)
+        if mode:
+            where.append("mode = ?"); params.append(mode)
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return dict(self.conn.execute(sql + " GROUP BY status", params).fetchall())
+
+    def cell_counts(self) -> Dict[tuple, Dict[str, int]]:
+        """{(variante, modo): {status: n}} de todo o registro."""
+        out: Dict[tuple, Dict[str, int]] = {}
+        rows = self.conn.execute("SELECT variant, mode, status, COUNT(*) FROM items GROUP BY variant, mode, status")
+        for variant, mode, status, n in rows:
+            out.setdefault((variant, mode), {})[status] = n
+        return out
+
+    # ---------- migração do sent.json ----------
+    def imported(self, path: Path) -> bool:
+        """sent.json/pasta de JSONs já importados (marcador na tabela meta)?"""
+        key = f"imported:{Path(path).resolve()}"
+        return self.conn.execute("SELECT 1 FROM meta WHERE key = ?", (key,)).fetchone() is not None
+
+    def import_sent_json(self, variant: str, mode: str, sent_path: Path = SENT_LOG,
+                         pdf_dir: Path = PDF_DIR) -> Optional[int]:
+        """
+        Importa (uma única vez) os PDFs de um outputs/sent.json antigo
+        (read_sent_json) como itens 'done'.
+        Retorna quantos itens foram importados, ou None se já importado/ausente.
+        """
+        sent_path = Path(sent_path)
+        if not sent_path.exists() or self.imported(sent_path):
+            return None
+        paths = read_sent_json(sent_path, pdf_dir)
+        marker = f"imported:{sent_path.resolve()}"
+
+        imported = 0
+        self.conn.execute("BEGIN")
+        try:
+            for path in paths:
+                sha = self.hash_file(path)
+                self.ensure(sha, variant, mode, path)
+                self._set(sha, variant, mode, "status = ?", (DONE,))
+                imported += 1
+            self.conn.execute("INSERT INTO meta (key, value) VALUES (?, ?)", (marker, _now()))
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return imported
+
+    # ---------- migração dos outputs/json/*.json antigos ----------
+    def import_json_outputs(self, store, variant: str, mode: str, json_dir: Path,
+                            pdf_dir: Path = PDF_DIR) -> Optional[int]:
+        """
+        Importa (uma única vez) os JSONs soltos de execuções anteriores à base
+        consolidada (outputs/json/<stem>.json -> results.jsonl, run_id "legacy"),
+        senão o consolidado.md regerado apagaria esses resumos. O PDF é achado
+        pelo nome em pdf_dir; sem o PDF, a chave usa "legacy:<stem>" no lugar do
+        hash. Resultados já na base não são duplicados; JSON inválido é pulado.
+        Retorna quantos foram importados, ou None se já importado/ausente.
+        """
+        json_dir = Path(json_dir)
+        if not json_dir.is_dir() or self.imported(json_dir):
+            return None
+        marker = f"imported:{json_dir.resolve()}"
+        from src.schema import ArticleSummary  # pydantic só quando há o que importar
+
+        imported = 0
+        for path in sorted(json_dir.glob("*.json")):
+            try:
+                summary = ArticleSummary(**json.loads(path.read_text(encoding="utf-8")))
+            except Exception:
+                continue
+            pdf = Path(pdf_dir) / f"{path.stem}.pdf"
+            sha = self.hash_file(pdf) if pdf.exists() else f"legacy:{path.stem}"
+            if store.get(sha, variant, mode) is None:
+                store.append(summary, article=path.stem, pdf_sha256=sha, variant=variant, mode=mode,
+                             run_id="legacy", imported_from=str(path))
+                imported += 1
+            if pdf.exists() and self.status(sha, variant, mode) != DONE:
+                self.ensure(sha, variant, mode, pdf)
+                self.mark_done(sha, variant, mode, path)
+        self.conn.execute("INSERT INTO meta (key, value) VALUES (?, ?)", (marker, _now()))
+        return imported
@@ -1,13 +1,19 @@
-from rich.console import Console
-from rich.text import Text
+# rich só é importado na 1ª mensagem (comandos rápidos do run.py não pagam o import)
+_console = None
 
-_console = Console()
+def _print(msg: str, style: str):
+    global _console
+    from rich.text import Text
+    if _console is None:
+        from rich.console import Console
+        _console = Console()
+    _console.print(Text(msg, style=style))
 
 def info(msg: str):
-    _console.print(Text(msg, style="bold cyan"))
+    _print(msg, "bold cyan")
 
 def warn(msg: str):
-    _console.print(Text(msg, style="bold yellow"))
+    _print(msg, "bold yellow")
 
 def error(msg: str):
-    _console.print(Text(msg, style="bold red"))
+    _print(msg, "bold red")
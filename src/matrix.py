@@ -0,0 +1,270 @@
+# src/matrix.py
+"""
+Modo matriz (python run.py --matrix all | cot:with,zeroshot:without,...).
+
+Roda várias células (variante de prompt x modo com/sem anexo) numa única
+sessão do navegador, em vez de uma execução (e um login, e um upload de cada
+PDF) por célula:
+
+  - a ordem é por artigo: todas as células pendentes de um artigo seguidas,
+    na mesma aba; o hash e a extração do PDF são feitos uma vez;
+  - cada célula abre uma conversa nova (e as "with" anexam o PDF de novo):
+    nenhuma resposta vê o anexo ou as respostas das outras células, então a
+    comparação variante x modo (e o cache de respostas) fica igual à de
+    execuções separadas;
+  - cada (artigo, célula) é um item próprio no ledger, na base consolidada
+    (variant/mode) e em outputs/json/<variante>_<modo>/, então uma execução
+    interrompida retoma só o que falta.
+"""
+from __future__ import annotations
+import os
+import time
+from typing import Callable, List, Optional, Tuple
+
+from src.config import DEDUP, LAZY_EXTRACT, PDF_DIR, PREFETCH_AHEAD, WAIT_AFTER_SEND_SEC
+from src.log import info, warn, error
+from src.browser_utils import tab_label
+from src.chatgpt_runner import ArticleExchange
+from src.prompt_manager import DEFAULTS, for_variant
+from src.prefetch import PdfPrefetcher
+from src.dedup import link_duplicates, plan_duplicates
+from src.ledger import Ledger
+from src.metrics import ArticleTrace, bind, record
+from src.storage import ResultsStore, new_run_id
+from src.tabs import run_tabs
+from src.plan import import_legacy
+from src.session import ensure_dirs, persist, run_session
+
+Cell = Tuple[str, str]  # (variante, "with" | "without")
+MODES = ("with", "without")
+
+
+def parse_cells(spec: str) -> List[Cell]:
+    """
+    "all" -> todas as variantes x com/sem anexo; "cot" -> cot com e sem;
+    "cot:with,zeroshot:without" -> só essas, na ordem dada.
+    """
+    cells: List[Cell] = []
+    for part in (spec or "").split(","):
+        part = part.strip().lower()
+        if not part:
+            continue
+        variant, _, mode = part.partition(":")
+        variants = list(DEFAULTS) if variant in ("all", "*") else [variant]
+        modes = [mode] if mode else list(MODES)
+        for v in variants:
+            if v not in DEFAULTS:
+                raise ValueError(f"Variante desconhecida na matriz: {v!r} (use {', '.join(DEFAULTS)})")
+            for m in modes:
+                if m not in MODES:
+                    raise ValueError(f"Modo desconhecido na matriz: {m!r} (use with/without)")
+                if (v, m) not in cells:
+                    cells.append((v, m))
+    if not cells:
+        raise ValueError("Matriz vazia.")
+    return cells
+
+
+def _link_cells(store, ledger, links, hashes, cells: List[Cell], run_id: str) -> None:
+    """Duplicatas (src/dedup.py): liga o resultado do representante, célula a célula."""
+    for cell in cells if links else []:
+        try:
+            link_duplicates(store, ledger, links, hashes, *cell, run_id)
+        except Exception as e:
+            warn(f"Não consegui ligar as duplicatas em {cell[0]}/{cell[1]}: {e}")
+
+
+def _plan(max_count: Optional[int], cells: List[Cell]):
+    """(ledger, [(pdf, [células pendentes])], hashes, duplicatas) ou None se não há nada a fazer."""
+    if max_count is None:
+        max_count = int(os.environ.get("MAX_ARTIGOS_POR_EXECUCAO", "1"))
+    pdfs = sorted(PDF_DIR.glob("*.pdf"))
+    if not pdfs:
+        warn("Nenhum PDF encontrado em ./PDF — adicione arquivos e rode novamente.")
+        return None
+
+    ledger = Ledger()
+    import_legacy(ledger)
+    hashes = {p: ledger.hash_file(p) for p in pdfs}
+    done = {cell: ledger.done_hashes(*cell) for cell in cells}
+    links = {}
+    if DEDUP:
+        links = plan_duplicates(pdfs, hashes, set().union(*done.values()))
+        _link_cells(ResultsStore(), ledger, links, hashes, cells, new_run_id())
+        done = {cell: ledger.done_hashes(*cell) for cell in cells}
+    todo = []
+    for p in pdfs:
+        if p in links:
+            continue
+        pending = [c for c in cells if hashes[p] not in done[c]]
+        if pending:
+            todo.append((p, pending))
+    todo = todo[:max_count]
+    if not todo:
+        info("Nenhuma célula pendente: todos os artigos já foram concluídos em todas as células.")
+        ledger.close()
+        return None
+    for p, pending in todo:
+        for cell in pending:
+            ledger.ensure(hashes[p], *cell, p)
+    return ledger, todo, hashes, links
+
+
+def _ready_jobs(prefetch, todo, hashes, ledger, run_id: str):
+    """(pdf, sha, texto, células, segundos de extração) por artigo; sem texto -> todas as células failed."""
+    cells_of = dict(todo)
+    total = len(todo)
+    for idx, item in enumerate(prefetch, start=1):
+        pdf_path = item.pdf_path
+        sha, cells = hashes[pdf_path], cells_of[pdf_path]
+        info(f"[{idx}/{total}] {pdf_path.name} — {len(cells)} célula(s)")
+        problem = None
+        if item.error:
+            problem = f"extração: {item.error}"
+            error(f"Falha ao extrair texto de {pdf_path.name}: {item.error}")
+        elif not item.has_text:
+            problem = "sem texto extraído"
+            warn(f"Sem texto extraído — pulando: {pdf_path.name}")
+        if problem:
+            for cell in cells:
+                ledger.mark_failed(sha, *cell, problem)
+                ArticleTrace(run_id, pdf_path.stem, sha, *cell).write("failed", problem)
+            continue
+        yield pdf_path, sha, item.text, cells, item.seconds
+
+
+class CellSequence:
+    """
+    As células pendentes de UM artigo, uma depois da outra na mesma aba, com
+    a mesma interface não bloqueante do ArticleExchange (start/step), para
+    o revezamento de src/tabs.py. Cada célula é gravada/falha sozinha.
+    """
+
+    def __init__(self, page, job, ledger, run_id: str,
+                 on_cell_done: Callable, on_cell_error: Callable, *, min_gap: float = 1.0):
+        self.page = page
+        self.pdf_path, self.sha, self.text, cells, self.extract_sec = job
+        self.pending: List[Cell] = list(cells)
+        self.ledger = ledger
+        self.run_id = run_id
+        self.on_cell_done = on_cell_done
+        self.on_cell_error = on_cell_error
+        self.min_gap = min_gap
+        self.cell: Optional[Cell] = None
+        self.exchange: Optional[ArticleExchange] = None
+        self.done_cells = 0
+        self._next_at = 0.0
+
+    def _trace(self, cell: Cell) -> ArticleTrace:
+        trace = ArticleTrace(self.run_id, self.pdf_path.stem, self.sha, *cell)
+        trace.tab = tab_label(self.page)
+        if self.extract_sec is not None:
+            with bind(trace):
+                record("extract", self.extract_sec)  # extração conta uma vez, na 1ª célula
+            self.extract_sec = None
+        return trace
+
+    def _start_next(self) -> None:
+        self.cell = cell = self.pending.pop(0)
+        variant, mode = cell
+        self.ledger.mark_in_flight(self.sha, *cell)
+        info(f"   ▶ {self.pdf_path.stem} [{variant}/{mode}]")
+        self.exchange = ArticleExchange(
+            self.page,
+            file_title=self.pdf_path.stem,
+            text=self.text or "",
+            file_path=str(self.pdf_path) if mode == "with" else None,
+            trace=self._trace(cell),
+            prompts=for_variant(variant),
+            new_chat=True,
+            pdf_sha256=self.sha,
+        )
+        self.exchange.start()
+
+    def _fail(self, e: Exception) -> None:
+        self.on_cell_error(self, e)
+        self.cell, self.exchange = None, None
+        self._next_at = time.monotonic() + self.min_gap
+
+    def start(self) -> None:
+        self.step()
+
+    def step(self) -> bool:
+        """True quando todas as células do artigo terminaram (com sucesso ou não)."""
+        if self.exchange is None:
+            if not self.pending:
+                return True
+            if time.monotonic() < self._next_at:
+                return False  # respiro entre dois envios na mesma aba
+            try:
+                self._start_next()
+            except Exception as e:
+                self._fail(e)
+            return False
+        try:
+            finished = self.exchange.step()
+        except Exception as e:
+            self._fail(e)
+            return False
+        if finished:
+            self.on_cell_done(self)
+            self.done_cells += 1
+            if not self.exchange.from_cache:
+                self._next_at = time.monotonic() + self.min_gap
+            self.cell, self.exchange = None, None
+        return not self.pending and self.exchange is None
+
+
+def main(cells: List[Cell], max_count: int | None = None, rebuild_cache: bool = False, tabs: int = 1) -> None:
+    """Processa as células pendentes de até max_count artigos numa única sessão."""
+    ensure_dirs()
+    plan = _plan(max_count, cells)
+    if plan is None:
+        return
+    ledger, todo, hashes, links = plan
+
+    run_id = new_run_id()
+    store = ResultsStore()
+    tabs = max(1, min(tabs, len(todo)))
+    n_items = sum(len(c) for _, c in todo)
+    info(f"Matriz {', '.join(f'{v}/{m}' for v, m in cells)}: {len(todo)} artigo(s), "
+         f"{n_items} célula(s) pendente(s) (run {run_id}, {tabs} aba(s))...")
+
+    needs_text = any(m == "without" for _, c in todo for _, m in c)
+    full_text = needs_text or not LAZY_EXTRACT
+    gap = max(1.0, WAIT_AFTER_SEND_SEC)
+
+    def _cell_done(seq: CellSequence) -> None:
+        variant, mode = seq.cell
+        ex = seq.exchange
+        with bind(ex.trace):
+            out_path = persist(store, run_id, seq.pdf_path, seq.sha, ex.summary, ex.fill,
+                                variant, mode, f"{variant}_{mode}")
+        seq.ledger.mark_done(seq.sha, variant, mode, out_path)
+        ex.trace.write("done")
+        info(f"✅ {seq.pdf_path.name} [{variant}/{mode}] salvo")
+
+    def _cell_error(seq: CellSequence, e: Exception) -> None:
+        variant, mode = seq.cell
+        error(f"Falha em {seq.pdf_path.name} [{variant}/{mode}]: {e}")
+        seq.ledger.mark_failed(seq.sha, variant, mode, str(e))
+        if seq.exchange is not None and seq.exchange.trace is not None:
+            seq.exchange.trace.write("failed", str(e))
+
+    def _start(page, job) -> CellSequence:
+        seq = CellSequence(page, job, ledger, run_id, _cell_done, _cell_error, min_gap=gap)
+        seq.start()
+        return seq
+
+    with run_session(store, ledger, lambda: _link_cells(store, ledger, links, hashes, cells, run_id)) as session:
+        with PdfPrefetcher([p for p, _ in todo], full_text=full_text, refresh=rebuild_cache,
+                           ahead=max(tabs + 1, PREFETCH_AHEAD)) as prefetch:
+            run_tabs(
+                session.ready(tabs),
+                _ready_jobs(prefetch, todo, hashes, ledger, run_id),
+                start_job=_start,
+                on_done=lambda slot, sec: info(
+                    f"🏁 {slot.job[0].name}: {slot.exchange.done_cells}/{len(slot.job[3])} célula(s) em {sec:.0f}s"),
+                on_error=lambda slot, e: error(f"Falha inesperada em {slot.job[0].name}: {e}"),
+                min_send_gap=gap,
+            )
@@ -0,0 +1,201 @@
+# src/metrics.py
+"""
+Tempo gasto por estágio do processamento de cada artigo.
+
+Estágios (STAGES): extract (no processo da pré-extração), extract_wait (envio
+parado esperando a extração), attach (inclui upload_wait), upload_wait, fill,
+send_ready (botão enviar liberar), ttft (envio -> 1º token), generation
+(1º token -> fim; envio -> fim sem streaming), parse, fix_attempt (cada
+correção inteira), manual_pause (ENTER no terminal) e persist.
+
+Cada artigo tem um ArticleTrace; os spans entram no trace "atual" (contextvar:
+cada aba do modo multi-aba faz bind() do seu, cada tarefa async tem o seu) e
+também no acumulado do processo (stage_totals, usado pelo bench_e2e). Ao fim do
+artigo o trace vira uma linha em METRICS_PATH (JSONL, com run_id);
+`python run.py --report` resume p50/p95/máx por estágio e por variante.
+No modo lote cada artigo herda os spans do lote inteiro (batch_size = K) e a
+linha per_article do relatório divide o total por K.
+"""
+from __future__ import annotations
+import json
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.config import METRICS_PATH
+
+STAGES = [
+    "extract", "extract_wait", "attach", "upload_wait", "fill", "send_ready",
+    "ttft", "generation", "parse", "fix_attempt", "manual_pause", "persist",
+]
+
+_TOTALS: Dict[str, list] = defaultdict(lambda: [0, 0.0])  # estágio -> [n, segundos]
+
+
+class ArticleTrace:
+    """Spans de um artigo numa execução; write() grava a linha no JSONL."""
+
+    def __init__(self, run_id: str, article: str, pdf_sha256: str, variant: str, mode: str):
+        self.run_id = run_id
+        self.article = article
+        self.pdf_sha256 = pdf_sha256
+        self.variant = variant
+        self.mode = mode
+        self.tab: Optional[str] = None
+        self.attempt = 0  # 0 = prompt principal, n = n-ésima correção
+        self.batch_size = 1  # >1: spans compartilhados por um lote de artigos (BATCH_SIZE)
+        self.spans: List[dict] = []
+        self.started = time.monotonic()
+        self.started_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self.written = False
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.spans.append({"stage": stage, "sec": round(max(0.0, seconds), 4), "attempt": self.attempt})
+
+    def absorb(self, other: "ArticleTrace") -> None:
+        """Soma os spans de outro trace (o do lote) a este artigo."""
+        self.spans.extend(other.spans)
+        self.attempt = max(self.attempt, other.attempt)
+
+    def stages(self) -> Dict[str, float]:
+        out: Dict[str, float] = defaultdict(float)
+        for s in self.spans:
+            out[s["stage"]] += s["sec"]
+        return {k: round(v, 4) for k, v in out.items()}
+
+    def write(self, status: str, error: Optional[str] = None, path: Path = METRICS_PATH) -> None:
+        if self.written:
+            return
+        self.written = True
+        row = {
+            "run_id": self.run_id, "article": self.article, "pdf_sha256": self.pdf_sha256,
+            "variant": self.variant, "mode": self.mode, "tab": self.tab,
+            "status": status, "error": error, "started_at": self.started_at,
+            "total_sec": round(time.monotonic() - self.started, 4),
+            "fix_attempts": self.attempt, "batch_size": self.batch_size,
+            "stages": self.stages(), "spans": self.spans,
+        }
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        except Exception:
+            pass  # métrica nunca derruba o processamento
+
+
+_CURRENT: ContextVar[Optional[ArticleTrace]] = ContextVar("tcc_article_trace", default=None)
+
+
+def current() -> Optional[ArticleTrace]:
+    return _CURRENT.get()
+
+
+@contextmanager
+def bind(trace: Optional[ArticleTrace]):
+    """Spans registrados dentro do bloco vão para `trace`."""
+    token = _CURRENT.set(trace)
+    try:
+        yield trace
+    finally:
+        _CURRENT.reset(token)
+
+
+def record(stage: str, seconds: float) -> None:
+    """Soma ao acumulado do processo e ao trace atual (se houver)."""
+    t = _TOTALS[stage]
+    t[0] += 1
+    t[1] += max(0.0, seconds)
+    trace = _CURRENT.get()
+    if trace is not None:
+        trace.add(stage, seconds)
+
+
+@contextmanager
+def span(stage: str):
+    """with span("fill"): ...  — soma o tempo do bloco ao estágio (mesmo se levantar)."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - t0)
+
+
+def stage_totals() -> Dict[str, Tuple[int, float]]:
+    """{estágio: (ocorrências, segundos somados)} na ordem em que apareceram."""
+    return {k: (v[0], v[1]) for k, v in _TOTALS.items()}
+
+
+def reset() -> None:
+    _TOTALS.clear()
+
+
+# ---------- relatório ----------
+def load_traces(path: Path = METRICS_PATH, run_id: Optional[str] = None) -> List[dict]:
+    """Linhas do JSONL; run_id=None -> só a última execução, "all" -> todas."""
+    rows: List[dict] = []
+    if not path.exists():
+        return rows
+    for line in path.read_text(encoding="utf-8").splitlines():
+        try:
+            rows.append(json.loads(line))
+        except ValueError:
+            continue
+    if run_id == "all" or not rows:
+        return rows
+    run_id = run_id or rows[-1].get("run_id")
+    return [r for r in rows if r.get("run_id") == run_id]
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Percentil com interpolação linear (q em 0..100)."""
+    xs = sorted(values)
+    if not xs:
+        return 0.0
+    k = (len(xs) - 1) * q / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(xs) - 1)
+    return xs[lo] + (xs[hi] - xs[lo]) * (k - lo)
+
+
+def _table(rows: Iterable[dict]) -> List[str]:
+    rows = list(rows)
+    per_stage: Dict[str, List[float]] = defaultdict(list)
+    for r in rows:
+        for stage, sec in (r.get("stages") or {}).items():
+            per_stage[stage].append(sec)
+        per_stage["total"].append(r.get("total_sec") or 0.0)
+        # lote: o total é do lote inteiro; por artigo = total / K
+        per_stage["per_article"].append((r.get("total_sec") or 0.0) / max(1, r.get("batch_size") or 1))
+    extra = set(per_stage) - set(STAGES) - {"total", "per_article"}
+    order = [s for s in STAGES if s in per_stage] + sorted(extra) + ["total", "per_article"]
+    lines = [f"  {'estágio':<14}{'artigos':>8}{'p50 (s)':>10}{'p95 (s)':>10}{'máx (s)':>10}{'soma (s)':>11}"]
+    for stage in order:
+        xs = per_stage[stage]
+        lines.append(f"  {stage:<14}{len(xs):>8}{percentile(xs, 50):>10.2f}{percentile(xs, 95):>10.2f}"
+                     f"{max(xs):>10.2f}{sum(xs):>11.1f}")
+    return lines
+
+
+def report(run_id: Optional[str] = None, path: Path = METRICS_PATH) -> None:
+    """Imprime p50/p95/máx por estágio: geral e por variante/modo."""
+    rows = load_traces(path, run_id)
+    if not rows:
+        print(f"Sem métricas em {path}.")
+        return
+    runs = sorted({r.get("run_id") for r in rows})
+    ok = sum(1 for r in rows if r.get("status") == "done")
+    fixes = sum(r.get("fix_attempts") or 0 for r in rows)
+    print(f"Execução(ões): {', '.join(runs)} — {len(rows)} artigo(s), {ok} concluído(s), {fixes} correção(ões)\n")
+    print("Todos:")
+    print("\n".join(_table(rows)))
+    groups: Dict[Tuple[str, str, int], List[dict]] = defaultdict(list)
+    for r in rows:
+        groups[(r.get("variant"), r.get("mode"), r.get("batch_size") or 1)].append(r)
+    if len(groups) > 1:
+        for (variant, mode, k), items in sorted(groups.items()):
+            print(f"\n{variant} / {mode}{f' / lote de {k}' if k > 1 else ''}:")
+            print("\n".join(_table(items)))
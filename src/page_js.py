@@ -0,0 +1,40 @@
+# src/page_js.py
+"""
+Trechos de JavaScript injetados na página do chat.
+
+JS_HELPERS define __tccQ(sel), que entende os seletores de src/selectors.py
+(CSS puro e a pseudo-classe do Playwright ":has-text('...')"), e
+__tccVisible(el). Deve ser concatenado no início de cada função injetada.
+"""
+from __future__ import annotations
+import json
+from typing import Sequence
+
+JS_HELPERS = r"""
+const __tccQ = (sel) => {
+  const m = sel.match(/^(.*?):has-text\((['"])(.*)\2\)$/);
+  if (!m) {
+    try { return Array.from(document.querySelectorAll(sel)); } catch (e) { return []; }
+  }
+  const needle = m[3].toLowerCase();
+  let base;
+  try { base = document.querySelectorAll(m[1] || '*'); } catch (e) { return []; }
+  return Array.from(base).filter(
+    (el) => (el.textContent || '').replace(/\s+/g, ' ').toLowerCase().includes(needle)
+  );
+};
+const __tccQAny = (sels) => {
+  for (const s of sels) { const r = __tccQ(s); if (r.length) return r; }
+  return [];
+};
+const __tccVisible = (el) => {
+  if (!el) return false;
+  if (!(el.offsetWidth || el.offsetHeight || el.getClientRects().length)) return false;
+  const st = getComputedStyle(el);
+  return st.visibility !== 'hidden' && st.display !== 'none';
+};
+"""
+
+def js_list(items: Sequence[str]) -> str:
+    """Lista Python -> literal JS (para embutir seletores nos scripts)."""
+    return json.dumps(list(items), ensure_ascii=False)
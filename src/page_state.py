@@ -0,0 +1,131 @@
+# src/page_state.py
+"""
+Retrato do estado da página do chat em UM page.evaluate.
+
+Os loops de espera perguntavam, a cada volta, várias coisas separadas
+(verificação humana, overlays, upload, botão enviar, Stop, nº de respostas),
+cada uma com vários count()/is_visible() — dezenas de mensagens CDP por volta.
+Aqui uma função JS injetada responde tudo de uma vez e devolve um
+PageSnapshot tipado.
+"""
+from __future__ import annotations
+from dataclasses import dataclass, fields
+from typing import Optional
+
+from src.page_js import JS_HELPERS, js_list
+from src.selectors import (
+    ASSISTANT_MESSAGES,
+    COMPOSER_VISIBLE,
+    FILE_PREVIEWS,
+    OVERLAY_BUTTONS,
+    SEND_BUTTONS,
+    STOP_BUTTONS,
+    UPLOAD_DONE_HINTS,
+    UPLOAD_IN_PROGRESS,
+)
+
+HUMAN_CHECK_FRAMES = [
+    "iframe[src*='hcaptcha.com']",
+    "iframe[src*='challenges.cloudflare.com']",
+    "iframe[title*='challenge']",
+]
+HUMAN_CHECK_TEXTS = [
+    "Verify you are human",
+    "Verifique se você é humano",
+    "I am human",
+    "Sou humano",
+    "Please stand by, while we are checking your browser",
+    "Checking if the site connection is secure",
+]
+
+_SNAPSHOT_BODY = r"""
+  const body = document.body;
+  const bodyText = body ? (body.textContent || '').replace(/\s+/g, ' ').toLowerCase() : '';
+  // ":has-text" percorre o DOM todo; se o texto nem existe na página, nem tenta
+  const has = (sel) => {
+    const m = sel.match(/:has-text\((['"])(.*)\1\)$/);
+    if (m && !bodyText.includes(m[2].toLowerCase())) return [];
+    return __tccQ(sel);
+  };
+  const any = (sels) => sels.some((s) => has(s).length > 0);
+  const anyVisible = (sels) => sels.some((s) => has(s).some(__tccVisible));
+  const firstVisible = (sels) => {
+    for (const s of sels) { const el = has(s).find(__tccVisible); if (el) return el; }
+    return null;
+  };
+
+  const editor = anyVisible(%(composer)s);
+  const send = firstVisible(%(send)s);
+  const sendEnabled = !!send && !send.disabled && send.getAttribute('disabled') === null
+    && !['true', '1'].includes((send.getAttribute('aria-disabled') || '').toLowerCase());
+  const msgs = document.querySelectorAll(%(msgs)s.join(', '));
+  const last = msgs.length ? msgs[msgs.length - 1] : null;
+  // texto de desafio só é procurado sem editor (páginas de verificação são pequenas)
+  const human = any(%(frames)s)
+    || (!editor && %(texts)s.some((t) => bodyText.includes(t.toLowerCase())));
+
+  return {
+    human_check: human,
+    overlay: anyVisible(%(overlay)s),
+    editor_visible: editor,
+    uploading: any(%(uploading)s),
+    upload_done: any(%(upload_done)s),
+    preview: (!!filename && bodyText.includes(filename.toLowerCase())) || any(%(previews)s),
+    send_visible: !!send,
+    send_enabled: sendEnabled,
+    stop: anyVisible(%(stop)s),
+    assistant_count: msgs.length,
+    last_text_len: last ? (last.textContent || '').length : 0,
+  };
+""" % {
+    "composer": js_list(COMPOSER_VISIBLE),
+    "send": js_list(SEND_BUTTONS),
+    "msgs": js_list(ASSISTANT_MESSAGES),
+    "frames": js_list(HUMAN_CHECK_FRAMES),
+    "texts": js_list(HUMAN_CHECK_TEXTS),
+    "overlay": js_list(OVERLAY_BUTTONS),
+    "uploading": js_list(UPLOAD_IN_PROGRESS),
+    "upload_done": js_list(UPLOAD_DONE_HINTS),
+    "previews": js_list(FILE_PREVIEWS),
+    "stop": js_list(STOP_BUTTONS),
+}
+
+SNAPSHOT_JS = "(filename) => {" + JS_HELPERS + _SNAPSHOT_BODY + "}"
+
+
+@dataclass(frozen=True)
+class PageSnapshot:
+    human_check: bool = False
+    overlay: bool = False
+    editor_visible: bool = False
+    uploading: bool = False
+    upload_done: bool = False
+    preview: bool = False
+    send_visible: bool = False
+    send_enabled: bool = False
+    stop: bool = False
+    assistant_count: int = 0
+    last_text_len: int = 0
+    ok: bool = True  # False = evaluate falhou (navegação em curso etc.)
+
+    # retrato que falhou não responde "sim": quem chama continua consultando
+    @property
+    def ready_to_send(self) -> bool:
+        return self.ok and self.send_enabled and not self.uploading
+
+    @property
+    def upload_finished(self) -> bool:
+        return self.ok and (not self.uploading or self.upload_done)
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "PageSnapshot":
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in d.items() if k in names})
+
+
+def snapshot(page, filename: Optional[str] = None) -> PageSnapshot:
+    """Estado da página em uma única chamada ao navegador."""
+    try:
+        return PageSnapshot.from_dict(page.evaluate(SNAPSHOT_JS, filename or ""))
+    except Exception:
+        return PageSnapshot(ok=False)
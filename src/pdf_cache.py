@@ -0,0 +1,123 @@
+# src/pdf_cache.py
+from __future__ import annotations
+import json
+import os
+from pathlib import Path
+from typing import List, Optional
+
+from src.config import PDF_CACHE_DIR, PDF_CACHE_MAX_MB, PDF_CACHE_ENABLED
+
+
+class PdfTextCache:
+    """
+    Cache em disco do texto extraído, POR PÁGINA, endereçado pelo conteúdo:
+        <dir>/<sha256>-<extractor>.json
+    Como guarda páginas (e não o texto já truncado), mudar TEXT_MAX_CHARS ou a
+    variante de prompt não invalida nada. Páginas ainda não lidas ficam como null.
+
+    Evicção LRU por tamanho: cada leitura "toca" o arquivo (mtime) e, ao passar
+    de max_bytes, os menos usados recentemente são apagados.
+    """
+
+    def __init__(self, root: Path = PDF_CACHE_DIR, max_bytes: Optional[int] = None):
+        self.root = Path(root)
+        self.max_bytes = int(PDF_CACHE_MAX_MB * 1024 * 1024) if max_bytes is None else max_bytes
+        self._total: Optional[int] = None  # calculado na 1ª escrita
+
+    def _path(self, sha256: str, extractor: str) -> Path:
+        return self.root / f"{sha256}-{extractor}.json"
+
+    def get(self, sha256: str, extractor: str) -> Optional[dict]:
+        path = self._path(sha256, extractor)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if not isinstance(entry, dict) or not isinstance(entry.get("pages"), list):
+            return None
+        try:
+            os.utime(path)  # marca como usado recentemente (LRU)
+        except OSError:
+            pass
+        return entry
+
+    def put(self, sha256: str, extractor: str, page_count: int, pages: List[Optional[str]]) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self._path(sha256, extractor)
+        data = json.dumps(
+            {"sha256": sha256, "extractor": extractor, "page_count": page_count, "pages": pages},
+            ensure_ascii=False,
+        )
+        old_size = path.stat().st_size if path.exists() else 0
+        # escrita atômica: vários processos de pré-extração podem escrever ao mesmo tempo
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(data, encoding="utf-8")
+        os.replace(tmp, path)
+
+        if self._total is None:
+            self._total = self.size_bytes()
+        else:
+            self._total += path.stat().st_size - old_size
+        if self._total > self.max_bytes:
+            self.evict()
+
+    def _entries(self) -> List[Path]:
+        if not self.root.exists():
+            return []
+        return list(self.root.glob("*.json"))
+
+    def size_bytes(self) -> int:
+        total = 0
+        for p in self._entries():
+            try:
+                total += p.stat().st_size
+            except OSError:
+                pass
+        return total
+
+    def evict(self) -> int:
+        """Apaga as entradas menos usadas até caber em max_bytes. Retorna quantas apagou."""
+        stats = []
+        for p in self._entries():
+            try:
+                st = p.stat()
+                stats.append((st.st_mtime, st.st_size, p))
+            except OSError:
+                pass
+        stats.sort()
+        total = sum(size for _, size, _ in stats)
+        removed = 0
+        for _, size, p in stats:
+            if total <= self.max_bytes:
+                break
+            try:
+                p.unlink()
+                removed += 1
+            except OSError:
+                pass
+            total -= size
+        self._total = total
+        return removed
+
+    def clear(self) -> int:
+        removed = 0
+        for p in self._entries():
+            try:
+                p.unlink()
+                removed += 1
+            except OSError:
+                pass
+        self._total = 0
+        return removed
+
+
+_CACHE: Optional[PdfTextCache] = None
+
+def get_cache() -> Optional[PdfTextCache]:
+    """Cache compartilhado do processo (None se desativado via PDF_CACHE=0)."""
+    global _CACHE
+    if not PDF_CACHE_ENABLED:
+        return None
+    if _CACHE is None:
+        _CACHE = PdfTextCache()
+    return _CACHE
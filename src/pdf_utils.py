@@ -1,15 +1,229 @@
-from PyPDF2 import PdfReader
+import re
+from dataclasses import dataclass
 from pathlib import Path
-from src.config import TEXT_MAX_CHARS
+from typing import Iterator, List, Optional, Tuple
+from src.config import TEXT_MAX_CHARS, PAGE_POLICY, PDF_EXTRACTOR_FALLBACK, COMPACT_TEXT, COMPACT_READ_CHARS
+from src.extractors import Extractor, extractor_chain
+from src.hashing import file_sha256
+from src.pdf_cache import get_cache
+from src.text_compact import compact_text
 
-def extract_text_from_pdf(pdf_path: Path) -> str:
-    reader = PdfReader(str(pdf_path))
-    text_parts = []
-    for page in reader.pages:
+
+class _PageSource:
+    """
+    Lê páginas do PDF passando pelo cache (hash do conteúdo + chave do extrator).
+    O documento só é aberto pelo backend se alguma página pedida não estiver no cache.
+    """
+
+    def __init__(self, pdf_path: Path, extractor: Extractor, refresh: bool = False):
+        self.pdf_path = Path(pdf_path)
+        self.extractor = extractor
+        self._cache = get_cache()
+        self._doc = None
+        self._dirty = False
+        self._page_count: Optional[int] = None
+        self._pages: List[Optional[str]] = []
+        self.sha256 = file_sha256(self.pdf_path) if self._cache else ""
+
+        entry = self._cache.get(self.sha256, extractor.key) if (self._cache and not refresh) else None
+        if entry:
+            self._page_count = entry.get("page_count")
+            self._pages = list(entry["pages"])
+
+    def _open(self):
+        if self._doc is None:
+            self._doc = self.extractor.open(self.pdf_path)
+        return self._doc
+
+    @property
+    def page_count(self) -> int:
+        if self._page_count is None:
+            self._page_count = self._open().page_count
+            self._pages = [None] * self._page_count
+            self._dirty = True
+        return self._page_count
+
+    def page_text(self, idx: int) -> str:
+        if idx >= self.page_count:
+            return ""
+        text = self._pages[idx]
+        if text is None:
+            try:
+                text = self._open().page_text(idx) or ""
+            except Exception:
+                text = ""
+            self._pages[idx] = text
+            self._dirty = True
+        return text
+
+    def close(self) -> None:
+        if self._doc is not None:
+            try:
+                self._doc.close()
+            except Exception:
+                pass
+            self._doc = None
+        if self._dirty and self._cache:
+            try:
+                self._cache.put(self.sha256, self.extractor.key, self.page_count, self._pages)
+            except OSError:
+                pass
+        self._dirty = False
+
+
+# ---------- política de páginas ---------- #
+@dataclass(frozen=True)
+class PagePolicy:
+    first: Optional[int] = None   # só as N primeiras páginas (None = todas)
+    last: int = 0                 # + as M últimas (com first)
+    skip_appendix: bool = False   # para em References/Appendix
+
+def parse_page_policy(spec: str) -> PagePolicy:
+    """Ex.: "all", "first:10", "firstlast:8:2", "noappendix", "first:12,noappendix"."""
+    first, last, skip = None, 0, False
+    for part in (spec or "all").replace(" ", "").lower().split(","):
+        if not part or part == "all":
+            continue
+        bits = part.split(":")
+        if bits[0] == "first" and len(bits) == 2:
+            first = int(bits[1])
+        elif bits[0] == "firstlast" and len(bits) == 3:
+            first, last = int(bits[1]), int(bits[2])
+        elif bits[0] in ("noappendix", "skip-appendix"):
+            skip = True
+        else:
+            raise ValueError(f"PAGE_POLICY inválida: {part!r}")
+    return PagePolicy(first=first, last=last, skip_appendix=skip)
+
+def select_pages(page_count: int, policy: PagePolicy) -> List[int]:
+    if policy.first is None or policy.first + policy.last >= page_count:
+        return list(range(page_count))
+    head = list(range(policy.first))
+    tail = list(range(max(policy.first, page_count - policy.last), page_count))
+    return head + tail
+
+# Títulos (linha inteira) que marcam o fim do conteúdo útil: referências/apêndices
+_BACK_MATTER_RE = re.compile(
+    r"^[ \t]*(?:\d+\.?[ \t]+)?"
+    r"(?:References|REFERENCES|Bibliography|BIBLIOGRAPHY|Referências|REFERÊNCIAS"
+    r"|Referências Bibliográficas|REFERÊNCIAS BIBLIOGRÁFICAS)[ \t]*:?[ \t]*$"
+    r"|^[ \t]*(?:Appendix|APPENDIX|Appendices|APPENDICES|Apêndice|APÊNDICE|Anexo|ANEXO)"
+    r"(?:[ \t]+[A-Z0-9]{1,3})?[ \t]*(?:[.:\u2013\u2014-][^\n]{0,80})?$",
+    re.M,
+)
+
+def _cut_back_matter(text: str) -> Tuple[str, bool]:
+    m = _BACK_MATTER_RE.search(text)
+    if not m:
+        return text, False
+    return text[:m.start()], True
+
+DEFAULT_POLICY = parse_page_policy(PAGE_POLICY)
+
+
+# ---------- extração ---------- #
+def _iter_pages_with(
+    pdf_path: Path, extractor: Extractor, policy: PagePolicy, refresh: bool
+) -> Iterator[Tuple[int, str]]:
+    src = _PageSource(pdf_path, extractor, refresh=refresh)
+    try:
+        for idx in select_pages(src.page_count, policy):
+            text = src.page_text(idx)
+            if policy.skip_appendix:
+                text, stop = _cut_back_matter(text)
+                if stop:
+                    if text.strip():
+                        yield idx, text
+                    return
+            yield idx, text
+    finally:
+        src.close()
+
+def iter_pages(
+    pdf_path: Path,
+    policy: Optional[PagePolicy] = None,
+    refresh: bool = False,
+    extractor: Optional[str] = None,
+) -> Iterator[Tuple[int, str]]:
+    """
+    Gera (índice, texto) página a página, na ordem da política.
+    Quem consome pode parar a qualquer momento: páginas não pedidas nunca são
+    parseadas, e as já lidas vão para o cache ao fechar o gerador.
+
+    Fallback por documento: enquanto só vierem páginas vazias elas ficam
+    retidas; se o backend principal terminar (ou falhar) sem nenhum texto,
+    o próximo backend disponível é tentado.
+    """
+    policy = policy or DEFAULT_POLICY
+    chain = extractor_chain(extractor)
+    if not PDF_EXTRACTOR_FALLBACK:
+        chain = chain[:1]
+
+    first_empty: Optional[List[Tuple[int, str]]] = None
+    last_err: Optional[Exception] = None
+    for ext in chain:
+        held: List[Tuple[int, str]] = []
+        got_text = False
+        pages = _iter_pages_with(pdf_path, ext, policy, refresh)
         try:
-            page_text = page.extract_text() or ""
-        except Exception:
-            page_text = ""
-        text_parts.append(page_text)
-    full_text = "\n".join(text_parts)
-    return full_text[:TEXT_MAX_CHARS]
+            for idx, text in pages:
+                if got_text:
+                    yield idx, text
+                elif text.strip():
+                    got_text = True
+                    yield from held
+                    yield idx, text
+                else:
+                    held.append((idx, text))
+        except Exception as e:  # backend não abriu o arquivo: tenta o próximo
+            last_err = e
+            continue
+        finally:
+            pages.close()
+        if got_text:
+            return
+        if first_empty is None:
+            first_empty = held
+    if first_empty is None and last_err is not None:
+        raise last_err
+    yield from first_empty or []
+
+def extract_pages(pdf_path: Path, refresh: bool = False) -> List[str]:
+    """Texto de todas as páginas (do cache quando possível)."""
+    return [text for _, text in iter_pages(pdf_path, PagePolicy(), refresh=refresh)]
+
+def extract_text_from_pdf(
+    pdf_path: Path,
+    refresh: bool = False,
+    max_chars: int = TEXT_MAX_CHARS,
+    policy: Optional[PagePolicy] = None,
+    compact: Optional[bool] = None,
+) -> str:
+    """
+    Junta páginas até encher o orçamento de caracteres e PARA (não lê o resto).
+    Com compactação lê até COMPACT_READ_CHARS e reparte max_chars entre as seções.
+    """
+    compact = COMPACT_TEXT if compact is None else compact
+    budget = max(max_chars, COMPACT_READ_CHARS) if compact else max_chars
+    parts: List[str] = []
+    used = 0
+    pages = iter_pages(pdf_path, policy=policy, refresh=refresh)
+    try:
+        for _, page_text in pages:
+            parts.append(page_text)
+            used += len(page_text) + 1  # + "\n" do join
+            if used >= budget:
+                break
+    finally:
+        pages.close()
+    if compact:
+        return compact_text(parts, max_chars)
+    return "\n".join(parts)[:max_chars]
+
+def has_extractable_text(pdf_path: Path, refresh: bool = False) -> bool:
+    """Checagem barata: para na primeira página que tiver texto."""
+    pages = iter_pages(pdf_path, PagePolicy(), refresh=refresh)
+    try:
+        return any(text.strip() for _, text in pages)
+    finally:
+        pages.close()
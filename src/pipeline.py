@@ -1,126 +1,225 @@
 # src/pipeline.py
 from __future__ import annotations
-import os
 import time
-from pathlib import Path
 
 from src.config import (
-    BASE_DIR,
-    PDF_DIR,
     WAIT_AFTER_SEND_SEC,
+    ATTACH_PDF,
+    LAZY_EXTRACT,
+    PROMPT_VARIANT,
+    PROMPT_MODE,
+    PREFETCH_AHEAD,
+    BATCH_SIZE,
 )
 from src.log import info, warn, error
-from src.browser_utils import (
-    launch_browser,
-    open_chat_home,
-    pause_until_ready_manual,
-    ensure_ready,
-    human_idle_long,
-)
+from src.browser_utils import tab_label
 from src.pdf_utils import extract_text_from_pdf
-from src.storage import (
-    load_sent_files,
-    save_sent_files,
-    save_article_json,
-    append_to_md,
-)
-from src.chatgpt_runner import send_prompt_and_get_json
-
-
-# ---------- util ----------
-def _ensure_dirs() -> None:
-    """Garante a estrutura mínima de pastas do projeto."""
-    (BASE_DIR / "PDF").mkdir(parents=True, exist_ok=True)
-    (BASE_DIR / "outputs" / "json").mkdir(parents=True, exist_ok=True)
-    (BASE_DIR / "outputs" / "debug").mkdir(parents=True, exist_ok=True)
+from src.prefetch import PdfPrefetcher
+from src.storage import ResultsStore, new_run_id
+from src.chatgpt_runner import ArticleExchange
+from src.batch import BatchExchange, BatchItem
+from src.tabs import run_tabs
+from src.metrics import ArticleTrace, bind, record, span
+from src.plan import link_dups, plan
+from src.session import ensure_dirs, persist, run_session
 
 
-def _wait_for_login_ready(page) -> None:
-    """Abre o ChatGPT e BLOQUEIA até você concluir login/captcha e o input aparecer."""
-    open_chat_home(page)
-    pause_until_ready_manual(page, reason="login/captcha pendente")
+def _ready_jobs(prefetch, hashes, ledger, total: int, run_id: str):
+    """
+    Itens da pré-extração prontos para envio: (pdf, sha, texto, trace).
+    Os sem texto já saem como failed (e com a linha de métricas gravada).
+    """
+    items = iter(prefetch)
+    idx = 0
+    while True:
+        t0 = time.perf_counter()
+        item = next(items, None)
+        waited = time.perf_counter() - t0  # só o tempo em que o envio ficou esperando a extração
+        if item is None:
+            return
+        idx += 1
+        pdf_path = item.pdf_path
+        sha = hashes[pdf_path]
+        info(f"[{idx}/{total}] {pdf_path.name}")
+        trace = ArticleTrace(run_id, pdf_path.stem, sha, PROMPT_VARIANT, PROMPT_MODE)
+        with bind(trace):
+            record("extract", item.seconds)
+            record("extract_wait", waited)
+
+        if item.error:
+            error(f"Falha ao extrair texto de {pdf_path.name}: {item.error}")
+            ledger.mark_failed(sha, PROMPT_VARIANT, PROMPT_MODE, f"extração: {item.error}")
+            trace.write("failed", f"extração: {item.error}")
+            continue
+        # fallback se algum PDF vier sem texto
+        if not item.has_text:
+            warn(f"Sem texto extraído — pulando: {pdf_path.name}")
+            ledger.mark_failed(sha, PROMPT_VARIANT, PROMPT_MODE, "sem texto extraído")
+            trace.write("failed", "sem texto extraído")
+            continue
+
+        text = item.text
+        if text is None and not ATTACH_PDF:
+            with bind(trace), span("extract"):
+                text = extract_text_from_pdf(pdf_path)
+        yield pdf_path, sha, text, trace
+
+
+def _start_exchange(ledger, page, job) -> ArticleExchange:
+    """Marca in_flight e envia o prompt (com anexo ou texto colado)."""
+    pdf_path, sha, text, trace = job
+    ledger.mark_in_flight(sha, PROMPT_VARIANT, PROMPT_MODE)
+    trace.tab = tab_label(page)
+    ex = ArticleExchange(
+        page,
+        file_title=pdf_path.stem,
+        text=text or "",
+        file_path=str(pdf_path) if ATTACH_PDF else None,
+        trace=trace,
+        pdf_sha256=sha,
+    )
+    # garante que não há captcha/overlay antes de enviar (dentro de start)
+    ex.start()
+    return ex
+
+
+def _save_result(store, ledger, run_id: str, job, ex: ArticleExchange, tag: str = "") -> None:
+    pdf_path, sha, _, trace = job
+    # persistência: JSON individual + linha na base consolidada
+    with bind(trace):
+        out_path = persist(store, run_id, pdf_path, sha, ex.summary, ex.fill)
+    info(f"✅{tag} Salvo JSON e consolidado para {pdf_path.name}")
+    # marca como concluído (uma linha no SQLite, tolerante a falhas)
+    ledger.mark_done(sha, PROMPT_VARIANT, PROMPT_MODE, out_path)
+    trace.write("done")
+
+
+def _fail_result(ledger, job, e: Exception, tag: str = "") -> None:
+    pdf_path, sha, _, trace = job
+    error(f"Falha ao obter/validar JSON para {pdf_path.name}{tag}: {e}")
+    ledger.mark_failed(sha, PROMPT_VARIANT, PROMPT_MODE, str(e))
+    trace.write("failed", str(e))
+
+
+# ---------- lote (BATCH_SIZE > 1) ----------
+def _batched(jobs, size: int):
+    """Agrupa os jobs em listas de até `size` (o último lote pode ser menor)."""
+    batch = []
+    for job in jobs:
+        batch.append(job)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _start_batch(ledger, page, batch, run_id: str) -> BatchExchange:
+    """Marca os K in_flight e envia o lote; os spans do envio vão para um trace do lote."""
+    trace = ArticleTrace(run_id, "+".join(j[0].stem for j in batch), "", PROMPT_VARIANT, PROMPT_MODE)
+    trace.tab = tab_label(page)
+    items = []
+    for pdf_path, sha, text, job_trace in batch:
+        ledger.mark_in_flight(sha, PROMPT_VARIANT, PROMPT_MODE)
+        job_trace.tab = trace.tab
+        items.append(BatchItem(pdf_path.stem, text or "", str(pdf_path) if ATTACH_PDF else None))
+    ex = BatchExchange(page, items, trace=trace)
+    ex.start()
+    return ex
+
+
+def _save_batch(store, ledger, run_id: str, batch, ex: BatchExchange, tag: str = "") -> None:
+    """Grava cada artigo do lote: os que vieram válidos como done, os que faltaram como failed."""
+    ok = 0
+    for pdf_path, sha, _, trace in batch:
+        trace.absorb(ex.trace)  # spans do lote (anexo, envio, geração...) valem para cada artigo
+        trace.batch_size = len(batch)
+        summary = ex.results.get(pdf_path.stem)
+        if summary is None:
+            reason = ex.errors.get(pdf_path.stem, "faltou na resposta do lote")
+            error(f"Falha ao obter/validar JSON para {pdf_path.name}{tag}: {reason}")
+            ledger.mark_failed(sha, PROMPT_VARIANT, PROMPT_MODE, reason)
+            trace.write("failed", reason)
+            continue
+        with bind(trace):
+            out_path = persist(store, run_id, pdf_path, sha, summary, ex.fill, batch_size=len(batch))
+        ledger.mark_done(sha, PROMPT_VARIANT, PROMPT_MODE, out_path)
+        trace.write("done")
+        ok += 1
+    info(f"✅{tag} Lote de {len(batch)}: {ok} salvo(s)")
+
+
+def _fail_batch(ledger, batch, e: Exception, tag: str = "") -> None:
+    for job in batch:
+        _fail_result(ledger, job, e, tag)
 
 
 # ---------- pipeline ----------
-def main(max_count: int | None = None) -> None:
+def main(max_count: int | None = None, rebuild_cache: bool = False, tabs: int = 1) -> None:
     """
     Executa o processamento:
       - escolhe até 'max_count' PDFs ainda não enviados
       - para cada PDF: anexa, envia prompt, espera resposta, salva JSON/MD e marca como enviado.
+    rebuild_cache=True ignora o cache de texto extraído e reextrai os PDFs da rodada.
+    tabs > 1 processa vários artigos ao mesmo tempo, um por aba (ver src/tabs.py).
     """
-    _ensure_dirs()
-
-    # resolve max_count: CLI (--count) > ENV > default(1)
-    if max_count is None:
-        max_count = int(os.environ.get("MAX_ARTIGOS_POR_EXECUCAO", "1"))
-
-    # coleta PDFs
-    pdfs = sorted(PDF_DIR.glob("*.pdf"))
-    if not pdfs:
-        warn("Nenhum PDF encontrado em ./PDF — adicione arquivos e rode novamente.")
-        return
+    ensure_dirs()
 
-    # filtra os que faltam (com base no sent.json)
-    sent = load_sent_files()
-    todo = [p for p in pdfs if str(p) not in sent][:max_count]
-    if not todo:
-        info("Nenhum PDF novo para processar (todos já estão em outputs/sent.json).")
+    planned = plan(max_count)
+    if planned is None:
         return
-
-    info(f"Processando {len(todo)} arquivo(s) nesta execução...")
-
-    # 1 navegador/ sessão para toda a rodada
-    pw, browser, page = launch_browser()
-    try:
-        _wait_for_login_ready(page)
-
-        for idx, pdf_path in enumerate(todo, start=1):
-            info(f"[{idx}/{len(todo)}] {pdf_path.name}")
-
-            # extrai texto (fallback se algum PDF vier sem texto)
-            text = extract_text_from_pdf(pdf_path)
-            if not text.strip():
-                warn(f"Sem texto extraído — pulando: {pdf_path.name}")
-                continue
-
-            try:
-                # garante que não há captcha/overlay antes de enviar
-                ensure_ready(page)
-
-                # envia (com anexo) e valida schema internamente
-                summary = send_prompt_and_get_json(
-                    page=page,
-                    file_title=pdf_path.stem,
-                    text=text,
-                    file_path=str(pdf_path),
+    ledger, todo, hashes, links = planned
+
+    run_id = new_run_id()
+    store = ResultsStore()
+    tabs = max(1, min(tabs, len(todo)))
+    info(f"Processando {len(todo)} arquivo(s) nesta execução (run {run_id}, {tabs} aba(s))...")
+
+    # com anexo (e modo preguiçoso) o texto completo não é necessário: só checa se há texto
+    full_text = (not ATTACH_PDF) or (not LAZY_EXTRACT)
+
+    with run_session(store, ledger, lambda: link_dups(store, ledger, links, hashes, run_id)) as session:
+        # a pré-extração já começa durante o login manual
+        with PdfPrefetcher(todo, full_text=full_text, refresh=rebuild_cache,
+                           ahead=max(tabs + 1, PREFETCH_AHEAD)) as prefetch:
+            pages = session.ready(tabs)
+            jobs = _ready_jobs(prefetch, hashes, ledger, len(todo), run_id)
+
+            if BATCH_SIZE > 1:
+                # K artigos por mensagem; com --tabs, um lote por aba
+                run_tabs(
+                    pages,
+                    _batched(jobs, BATCH_SIZE),
+                    start_job=lambda pg, batch: _start_batch(ledger, pg, batch, run_id),
+                    on_done=lambda slot, sec: _save_batch(
+                        store, ledger, run_id, slot.job, slot.exchange, f" [{slot.label}, {sec:.0f}s]"),
+                    on_error=lambda slot, e: _fail_batch(ledger, slot.job, e, f" [{slot.label}]"),
+                    min_send_gap=max(1.0, WAIT_AFTER_SEND_SEC),
+                )
+            elif tabs == 1:
+                for job in jobs:
+                    try:
+                        ex = _start_exchange(ledger, session.page, job)
+                        ex.wait()
+                    except Exception as e:
+                        _fail_result(ledger, job, e)
+                        continue
+                    _save_result(store, ledger, run_id, job, ex)
+
+                    # respiro entre mensagens (evita bloqueios/limites); resposta do cache não enviou nada
+                    if not ex.from_cache:
+                        time.sleep(max(1.0, WAIT_AFTER_SEND_SEC))
+            else:
+                # mesma sessão (login do contexto persistente), uma conversa por aba
+                run_tabs(
+                    pages,
+                    jobs,
+                    start_job=lambda pg, job: _start_exchange(ledger, pg, job),
+                    on_done=lambda slot, sec: _save_result(
+                        store, ledger, run_id, slot.job, slot.exchange, f" [{slot.label}, {sec:.0f}s]"),
+                    on_error=lambda slot, e: _fail_result(ledger, slot.job, e, f" [{slot.label}]"),
+                    min_send_gap=max(1.0, WAIT_AFTER_SEND_SEC),
                 )
-            except Exception as e:
-                error(f"Falha ao obter/validar JSON para {pdf_path.name}: {e}")
-                continue
-
-            # persistência: JSON individual + consolidado.md
-            save_article_json(pdf_path.stem, summary)
-            append_to_md(summary)
-            info(f"✅ Salvo JSON e consolidado para {pdf_path.name}")
-
-            # marca como enviado e salva frequentemente (tolerante a falhas)
-            sent.add(str(pdf_path))
-            save_sent_files(sent)
-
-            # respiro entre mensagens (evita bloqueios/limites)
-            time.sleep(max(1.0, WAIT_AFTER_SEND_SEC))
-
-        info("Concluído.")
-    finally:
-        # encerra tudo com segurança
-        try:
-            browser.close()
-        except Exception:
-            pass
-        try:
-            pw.stop()
-        except Exception:
-            pass
 
 
 if __name__ == "__main__":
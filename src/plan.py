@@ -0,0 +1,87 @@
+# src/plan.py
+"""
+O que a próxima execução vai enviar, sem importar o navegador: usado pelos
+pipelines (sync/async) e pelos subcomandos `status`/`plan`/`extract` do run.py.
+"""
+from __future__ import annotations
+import os
+
+from src.config import LEDGER_DB, PDF_DIR, PROMPT_VARIANT, PROMPT_MODE, SENT_LOG, DEDUP
+from src.log import info, warn
+from src.hashing import file_sha256
+from src.ledger import Ledger, pending_legacy
+from src.storage import OUT_JSON_DIR, ResultsStore, new_run_id
+from src.dedup import link_duplicates, plan_duplicates
+
+
+def link_dups(store, ledger, links, hashes, run_id: str) -> None:
+    """Liga o resultado dos representantes concluídos às suas duplicatas (nunca derruba a execução)."""
+    if not links:
+        return
+    try:
+        link_duplicates(store, ledger, links, hashes, PROMPT_VARIANT, PROMPT_MODE, run_id)
+    except Exception as e:
+        warn(f"Não consegui ligar as duplicatas: {e}")
+
+
+def import_legacy(ledger) -> None:
+    """
+    sent.json e outputs/json/*.json de antes do ledger/da base consolidada (uma
+    vez só, na variante/modo desta execução): só quem vai enviar chama.
+    """
+    imported = ledger.import_sent_json(PROMPT_VARIANT, PROMPT_MODE)
+    if imported is not None:
+        info(f"Importados {imported} item(ns) de {SENT_LOG.name} para o registro SQLite.")
+    imported = ledger.import_json_outputs(ResultsStore(), PROMPT_VARIANT, PROMPT_MODE, OUT_JSON_DIR)
+    if imported:
+        info(f"Importados {imported} resumo(s) de {OUT_JSON_DIR.name}/ para a base consolidada.")
+
+
+def plan(max_count: int | None, dry_run: bool = False):
+    """
+    (ledger, pendentes, hashes, duplicatas) da variante/modo atuais, ou None se
+    não há nada a fazer. duplicatas = {membro: representante} (DEDUP=1): os
+    membros não são enviados e recebem o resultado do representante.
+    dry_run=True (python run.py plan/extract) não grava nada: sem criar o
+    registro (ledger None se ele ainda não existe), sem itens, sem ligar
+    duplicatas e sem importar o histórico antigo, que só entra no conjunto
+    de concluídos em memória.
+    """
+    # resolve max_count: CLI (--count) > ENV > default(1)
+    if max_count is None:
+        max_count = int(os.environ.get("MAX_ARTIGOS_POR_EXECUCAO", "1"))
+
+    # coleta PDFs
+    pdfs = sorted(PDF_DIR.glob("*.pdf"))
+    if not pdfs:
+        warn("Nenhum PDF encontrado em ./PDF — adicione arquivos e rode novamente.")
+        return None
+
+    # filtra os que faltam (pelo hash do conteúdo, para a variante/modo atuais)
+    if dry_run:
+        ledger = Ledger() if LEDGER_DB.exists() else None
+    else:
+        ledger = Ledger()
+        import_legacy(ledger)
+    hash_of = ledger.hash_file if ledger is not None else file_sha256
+    hashes = {p: hash_of(p) for p in pdfs}
+    done = ledger.done_hashes(PROMPT_VARIANT, PROMPT_MODE) if ledger is not None else set()
+    if dry_run:
+        done |= pending_legacy(ledger, hash_of, OUT_JSON_DIR)
+    links = {}
+    if DEDUP:
+        links = plan_duplicates(pdfs, hashes, done)
+        if not dry_run:
+            link_dups(ResultsStore(), ledger, links, hashes, new_run_id())  # representantes já concluídos
+            done = ledger.done_hashes(PROMPT_VARIANT, PROMPT_MODE)
+    todo = [p for p in pdfs if hashes[p] not in done and p not in links][:max_count]
+    if dry_run:
+        return ledger, todo, hashes, links
+    if not todo:
+        info(f"Nenhum PDF novo para processar (todos já concluídos para {PROMPT_VARIANT}/{PROMPT_MODE}).")
+        ledger.close()
+        return None
+    for p in todo:
+        ledger.ensure(hashes[p], PROMPT_VARIANT, PROMPT_MODE, p)
+
+    return ledger, todo, hashes, links
@@ -0,0 +1,110 @@
+# src/prefetch.py
+from __future__ import annotations
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Deque, Iterable, Iterator, Optional, Tuple
+
+from src.config import PREFETCH_AHEAD, PREFETCH_WORKERS
+from src.pdf_utils import extract_text_from_pdf, has_extractable_text
+
+
+@dataclass
+class Prefetched:
+    pdf_path: Path
+    text: Optional[str]     # None quando só foi feita a checagem (modo preguiçoso)
+    has_text: bool
+    error: Optional[str] = None
+    seconds: float = 0.0    # tempo de extração no processo que extraiu
+
+
+def _extract_job(pdf_path: str, full_text: bool, refresh: bool = False) -> Tuple[Optional[str], bool, float]:
+    """Roda no processo filho: precisa ser função de módulo (picklable). -> (texto, tem_texto, segundos)"""
+    path = Path(pdf_path)
+    t0 = time.perf_counter()
+    if full_text:
+        text = extract_text_from_pdf(path, refresh=refresh)
+        return text, bool(text.strip()), time.perf_counter() - t0
+    return None, has_extractable_text(path, refresh=refresh), time.perf_counter() - t0
+
+
+class PdfPrefetcher:
+    """
+    Extrai os próximos PDFs em um ProcessPoolExecutor enquanto o navegador
+    envia/espera o artigo atual. A janela (fila) é limitada a `ahead` PDFs.
+
+    Uso:
+        with PdfPrefetcher(pdfs, full_text=False) as prefetch:
+            for item in prefetch: ...
+    """
+
+    def __init__(
+        self,
+        pdfs: Iterable[Path],
+        *,
+        full_text: bool = True,
+        refresh: bool = False,
+        ahead: int = PREFETCH_AHEAD,
+        workers: int = PREFETCH_WORKERS,
+    ):
+        self._pdfs = iter(pdfs)
+        self.full_text = full_text
+        self.refresh = refresh  # ignora o cache de texto e reextrai (--rebuild-cache)
+        self.ahead = max(1, ahead)
+        self.workers = max(0, workers)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pending: Deque[Tuple[Path, Future]] = deque()
+
+    # ---------- ciclo de vida ----------
+    def __enter__(self) -> "PdfPrefetcher":
+        if self.workers > 0:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            self._fill()  # já começa a extrair (ex.: durante o login manual)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        self._pending.clear()
+
+    # ---------- fila ----------
+    def _fill(self) -> None:
+        while self._pool is not None and len(self._pending) < self.ahead:
+            try:
+                pdf_path = next(self._pdfs)
+            except StopIteration:
+                return
+            fut = self._pool.submit(_extract_job, str(pdf_path), self.full_text, self.refresh)
+            self._pending.append((pdf_path, fut))
+
+    @staticmethod
+    def _done(pdf_path: Path, result: Tuple[Optional[str], bool, float]) -> Prefetched:
+        text, has_text, seconds = result
+        return Prefetched(pdf_path, text, has_text, seconds=seconds)
+
+    def _run_inline(self, pdf_path: Path) -> Prefetched:
+        try:
+            return self._done(pdf_path, _extract_job(str(pdf_path), self.full_text, self.refresh))
+        except Exception as e:
+            return Prefetched(pdf_path, None, False, error=str(e))
+
+    def __iter__(self) -> Iterator[Prefetched]:
+        if self._pool is None:
+            # sem processos: extrai sob demanda, em série
+            for pdf_path in self._pdfs:
+                yield self._run_inline(pdf_path)
+            return
+
+        while self._pending:
+            pdf_path, fut = self._pending.popleft()
+            self._fill()  # repõe a janela antes de bloquear no resultado
+            try:
+                yield self._done(pdf_path, fut.result())
+            except Exception as e:
+                yield Prefetched(pdf_path, None, False, error=str(e))
@@ -1,7 +1,7 @@
 # src/prompt_manager.py
 from __future__ import annotations
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Tuple
 
 from src.config import (
     PROMPTS_DIR,
@@ -9,15 +9,22 @@ from src.config import (
     PROMPT_WITH_ATTACHMENT_FILE,
     PROMPT_WITHOUT_ATTACHMENT_FILE,
     FIX_JSON_PROMPT_FILE,
+    COMPACT_TEXT,
 )
+from src.text_compact import compact_text
 
 class PromptManager:
-    """Lê prompts de arquivos .txt e renderiza com placeholders."""
+    """
+    Lê prompts de arquivos .txt e renderiza com placeholders.
+    Só semeia (com os DEFAULTS da variante) os arquivos que ele mesmo usa e
+    que ainda não existem; nada é criado no import (ver get_pm()).
+    """
     def __init__(
         self,
         with_attachment_file: Optional[Path] = None,
         without_attachment_file: Optional[Path] = None,
         fix_json_file: Optional[Path] = None,
+        variant: Optional[str] = None,
     ):
         self.with_attachment_file = Path(with_attachment_file or PROMPT_WITH_ATTACHMENT_FILE)
         self.without_attachment_file = Path(without_attachment_file or PROMPT_WITHOUT_ATTACHMENT_FILE)
@@ -25,8 +32,8 @@ class PromptManager:
 
         PROMPTS_DIR.mkdir(parents=True, exist_ok=True)
 
-        # Semeia defaults da variante ativa
-        variant = PROMPT_VARIANT
+        # Semeia defaults da variante (padrão: a ativa)
+        variant = variant or PROMPT_VARIANT
         if not self.with_attachment_file.exists():
             self.with_attachment_file.write_text(DEFAULTS[variant]["with"], encoding="utf-8")
         if not self.without_attachment_file.exists():
@@ -34,16 +41,12 @@ class PromptManager:
         if not self.fix_json_file.exists():
             self.fix_json_file.write_text(DEFAULT_FIX_JSON, encoding="utf-8")
 
-        # Semeia arquivos das outras variantes se faltarem
-        for name, tpl in DEFAULTS.items():
-            wp = PROMPTS_DIR / f"{name}_with_attachment.txt"
-            wop = PROMPTS_DIR / f"{name}_without_attachment.txt"
-            if not wp.exists(): wp.write_text(tpl["with"], encoding="utf-8")
-            if not wop.exists(): wop.write_text(tpl["without"], encoding="utf-8")
-
     def _read(self, path: Path) -> str:
         return path.read_text(encoding="utf-8")
 
+    def template_path(self, attached: bool) -> Path:
+        return self.with_attachment_file if attached else self.without_attachment_file
+
     def render_with_attachment(self, file_title: str) -> str:
         tmpl = self._read(self.with_attachment_file)
         return tmpl.replace("{file_title}", file_title)
@@ -55,6 +58,36 @@ class PromptManager:
     def get_fix_prompt(self) -> str:
         return self._read(self.fix_json_file)
 
+    # ---------- lote (BATCH_SIZE > 1): K artigos numa mensagem ----------
+    def _batch_file(self, name: str, default: str) -> Path:
+        path = PROMPTS_DIR / name
+        if not path.exists():
+            path.write_text(default, encoding="utf-8")
+        return path
+
+    def _batch_suffix(self, titles: List[str]) -> str:
+        tmpl = self._read(self._batch_file("batch_suffix.txt", DEFAULT_BATCH_SUFFIX))
+        return tmpl.replace("{count}", str(len(titles))).replace("{files}", "; ".join(titles))
+
+    def render_batch_with_attachment(self, titles: List[str]) -> str:
+        """Prompt da variante para K PDFs anexados + instrução de devolver um array."""
+        return self.render_with_attachment(file_title="; ".join(titles)) + "\n\n" + self._batch_suffix(titles)
+
+    def render_batch_without_attachment(self, items: List[Tuple[str, str]], max_chars: int) -> str:
+        """K textos concatenados; cada um reduzido à sua parte de max_chars."""
+        share = max(1000, max_chars // max(1, len(items)))
+        fit = (lambda body: compact_text([body], share)) if COMPACT_TEXT else (lambda body: body[:share])
+        text = "\n\n".join(
+            f"=== ARTICLE {i}: {title} ===\n{fit(body)}" for i, (title, body) in enumerate(items, start=1)
+        )
+        titles = [t for t, _ in items]
+        return (self.render_without_attachment(file_title="; ".join(titles), article_text=text)
+                + "\n\n" + self._batch_suffix(titles))
+
+    def get_batch_fix_prompt(self, titles: List[str]) -> str:
+        tmpl = self._read(self._batch_file("fix_json_batch.txt", DEFAULT_FIX_JSON_BATCH))
+        return tmpl.replace("{count}", str(len(titles))).replace("{files}", "; ".join(titles))
+
 # =================== DEFAULTS ===================
 
 # Chaves do JSON (todas as variantes têm o campo opcional "rationale")
@@ -160,8 +193,46 @@ Please re-send ONLY a valid minified JSON object with exactly these keys (no ext
 title, main_objectives, research_questions, study_type, methodology, main_findings, conclusions, limitations, rationale.
 """
 
+DEFAULT_BATCH_SUFFIX = """BATCH MODE: there are {count} articles in this message ({files}).
+Return ONLY a JSON array with exactly {count} objects, one per article, in the order listed.
+Each object follows the schema above and has one extra key "file" with the article's file name.
+"""
+
+DEFAULT_FIX_JSON_BATCH = """Your previous message did not contain a valid JSON array matching the schema.
+Please re-send ONLY a JSON array with exactly {count} objects, one per article ({files}), in that order.
+Each object has the key "file" plus exactly these keys (no markdown):
+title, main_objectives, research_questions, study_type, methodology, main_findings, conclusions, limitations, rationale.
+"""
+
 DEFAULTS = {
     "zeroshot": {"with": ZEROSHOT_WITH, "without": ZEROSHOT_WITHOUT},
     "fewshot": {"with": FEWSHOT_WITH, "without": FEWSHOT_WITHOUT},
     "cot": {"with": COT_WITH, "without": COT_WITHOUT},
 }
+
+_BY_VARIANT: dict = {}
+_PM: Optional[PromptManager] = None
+
+
+def get_pm() -> PromptManager:
+    """PromptManager da variante ativa (PROMPT_VARIANT / PROMPT_*_FILE), criado no 1º uso."""
+    global _PM
+    if _PM is None:
+        _PM = PromptManager()
+    return _PM
+
+
+def for_variant(variant: str) -> PromptManager:
+    """PromptManager de uma variante (prompts/<variant>_*.txt), para o modo matriz."""
+    variant = variant.strip().lower()
+    if variant not in DEFAULTS:
+        raise ValueError(f"Variante desconhecida: {variant!r} (use {', '.join(DEFAULTS)})")
+    pm = _BY_VARIANT.get(variant)
+    if pm is None:
+        pm = PromptManager(
+            with_attachment_file=PROMPTS_DIR / f"{variant}_with_attachment.txt",
+            without_attachment_file=PROMPTS_DIR / f"{variant}_without_attachment.txt",
+            variant=variant,
+        )
+        _BY_VARIANT[variant] = pm
+    return pm
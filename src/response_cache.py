@@ -0,0 +1,168 @@
+# src/response_cache.py
+"""
+Cache de respostas: não gera de novo o que já foi gerado com as mesmas entradas.
+
+Chave = sha256 de (hash do prompt renderizado, hash do arquivo de template,
+sha256 do PDF, modo com/sem anexo): se qualquer byte de uma delas mudar, é
+outra chave. Cada entrada é um arquivo em outputs/cache/responses/<chave>.json
+com o texto cru da resposta aceita, o ArticleSummary e de onde veio (artigo,
+variante, modo, correções, segundos gastos).
+
+    python run.py --replay       # refaz JSONs, base consolidada e consolidado.md só do cache
+    python run.py --cache-stats  # entradas, tamanho e uso por variante/modo
+
+RESPONSE_CACHE=0 desliga (sempre vai ao navegador).
+"""
+from __future__ import annotations
+import json
+import os
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+from src.config import PROMPT_MODE, PROMPT_VARIANT, RESPONSE_CACHE_DIR, RESPONSE_CACHE_ENABLED
+from src.hashing import text_sha256
+from src.ledger import Ledger
+from src.log import info, warn
+from src.schema import ArticleSummary
+from src.storage import ResultsStore, new_run_id, save_article_json, write_md
+
+
+def _dump(summary: ArticleSummary) -> dict:
+    try:
+        return summary.model_dump()
+    except AttributeError:
+        return summary.dict()
+
+
+class ResponseCache:
+    def __init__(self, root: Path = RESPONSE_CACHE_DIR):
+        self.root = Path(root)
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self.saved_sec = 0.0  # geração evitada (segundos que a entrada custou quando foi gravada)
+
+    # ---------- chave ----------
+    def _template_sha(self, path: Path) -> str:
+        try:
+            return text_sha256(Path(path).read_text(encoding="utf-8"))
+        except OSError:
+            return ""
+
+    def key(self, prompt: str, template: Path, pdf_sha256: str, mode: str) -> str:
+        parts = [text_sha256(prompt), self._template_sha(template), pdf_sha256 or "", mode]
+        return text_sha256("|".join(parts))
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.json"
+
+    # ---------- leitura/escrita ----------
+    def get(self, key: str) -> Optional[ArticleSummary]:
+        try:
+            entry = json.loads(self._path(key).read_text(encoding="utf-8"))
+            summary = ArticleSummary(**entry["summary"])
+        except (OSError, ValueError, KeyError, TypeError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.saved_sec += float(entry.get("seconds") or 0.0)
+        return summary
+
+    def put(self, key: str, raw: str, summary: ArticleSummary, **meta) -> None:
+        entry = {"key": key, "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"), **meta,
+                 "raw": raw, "summary": _dump(summary)}
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            tmp = self._path(key).with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(entry, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, self._path(key))
+            self.stored += 1
+        except OSError:
+            pass  # cache nunca derruba o processamento
+
+    def entries(self) -> Iterator[dict]:
+        if not self.root.exists():
+            return
+        for path in sorted(self.root.glob("*.json")):
+            try:
+                yield json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+
+    # ---------- estatísticas ----------
+    def summary(self) -> str:
+        """Uso nesta execução (uma linha, impressa no fim como a do cache de seletores)."""
+        return (f"Cache de respostas: {self.hits} hit(s), {self.misses} miss(es), {self.stored} gravada(s)"
+                f" — ~{self.saved_sec:.0f}s de geração evitados")
+
+    def report(self) -> None:
+        """Conteúdo em disco: entradas, tamanho e distribuição por variante/modo."""
+        groups: Counter = Counter()
+        seconds: Counter = Counter()
+        articles = set()
+        size = 0
+        for path in self.root.glob("*.json") if self.root.exists() else []:
+            size += path.stat().st_size
+        n = 0
+        for e in self.entries():
+            n += 1
+            cell = (e.get("variant") or "?", e.get("mode") or "?")
+            groups[cell] += 1
+            seconds[cell] += float(e.get("seconds") or 0.0)
+            articles.add(e.get("pdf_sha256"))
+        print(f"{self.root}: {n} resposta(s) de {len(articles)} PDF(s), {size / 1e6:.1f} MB")
+        for (variant, mode), count in sorted(groups.items()):
+            print(f"  {variant:<10}{mode:<9}{count:>6} entrada(s)  ~{seconds[(variant, mode)] / 60:.0f} min de geração")
+
+
+_CACHE: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Singleton do processo; None se RESPONSE_CACHE=0."""
+    global _CACHE
+    if not RESPONSE_CACHE_ENABLED:
+        return None
+    if _CACHE is None:
+        _CACHE = ResponseCache()
+    return _CACHE
+
+
+# ---------- replay: refaz as saídas sem abrir o navegador ----------
+def replay() -> int:
+    """
+    JSON individual, linha na base consolidada, ledger (done) e consolidado.md
+    de cada (PDF, variante, modo) do cache, usando a entrada mais recente.
+    A variante/modo atuais vão para outputs/json/; as outras para
+    outputs/json/<variante>_<modo>/ (como no modo matriz).
+    """
+    latest: Dict[tuple, dict] = {}
+    for e in ResponseCache().entries():
+        if not e.get("article") or not e.get("pdf_sha256"):
+            continue
+        k = (e["pdf_sha256"], e.get("variant"), e.get("mode"))
+        if k not in latest or e.get("created_at", "") >= latest[k].get("created_at", ""):
+            latest[k] = e
+    if not latest:
+        warn(f"Cache de respostas vazio ({RESPONSE_CACHE_DIR}).")
+        return 0
+
+    run_id = new_run_id()
+    store, ledger = ResultsStore(), Ledger()
+    try:
+        for (sha, variant, mode), e in sorted(latest.items(), key=lambda kv: kv[1]["article"]):
+            summary = ArticleSummary(**e["summary"])
+            subdir = None if (variant, mode) == (PROMPT_VARIANT, PROMPT_MODE) else f"{variant}_{mode}"
+            out_path = save_article_json(e["article"], summary, subdir)
+            store.append(summary, article=e["article"], pdf_sha256=sha, variant=variant, mode=mode,
+                         run_id=run_id, replayed_from=e.get("created_at"))
+            ledger.ensure(sha, variant, mode)
+            ledger.mark_done(sha, variant, mode, out_path)
+        write_md(store)
+        store.export_parquet()
+    finally:
+        ledger.close()
+    info(f"Replay {run_id}: {len(latest)} resultado(s) refeitos a partir do cache, sem navegador.")
+    return len(latest)
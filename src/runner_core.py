@@ -0,0 +1,431 @@
+# src/runner_core.py
+"""
+Lógica comum aos dois runners, sem nenhuma chamada ao Playwright.
+
+src/chatgpt_runner.py (+ src/browser_utils.py) e src/async_runner.py só
+fazem as chamadas à página — síncronas ou com `await` — e decidem o resto
+por aqui: leitura do retrato da página (pronto, upload, envio, fim da
+resposta), textos das pausas manuais, preenchimento do editor, renderização
+do prompt, cache de respostas e o laço de validação/correção do JSON.
+Assim uma mudança de comportamento vale para os dois modos de uma vez.
+"""
+from __future__ import annotations
+import hashlib
+import os
+import re
+import time
+from typing import List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from src.config import (
+    OUTPUT_DIR,
+    PLAYWRIGHT_PROFILE,
+    PROMPT_VARIANT,
+    SEND_MAX_WAIT_SEC,
+    SLOW_MO_MS,
+    HEADLESS,
+    STREAM_MAX_PREAMBLE,
+    STREAM_VALIDATE,
+)
+from src.schema import ArticleSummary
+from src.log import info, warn
+from src.json_extract import IncrementalSummaryParser, extract_json_object
+from src.metrics import ArticleTrace, record
+from src.hashing import file_sha256
+from src.prompt_manager import PromptManager, get_pm
+from src.response_cache import get_response_cache
+
+# ===== navegador =====
+COMMON_ARGS = [
+    "--disable-blink-features=AutomationControlled",
+    "--no-default-browser-check",
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+]
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
+)
+
+def launch_options() -> dict:
+    """Argumentos de launch_persistent_context (mesmo perfil nos dois modos)."""
+    return dict(
+        user_data_dir=str(PLAYWRIGHT_PROFILE),
+        headless=HEADLESS,
+        slow_mo=SLOW_MO_MS,
+        args=COMMON_ARGS,
+        user_agent=USER_AGENT,
+        locale="pt-BR",
+    )
+
+
+# ===== pausas manuais =====
+_RULE = "────────────────────────────────────────────────────────"
+
+# chave -> (linhas da caixa, texto do input()); as linhas aceitam {campos}
+PAUSES = {
+    "login": ([
+        "Automação pausada: {reason}",
+        "1) Conclua login/captcha e feche popups no navegador.",
+        "2) Quando o campo de mensagem do chat aparecer, pressione ENTER aqui.",
+    ], "Pressione ENTER depois de resolver (vou verificar o input)... "),
+    "preview": ([
+        "Não detectei o preview do arquivo ainda.",
+        "Anexe manualmente e confirme quando aparecer o chip/preview.",
+    ], "Pressione ENTER quando o preview do arquivo aparecer... "),
+    "uploading": ([
+        "O arquivo ainda parece estar subindo.",
+        "Confira no navegador. Quando terminar, pressione ENTER aqui.",
+    ], "Pressione ENTER quando o upload tiver terminado... "),
+    "attach": ([
+        "Anexe o arquivo MANUALMENTE agora.",
+        "→ Clique em 'Attach/Anexar' e selecione: {filename}",
+        "→ Depois que aparecer o chip/preview e terminar 'Uploading', pressione ENTER aqui.",
+    ], "Pressione ENTER quando o arquivo estiver ANEXADO e o upload CONCLUÍDO... "),
+    "send_button": ([
+        "O botão 'Enviar' não liberou a tempo.",
+        "Confirme no navegador se o upload terminou e o botão está ativo.",
+        "Depois clique em 'Enviar' manualmente e pressione ENTER aqui.",
+    ], "Pressione ENTER após enviar manualmente (ou quando liberar)... "),
+    "outbound": ([
+        "Parece que a mensagem NÃO foi enviada automaticamente.",
+        "Por favor, CLIQUE em 'Enviar' no chat (ou pressione Enter lá).",
+        "Assim que começar a gerar, aperte ENTER aqui.",
+    ], "Pressione ENTER para continuar após enviar manualmente... "),
+}
+
+def pause_box(key: str, tab: str = "", **fields) -> str:
+    """Imprime a caixa da pausa `key` (tab = ' [aba N]') e devolve o texto do input()."""
+    lines, prompt = PAUSES[key]
+    lines = [line.format(**fields) for line in lines]
+    print("\n" + _RULE)
+    print(f"⏸ {tab} {lines[0]}")
+    for line in lines[1:]:
+        print(f"    {line}")
+    print(_RULE + "\n")
+    return prompt
+
+def manual_resolved(snap) -> bool:
+    """Depois do ENTER da pausa de login: o editor voltou? (senão diz o que falta)"""
+    if snap.editor_visible:
+        print("✅ Campo de mensagem detectado. Retomando automação.\n")
+        return True
+    if snap.human_check:
+        print("⚠️  Ainda detecto verificação humana. Resolva e tente novamente.")
+    else:
+        print("⚠️  Ainda não vejo o campo de mensagem. Aguarde e tente novamente.")
+    return False
+
+
+# ===== leitura do retrato (src/page_state.py) =====
+def readiness(snap) -> str:
+    """
+    "retry" (evaluate falhou: navegação em curso), "overlay" (fechar popups e
+    olhar de novo), "manual" (login/captcha ou sem editor) ou "ready".
+    """
+    if not snap.ok:
+        return "retry"
+    if snap.overlay:
+        return "overlay"
+    if snap.human_check or not snap.editor_visible:
+        return "manual"
+    return "ready"
+
+def outbound(snap, prev_count: int) -> bool:
+    """A mensagem saiu: já há Stop ou um balão novo do assistente."""
+    return snap.stop or snap.assistant_count > prev_count
+
+def send_state(snap, started: float, timeout: Optional[float] = None) -> Optional[str]:
+    """"ready" com o botão liberado, "send_button" (pausa manual) após o prazo, senão None."""
+    if snap.ready_to_send:
+        return "ready"
+    if time.monotonic() - started > (timeout or SEND_MAX_WAIT_SEC):
+        return "send_button"
+    return None
+
+
+class UploadWatch:
+    """
+    Espera do upload em duas fases a partir dos retratos: chip/preview do
+    arquivo, depois o fim do "Uploading". step(snap) devolve None (esperar
+    `interval` e olhar de novo), "done" ou a pausa manual a pedir ("preview"
+    ou "uploading"); depois da pausa, asked() reinicia os prazos. Passado
+    hard_timeout sem confirmação manual: RuntimeError.
+    """
+
+    def __init__(self, soft_timeout: float = 30.0, hard_timeout: float = 90.0):
+        self.soft_timeout = soft_timeout
+        self.hard_timeout = hard_timeout
+        self.phase = "preview"
+        self.started = self.phase_started = time.monotonic()
+
+    @property
+    def interval(self) -> float:
+        return 0.4 if self.phase == "preview" else 0.5
+
+    def step(self, snap) -> Optional[str]:
+        now = time.monotonic()
+        if self.phase == "preview":
+            if not snap.preview:
+                return "preview" if now - self.phase_started > self.soft_timeout else None
+            self.phase, self.phase_started = "finished", now
+        if snap.upload_finished:
+            return "done"
+        if now - self.phase_started > self.soft_timeout:
+            return "uploading"
+        if now - self.started > self.hard_timeout:
+            raise RuntimeError("Upload do arquivo não finalizou a tempo.")
+        return None
+
+    def asked(self) -> None:
+        self.started = self.phase_started = time.monotonic()
+
+
+class StableAnswer:
+    """
+    Fim da resposta sem o binding do observer (polling ~1x/s): sem Stop, com
+    texto num balão novo e o mesmo (nº de balões, tamanho) por `rounds`
+    retratos seguidos. prev_count=None aceita qualquer balão.
+    """
+
+    def __init__(self, prev_count: Optional[int] = None, rounds: int = 3):
+        self.prev_count = prev_count
+        self.rounds = rounds
+        self._last = None
+        self._stable = 0
+
+    def settled(self, snap) -> bool:
+        if not snap.ok or snap.stop or snap.last_text_len <= 0:
+            return False
+        if self.prev_count is not None and snap.assistant_count <= self.prev_count:
+            return False
+        state = (snap.assistant_count, snap.last_text_len)
+        if state == self._last:
+            self._stable += 1
+        else:
+            self._last, self._stable = state, 0
+        return self._stable >= self.rounds
+
+
+# ===== editor =====
+EDITOR_TEXT_JS = "(el) => (el.tagName === 'TEXTAREA' ? el.value : (el.innerText || el.textContent || ''))"
+CURSOR_TARGET = "textarea, [contenteditable='true']"
+FILL_CHUNK = 1200
+
+def norm_editor_text(text: str) -> str:
+    # o editor transforma \n em parágrafos (innerText volta \n\n): compara sem espaços
+    return re.sub(r"\s+", "", text or "")
+
+def editor_matches(got: str, text: str) -> bool:
+    """Confere tamanho e hash do texto que está no editor contra o prompt."""
+    want, got = norm_editor_text(text), norm_editor_text(got)
+    return len(got) == len(want) and (
+        hashlib.sha256(got.encode("utf-8")).digest() == hashlib.sha256(want.encode("utf-8")).digest()
+    )
+
+def chunks(text: str, size: int = FILL_CHUNK) -> List[str]:
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+def fill_mismatch() -> None:
+    warn("   ⚠ editor não confere com o prompt após inserção única; refazendo em blocos")
+
+def fill_report(text: str, used: str, t0: float) -> dict:
+    """Loga e devolve {"strategy", "seconds", "chars"} de um preenchimento iniciado em t0."""
+    elapsed = time.perf_counter() - t0
+    info(f"   ⌨ prompt {len(text)} chars via {used} em {elapsed:.2f}s")
+    return {"strategy": used, "seconds": round(elapsed, 3), "chars": len(text)}
+
+def cursor_path(box: dict) -> List[Tuple[float, float, int]]:
+    """Dois movimentos suaves do mouse até a área do editor: (x, y, steps)."""
+    x = box["x"] + box["width"] * 0.7
+    y = box["y"] + box["height"] * 0.4
+    return [(x - 80, y - 20, 10), (x, y, 12)]
+
+def send_disabled(aria: Optional[str], disabled: Optional[str]) -> bool:
+    return disabled is not None or (aria or "").lower() in ("true", "1")
+
+
+# ===== resposta =====
+def save_debug(file_title: str, tag: str, text: str) -> None:
+    try:
+        d = OUTPUT_DIR / "debug"
+        d.mkdir(parents=True, exist_ok=True)
+        (d / f"{file_title}_{tag}.txt").write_text(text or "", encoding="utf-8")
+    except Exception:
+        pass
+
+def _valid_summary(obj: dict) -> bool:
+    ArticleSummary(**obj)  # ValidationError => parser marca como fora do schema
+    return True
+
+def record_answer_times(watcher, sent_at: float) -> None:
+    """ttft (envio -> 1º token) e generation (1º token -> fim; envio -> fim sem streaming)."""
+    now = time.monotonic()
+    first = watcher.first_delta_at
+    if first is not None and first >= sent_at:
+        record("ttft", first - sent_at)
+        record("generation", now - first)
+    else:
+        record("generation", now - sent_at)
+
+
+class AnswerParser:
+    """
+    Validação incremental do balão de índice prev_count, alimentada pelo
+    observer (hook), e a interpretação no fim: (dict|None, texto,
+    motivo_fora_do_schema|None). Sem binding (ou STREAM_VALIDATE=0, ou
+    validate=False, ex.: lote com array) só a extração depois do fim.
+    """
+
+    def __init__(self, prev_count: int, validate: bool = True):
+        self.prev_count = prev_count
+        self.validate = validate
+        self.parser = IncrementalSummaryParser(validate=_valid_summary, max_preamble=STREAM_MAX_PREAMBLE)
+
+    def hook(self, watcher, streaming: bool) -> None:
+        if streaming and STREAM_VALIDATE and self.validate:
+            watcher.on_text = self.feed
+
+    def feed(self, delta: str, reset: bool, count: int) -> None:
+        if count <= self.prev_count:
+            return  # ainda é o balão da resposta anterior
+        if reset:
+            self.parser.reset()
+        self.parser.feed(delta)
+
+    @property
+    def done(self) -> bool:
+        """O JSON já fechou válido (ou saiu do schema): não precisa esperar o fim."""
+        return self.parser.done
+
+    def should_stop(self, generating: bool) -> bool:
+        # o resto (comentário / JSON fora do schema) não interessa
+        return self.parser.done and generating
+
+    def early(self):
+        """Resultado validado durante o streaming, ou None (ler o balão e chamar from_content)."""
+        if self.parser.result is None:
+            return None
+        info(f"   ⚡ JSON validado durante o streaming ({len(self.parser.text)} chars)")
+        return self.parser.result, self.parser.text, None
+
+    def from_content(self, content: str):
+        reason = self.parser.off_schema_reason
+        if reason:
+            warn(f"   ✂ resposta fora do schema ({reason}); pulando para a correção")
+            return None, content, reason
+        return extract_json_object(content), content, None
+
+
+class ExchangeCore:
+    """
+    Estado de um artigo independente da página: prompt (com ou sem anexo),
+    cache de respostas e o laço de validação/correção. O runner envia
+    render(), passa cada resposta a accept() e, enquanto ela devolver False,
+    envia next_fix(). Esgotadas as parse_fix_attempts correções, accept()
+    levanta ValueError.
+    """
+
+    def __init__(self, file_title: str, text: str, file_path: Optional[str] = None,
+                 *, parse_fix_attempts: int = 2, trace: Optional[ArticleTrace] = None,
+                 prompts: Optional[PromptManager] = None, pdf_sha256: Optional[str] = None):
+        self.file_title = file_title
+        self.text = text
+        self.file_path = file_path
+        self.parse_fix_attempts = parse_fix_attempts
+        self.trace = trace  # spans deste artigo (src/metrics.py); None = só o acumulado
+        self.pm = prompts or get_pm()
+        self.pdf_sha256 = pdf_sha256
+        self.summary: Optional[ArticleSummary] = None
+        self.from_cache = False
+        self._attempt = 0  # 0 = prompt principal, n = n-ésima correção
+        self._last_schema_error = None
+        self._cache_key: Optional[str] = None
+        self._started = 0.0
+        self._fix_started = 0.0
+
+    @property
+    def mode(self) -> str:
+        return "with" if self.file_path else "without"
+
+    def render(self) -> str:
+        """Prompt principal (e início do relógio do artigo)."""
+        self._started = time.monotonic()
+        if self.file_path:
+            return self.pm.render_with_attachment(file_title=self.file_title)
+        return self.pm.render_without_attachment(file_title=self.file_title, article_text=self.text)
+
+    @property
+    def needs_hash(self) -> bool:
+        """O cache vai precisar do hash do PDF e ele ainda não foi calculado."""
+        return self.pdf_sha256 is None and bool(self.file_path) and get_response_cache() is not None
+
+    def lookup(self, prompt: str) -> bool:
+        """Resposta já aceita para as mesmas entradas? (preenche self.summary)"""
+        cache = get_response_cache()
+        if cache is None:
+            return False
+        if self.needs_hash:
+            self.pdf_sha256 = file_sha256(self.file_path)
+        self._cache_key = cache.key(prompt, self.pm.template_path(bool(self.file_path)),
+                                    self.pdf_sha256 or "", self.mode)
+        self.summary = cache.get(self._cache_key)
+        self.from_cache = self.summary is not None
+        if self.from_cache:
+            info(f"   ♻ {self.file_title}: resposta do cache (mesmo prompt, template e PDF)")
+        return self.from_cache
+
+    def remember(self, raw: str) -> None:
+        cache = get_response_cache()
+        if cache is None or self._cache_key is None:
+            return
+        trace = self.trace
+        cache.put(self._cache_key, raw, self.summary, article=self.file_title, pdf_sha256=self.pdf_sha256,
+                  variant=trace.variant if trace else PROMPT_VARIANT, mode=self.mode,
+                  attempts=self._attempt, seconds=round(time.monotonic() - self._started, 1))
+
+    def debug_prompt(self, prompt: str) -> None:
+        if os.getenv("DEBUG_PROMPT", "0") == "1":
+            save_debug(self.file_title, "PROMPT", prompt)
+
+    def accept(self, data, content: str, off_schema: Optional[str] = None) -> bool:
+        """True com self.summary pronto; False = mandar a correção; ValueError se esgotou."""
+        n = self._attempt
+        if n:
+            record("fix_attempt", time.monotonic() - self._fix_started)
+        if os.getenv("DEBUG_RAW", "0") == "1":
+            save_debug(self.file_title, "raw" if n == 0 else f"raw_fix_{n}", content)
+
+        if data:
+            try:
+                self.summary = ArticleSummary(**data)
+            except ValidationError as ve:
+                self._last_schema_error = ve
+                tag = "raw_bad_schema" if n == 0 else f"raw_validation_fix_bad_schema_{n}"
+            else:
+                self.remember(content)
+                return True
+        elif n == 0:
+            tag = "raw_off_schema" if off_schema else "raw_no_parse"
+        else:
+            tag = f"raw_validation_fix_no_parse_{n}"
+        save_debug(self.file_title, tag, content)
+
+        if n >= self.parse_fix_attempts:
+            if self._last_schema_error:
+                raise ValueError(f"Validation error after fix: {self._last_schema_error}")
+            raise ValueError("Could not parse JSON from model response.")
+        return False
+
+    def _next_attempt(self) -> None:
+        self._attempt += 1
+        self._fix_started = time.monotonic()
+        if self.trace is not None:
+            self.trace.attempt = self._attempt
+
+    def next_fix(self) -> str:
+        """Prompt de correção da próxima tentativa."""
+        self._next_attempt()
+        return self.pm.get_fix_prompt()
@@ -0,0 +1,193 @@
+# src/selector_cache.py
+"""
+Resolução de seletores com memória entre execuções.
+
+Para cada papel (editor, send, stop, file_input, overlay, attach) guarda
+qual seletor de src/selectors.py funcionou e tenta esse primeiro; a varredura
+completa da lista só acontece quando o vencedor falha (miss). O ranking fica em
+outputs/cache/selectors.json, separado por "impressão digital" da UI (host +
+build da página), então uma mudança de versão da UI começa um ranking novo.
+
+Ranking: vitórias limitadas a WIN_CAP (cada miss tira uma dos seletores que
+falharam antes do vencedor), depois a vitória mais recente, depois a ordem de
+src/selectors.py. Um acerto avulso de um fallback genérico (ex.: "textarea"
+numa página intermediária) não passa o seletor principal; uma mudança real da
+UI troca o primeiro em poucos misses.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.config import SELECTOR_CACHE_PATH
+
+FINGERPRINT_JS = """() => [
+  location.host,
+  document.documentElement.getAttribute('data-build') || '',
+  (document.querySelector('meta[name="build-id"], meta[name="version"]') || {}).content || '',
+].join('|')"""
+
+WIN_CAP = 3  # teto das vitórias de um seletor: nenhum acumula vantagem permanente
+
+
+def _visible(loc) -> bool:
+    return loc.count() > 0 and loc.first.is_visible()
+
+
+class SelectorResolver:
+    def __init__(self, path: Path = SELECTOR_CACHE_PATH):
+        self.path = Path(path)
+        self.ranking: Dict[str, Dict[str, Dict[str, dict]]] = {}  # fp -> papel -> seletor -> {wins, last}
+        self._fp_by_page: Dict[int, Tuple[str, str]] = {}         # id(page) -> (url, fp)
+        self.hits = 0
+        self.misses = 0
+        self.probes = 0           # seletores testados de fato
+        self.baseline_probes = 0  # quantos a varredura na ordem fixa teria testado
+        self._dirty = False
+        self._load()
+
+    # ---------- persistência ----------
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            if isinstance(data, dict):
+                self.ranking = data
+        except (OSError, ValueError):
+            self.ranking = {}
+        # formato antigo (seletor -> nº de vitórias sem teto)
+        for roles in self.ranking.values():
+            for role, wins in roles.items():
+                for sel, v in wins.items():
+                    if isinstance(v, int):
+                        wins[sel] = {"wins": min(v, WIN_CAP), "last": 0}
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self.ranking, ensure_ascii=False, indent=1), encoding="utf-8")
+            os.replace(tmp, self.path)
+            self._dirty = False
+        except OSError:
+            pass
+
+    # ---------- impressão digital da UI ----------
+    def fingerprint(self, page) -> str:
+        url = getattr(page, "url", "") or ""
+        cached = self._fp_by_page.get(id(page))
+        if cached and cached[0] == url:
+            return cached[1]
+        try:
+            raw = page.evaluate(FINGERPRINT_JS)
+        except Exception:
+            raw = url.split("/")[2] if "://" in url else url
+        return self.set_fingerprint(page, raw)
+
+    def knows(self, page) -> bool:
+        """Impressão digital já calculada para a URL atual da página?"""
+        cached = self._fp_by_page.get(id(page))
+        return bool(cached) and cached[0] == (getattr(page, "url", "") or "")
+
+    def set_fingerprint(self, page, raw) -> str:
+        """Registra a impressão digital já avaliada (o runner async roda o JS por conta própria)."""
+        fp = hashlib.sha1(str(raw).encode("utf-8")).hexdigest()[:12]
+        self._fp_by_page[id(page)] = (getattr(page, "url", "") or "", fp)
+        return fp
+
+    # ---------- ranking ----------
+    def order(self, page, role: str, candidates: Sequence[str]) -> List[str]:
+        """Candidatos por vitórias (com teto), vitória mais recente e, no empate, a ordem declarada."""
+        wins = self.ranking.get(self.fingerprint(page), {}).get(role, {})
+        if not wins:
+            return list(candidates)
+        pos = {s: i for i, s in enumerate(candidates)}
+        none = {"wins": 0, "last": 0}
+        return sorted(candidates, key=lambda s: (-wins.get(s, none)["wins"], -wins.get(s, none)["last"], pos[s]))
+
+    def record(self, page, role: str, selector: str, missed: Sequence[str] = ()) -> None:
+        """Conta uma vitória (até WIN_CAP); `missed` = seletores testados antes que falharam (perdem uma)."""
+        wins = self.ranking.setdefault(self.fingerprint(page), {}).setdefault(role, {})
+        for sel in missed:
+            e = wins.get(sel)
+            if e and e["wins"] > 0:
+                e["wins"] -= 1
+                self._dirty = True
+        e = wins.setdefault(selector, {"wins": 0, "last": 0})
+        latest = max(v["last"] for v in wins.values())
+        if e["wins"] < WIN_CAP or e["last"] < latest or not latest:
+            e["wins"] = min(e["wins"] + 1, WIN_CAP)
+            e["last"] = round(time.time(), 3)
+            self._dirty = True
+
+    def resolve(
+        self,
+        page,
+        role: str,
+        candidates: Sequence[str],
+        check: Callable = _visible,
+    ) -> Optional[Tuple[str, object]]:
+        """
+        (seletor, locator) do primeiro candidato em que check(locator) é True,
+        testando antes o que venceu da última vez. None se nenhum servir.
+        """
+        ordered = self.order(page, role, candidates)
+        for n, sel in enumerate(ordered, start=1):
+            loc = page.locator(sel)
+            try:
+                ok = check(loc)
+            except Exception:
+                ok = False
+            if not ok:
+                continue
+            self.probes += n
+            self.baseline_probes += list(candidates).index(sel) + 1
+            if n == 1:
+                self.hits += 1
+                self.record(page, role, sel)  # só marca sujo se o seletor ainda não está no teto
+            else:
+                self.misses += 1
+                self.record(page, role, sel, missed=ordered[:n - 1])
+                self.save()  # miss é raro: grava na hora
+            return sel, loc
+        self.probes += len(ordered)
+        self.baseline_probes += len(ordered)
+        self.misses += 1
+        return None
+
+    def first(self, page, role: str, candidates: Sequence[str], check: Callable = _visible):
+        """Só o locator (.first) do seletor resolvido, ou None."""
+        found = self.resolve(page, role, candidates, check)
+        return found[1].first if found else None
+
+    # ---------- estatísticas ----------
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "probes": self.probes,
+            "baseline_probes": self.baseline_probes,
+            "saved_probes": self.baseline_probes - self.probes,
+        }
+
+    def summary(self) -> str:
+        s = self.stats()
+        return (f"seletores: {s['hits']} hits / {s['misses']} misses "
+                f"({s['hit_rate']:.0%}), {s['probes']} sondagens "
+                f"(ordem fixa: {s['baseline_probes']}, economia: {s['saved_probes']})")
+
+
+_RESOLVER: Optional[SelectorResolver] = None
+
+def get_resolver() -> SelectorResolver:
+    """Resolver compartilhado do processo."""
+    global _RESOLVER
+    if _RESOLVER is None:
+        _RESOLVER = SelectorResolver()
+    return _RESOLVER
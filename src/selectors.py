@@ -10,18 +10,22 @@ COMPOSER_VISIBLE = [
 ]
 
 # 2) Botão de parar geração
-STOP_GENERATING_BTN = (
-    "button[aria-label*='Stop'], button:has-text('Stop generating'), "
-    "button:has-text('Parar geração'), button:has-text('Parar')"
-)
+STOP_BUTTONS = [
+    "button[aria-label*='Stop']",
+    "button:has-text('Stop generating')",
+    "button:has-text('Parar geração')",
+    "button:has-text('Parar')",
+]
+STOP_GENERATING_BTN = ", ".join(STOP_BUTTONS)
 
 # 3) Última mensagem do assistente
-LAST_MESSAGE_SELECTOR = (
-    "[data-message-author-role='assistant'] .markdown, "
-    "div[data-message-author-role='assistant'] .markdown, "
-    "article:has([data-message-author-role='assistant']) .markdown, "
-    "div.markdown"
-)
+ASSISTANT_MESSAGES = [
+    "[data-message-author-role='assistant'] .markdown",
+    "div[data-message-author-role='assistant'] .markdown",
+    "article:has([data-message-author-role='assistant']) .markdown",
+    "div.markdown",
+]
+LAST_MESSAGE_SELECTOR = ", ".join(ASSISTANT_MESSAGES)
 
 # 4) Overlays/Banners comuns
 OVERLAY_BUTTONS = [
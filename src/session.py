@@ -0,0 +1,152 @@
+# src/session.py
+"""
+Começo e fim de uma execução, iguais em src/pipeline.py, src/matrix.py e
+src/async_pipeline.py:
+
+    with run_session(store, ledger, link) as session:
+        with PdfPrefetcher(...) as prefetch:   # a extração começa durante o login
+            pages = session.ready(tabs)
+            ...
+
+ready() abre o chat, espera o login e abre as abas extras; ao sair (mesmo
+com erro) close_run() liga as duplicatas (`link`), regera o consolidado,
+salva os seletores aprendidos, resume o cache de respostas e fecha o ledger,
+e depois o navegador. run_session_async é o mesmo sobre o Playwright async.
+"""
+from __future__ import annotations
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
+from typing import Callable, List
+
+from src.config import MANUAL_LOGIN, OUTPUT_DIR, PDF_DIR, PROMPT_MODE, PROMPT_VARIANT
+from src.log import info, warn
+from src.metrics import span
+from src.response_cache import get_response_cache
+from src.selector_cache import get_resolver
+from src.storage import save_article_json, write_md
+
+
+def ensure_dirs() -> None:
+    """Garante a estrutura mínima de pastas do projeto."""
+    PDF_DIR.mkdir(parents=True, exist_ok=True)
+    (OUTPUT_DIR / "json").mkdir(parents=True, exist_ok=True)
+    (OUTPUT_DIR / "debug").mkdir(parents=True, exist_ok=True)
+
+
+def persist(store, run_id: str, pdf_path: Path, sha: str, summary, fill: dict,
+            variant: str = PROMPT_VARIANT, mode: str = PROMPT_MODE, subdir: str | None = None,
+            batch_size: int = 1) -> Path:
+    """JSON individual + linha na base consolidada (só disco; o ledger fica com quem chama)."""
+    with span("persist"):
+        out_path = save_article_json(pdf_path.stem, summary, subdir)
+        store.append(
+            summary, article=pdf_path.stem, pdf_sha256=sha,
+            variant=variant, mode=mode, run_id=run_id,
+            fill_strategy=fill.get("strategy"), fill_sec=fill.get("seconds"),
+            **({"batch_size": batch_size} if batch_size > 1 else {}),
+        )
+    return out_path
+
+
+def close_run(store, ledger, link: Callable[[], None]) -> None:
+    """Fim da execução (sem o navegador): duplicatas, consolidado, seletores, cache, ledger."""
+    try:
+        link()
+    finally:
+        # consolidado.md é regerado da base (1x por execução, sem duplicar blocos)
+        try:
+            write_md(store)
+            store.export_parquet()
+        except Exception as e:
+            warn(f"Não consegui regerar o consolidado: {e}")
+        res = get_resolver()
+        res.save()
+        info(res.summary())
+        cache = get_response_cache()
+        if cache is not None and (cache.hits or cache.misses):
+            info(cache.summary())
+        ledger.close()
+
+
+class Session:
+    """Navegador de uma execução síncrona: page é a aba do login."""
+
+    def __init__(self, browser, page):
+        self.browser = browser
+        self.page = page
+
+    def ready(self, tabs: int = 1) -> List:
+        """
+        Abre o ChatGPT e BLOQUEIA até você concluir login/captcha e o input
+        aparecer (com MANUAL_LOGIN=0 só pausa se precisar). Devolve a aba do
+        login + (tabs - 1) novas na mesma sessão, já na home do chat.
+        """
+        from src.browser_utils import ensure_ready, open_chat_home, pause_until_ready_manual
+        open_chat_home(self.page)
+        if MANUAL_LOGIN:
+            pause_until_ready_manual(self.page, reason="login/captcha pendente")
+        else:
+            ensure_ready(self.page)
+        pages = [self.page]
+        for _ in range(tabs - 1):
+            extra = self.browser.new_page()
+            open_chat_home(extra)
+            pages.append(extra)
+        return pages
+
+
+class AsyncSession(Session):
+    """Session sobre o Playwright async (ready() é corrotina)."""
+
+    async def ready(self, tabs: int = 1) -> List:
+        from src.async_runner import ensure_ready_async, open_chat_home_async, pause_until_ready_manual_async
+        await open_chat_home_async(self.page)
+        if MANUAL_LOGIN:
+            await pause_until_ready_manual_async(self.page, reason="login/captcha pendente")
+        else:
+            await ensure_ready_async(self.page)
+        pages = [self.page]
+        for _ in range(tabs - 1):
+            extra = await self.browser.new_page()
+            await open_chat_home_async(extra)
+            pages.append(extra)
+        return pages
+
+
+@contextmanager
+def run_session(store, ledger, link: Callable[[], None]):
+    """1 navegador/ sessão para toda a rodada; o fim (close_run + fechar) roda sempre."""
+    from src.browser_utils import launch_browser
+    pw, browser, page = launch_browser()
+    try:
+        yield Session(browser, page)
+        info("Concluído.")
+    finally:
+        try:
+            close_run(store, ledger, link)
+        finally:
+            # encerra tudo com segurança
+            for close in (browser.close, pw.stop):
+                try:
+                    close()
+                except Exception:
+                    pass
+
+
+@asynccontextmanager
+async def run_session_async(store, ledger, link: Callable[[], None]):
+    """run_session sobre o Playwright async."""
+    from src.async_runner import launch_browser_async
+    pw, browser, page = await launch_browser_async()
+    try:
+        yield AsyncSession(browser, page)
+        info("Concluído.")
+    finally:
+        try:
+            close_run(store, ledger, link)
+        finally:
+            for close in (browser.close, pw.stop):
+                try:
+                    await close()
+                except Exception:
+                    pass
@@ -1,51 +1,164 @@
 from __future__ import annotations
 import json
+import secrets
+import time
 from pathlib import Path
-from typing import Set
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
 
-from src.config import BASE_DIR, MD_PATH
-from src.schema import ArticleSummary
+from src.config import OUTPUT_DIR, MD_PATH, RESULTS_PATH, RESULTS_INDEX_PATH
 
-OUT_DIR = BASE_DIR / "outputs"
+if TYPE_CHECKING:  # pydantic só quando há resumo de verdade (status/plan não pagam o import)
+    from src.schema import ArticleSummary
+
+OUT_DIR = OUTPUT_DIR
 OUT_JSON_DIR = OUT_DIR / "json"
-SENT_LOG = OUT_DIR / "sent.json"
 
-def load_sent_files() -> Set[str]:
-    if not SENT_LOG.exists():
-        return set()
-    try:
-        raw = SENT_LOG.read_text(encoding="utf-8").strip()
-        if not raw:
-            return set()
-        data = json.loads(raw)
-        if isinstance(data, list):
-            return set(data)
-        return set()
-    except Exception:
-        return set()
-
-def save_sent_files(sent: Set[str]) -> None:
-    SENT_LOG.parent.mkdir(parents=True, exist_ok=True)
-    SENT_LOG.write_text(json.dumps(sorted(sent), ensure_ascii=False, indent=2), encoding="utf-8")
-
-def save_article_json(stem: str, summary: ArticleSummary) -> Path:
-    OUT_JSON_DIR.mkdir(parents=True, exist_ok=True)
-    path = OUT_JSON_DIR / f"{stem}.json"
+def _dump(summary: ArticleSummary) -> dict:
     try:
-        data = summary.model_dump()
+        return summary.model_dump()
     except AttributeError:
-        data = summary.dict()
+        return summary.dict()
+
+def new_run_id() -> str:
+    """Identificador da execução: data/hora + sufixo aleatório curto."""
+    return time.strftime("%Y%m%d-%H%M%S") + "-" + secrets.token_hex(2)
+
+def save_article_json(stem: str, summary: ArticleSummary, subdir: Optional[str] = None) -> Path:
+    """outputs/json/<stem>.json (ou outputs/json/<subdir>/<stem>.json, ex.: uma célula da matriz)."""
+    folder = OUT_JSON_DIR / subdir if subdir else OUT_JSON_DIR
+    folder.mkdir(parents=True, exist_ok=True)
+    path = folder / f"{stem}.json"
+    data = _dump(summary)
     text = json.dumps(data, ensure_ascii=False, indent=2)
     path.write_text(text, encoding="utf-8")
     return path
 
-def append_to_md(summary: ArticleSummary) -> None:
-    MD_PATH.parent.mkdir(parents=True, exist_ok=True)
-    try:
-        d = summary.model_dump()
-    except AttributeError:
-        d = summary.dict()
 
+# ---------- base consolidada (JSONL append-only + índice) ---------- #
+ResultKey = Tuple[str, str, str]  # (pdf_sha256, variant, mode)
+
+class ResultsStore:
+    """
+    Uma linha JSON por resultado em outputs/results.jsonl (nunca reescrito),
+    com run_id, variante, modo e hash do PDF. O índice lateral
+    (results.idx.jsonl) guarda o offset da linha mais recente de cada
+    (pdf, variante, modo), então get() é um seek + uma linha.
+    """
+
+    def __init__(self, path: Path = RESULTS_PATH, index_path: Path = RESULTS_INDEX_PATH):
+        self.path = Path(path)
+        self.index_path = Path(index_path)
+        self._by_key: Dict[ResultKey, int] = {}
+        self._by_stem: Dict[Tuple[str, str, str], ResultKey] = {}
+        self._load_index()
+
+    def _remember(self, key: ResultKey, stem: str, offset: int) -> None:
+        self._by_key[key] = offset
+        self._by_stem[(stem, key[1], key[2])] = key
+
+    def _load_index(self) -> None:
+        covered = 0
+        if self.index_path.exists():
+            with self.index_path.open("r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        e = json.loads(line)
+                        self._remember(tuple(e["key"]), e["stem"], e["offset"])
+                        covered = max(covered, e["end"])
+                    except (ValueError, KeyError, TypeError):
+                        continue  # linha truncada (queda no meio da escrita)
+        # linhas gravadas sem entrada no índice (queda entre as duas escritas): reindexa
+        if self.path.exists() and self.path.stat().st_size > covered:
+            with self.path.open("rb") as f, self.index_path.open("a", encoding="utf-8") as idx:
+                f.seek(covered)
+                offset = covered
+                for raw in f:
+                    end = offset + len(raw)
+                    try:
+                        row = json.loads(raw)
+                        key = (row["pdf_sha256"], row["variant"], row["mode"])
+                        self._remember(key, row["article"], offset)
+                        idx.write(json.dumps({"key": key, "stem": row["article"], "offset": offset, "end": end}) + "\n")
+                    except (ValueError, KeyError):
+                        pass
+                    offset = end
+
+    def append(self, summary: ArticleSummary, *, article: str, pdf_sha256: str,
+               variant: str, mode: str, run_id: str, **extra) -> dict:
+        row = {
+            "run_id": run_id,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "article": article,
+            "pdf_sha256": pdf_sha256,
+            "variant": variant,
+            "mode": mode,
+            **extra,
+            **_dump(summary),
+        }
+        data = (json.dumps(row, ensure_ascii=False) + "\n").encode("utf-8")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("ab") as f:
+            offset = f.tell()
+            f.write(data)
+        key = (pdf_sha256, variant, mode)
+        with self.index_path.open("a", encoding="utf-8") as idx:
+            idx.write(json.dumps({"key": key, "stem": article, "offset": offset, "end": offset + len(data)}) + "\n")
+        self._remember(key, article, offset)
+        return row
+
+    def _read_at(self, offset: int) -> dict:
+        with self.path.open("rb") as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+    def get(self, pdf_sha256: str, variant: str, mode: str) -> Optional[dict]:
+        offset = self._by_key.get((pdf_sha256, variant, mode))
+        return None if offset is None else self._read_at(offset)
+
+    def get_by_article(self, article: str, variant: str, mode: str) -> Optional[dict]:
+        key = self._by_stem.get((article, variant, mode))
+        return None if key is None else self.get(*key)
+
+    def iter_rows(self) -> Iterator[dict]:
+        """Todas as linhas (histórico completo, inclusive reexecuções)."""
+        if not self.path.exists():
+            return
+        with self.path.open("r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def latest_rows(self) -> List[dict]:
+        """Resultado mais recente de cada (pdf, variante, modo), na ordem de gravação."""
+        if not self._by_key:
+            return []
+        wanted = set(self._by_key.values())
+        rows = []
+        with self.path.open("rb") as f:
+            for offset in sorted(wanted):
+                f.seek(offset)
+                rows.append(json.loads(f.readline()))
+        return rows
+
+    def export_parquet(self, path: Optional[Path] = None) -> Optional[Path]:
+        """Exporta o histórico em Parquet (requer pyarrow; opcional)."""
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            return None
+        rows = list(self.iter_rows())
+        if not rows:
+            return None
+        path = Path(path or self.path.with_suffix(".parquet"))
+        pq.write_table(pa.Table.from_pylist(rows), str(path))
+        return path
+
+
+# ---------- relatório markdown (regerado a partir da base) ---------- #
+def _md_block(d: dict) -> List[str]:
     block = []
     block.append(f"## {d.get('title','(no title)')}\n")
     block.append(f"**Objectives:** {d.get('main_objectives','')}\n\n")
@@ -59,6 +172,27 @@ def append_to_md(summary: ArticleSummary) -> None:
     if rationale:
         block.append(f"**Rationale (CoT):** {rationale}\n\n")
     block.append("---\n\n")
+    return block
+
+def write_md(store: ResultsStore, path: Path = MD_PATH) -> Path:
+    """
+    Reescreve o consolidado.md com o resultado mais recente de cada artigo,
+    agrupado por variante/modo (sem blocos duplicados de reexecuções).
+    """
+    groups: Dict[Tuple[str, str], List[dict]] = {}
+    for row in store.latest_rows():
+        if row.get("duplicate_of"):
+            continue  # quase-duplicata: o bloco do representante já está no relatório
+        groups.setdefault((row.get("variant", ""), row.get("mode", "")), []).append(row)
 
-    with MD_PATH.open("a", encoding="utf-8") as f:
-        f.writelines(block)
+    lines: List[str] = []
+    for (variant, mode), rows in sorted(groups.items()):
+        lines.append(f"# {variant} — {mode} attachment\n\n")
+        for row in rows:
+            lines.extend(_md_block(row))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text("".join(lines), encoding="utf-8")
+    tmp.replace(path)
+    return path
@@ -0,0 +1,170 @@
+# src/stream_watch.py
+"""
+Detecção de fim de resposta por eventos, sem polling de inner_text.
+
+Um MutationObserver injetado na página acompanha o último balão do
+assistente e o botão Stop e avisa o Python por `page.expose_binding` só
+quando algo muda (texto, quantidade de balões, Stop aparece/some). A resposta
+está completa quando não há Stop e o DOM fica quieto por RESPONSE_QUIET_SEC.
+"""
+from __future__ import annotations
+import time
+from typing import Callable, Dict, Optional
+
+from src.config import RESPONSE_QUIET_SEC
+from src.page_js import JS_HELPERS, js_list
+from src.selectors import ASSISTANT_MESSAGES, STOP_BUTTONS
+
+BINDING = "__tccStreamEvent"
+
+_OBSERVER_BODY = r"""
+  if (window.__tccStreamWatch) return true;
+  const MSG = %(msg)s;
+  const STOP = %(stop)s;
+  const state = () => {
+    const msgs = document.querySelectorAll(MSG.join(', '));
+    const last = msgs.length ? msgs[msgs.length - 1] : null;
+    const text = last ? (last.innerText || last.textContent || '') : '';
+    return {
+      count: msgs.length,
+      len: text.length,
+      stop: STOP.some((s) => __tccQ(s).some(__tccVisible)),
+      text: text,
+    };
+  };
+  let prev = null, timer = null;
+  const flush = (force) => {
+    timer = null;
+    const s = state();
+    if (!force && prev && s.count === prev.count && s.len === prev.len && s.stop === prev.stop
+        && s.text === prev.text) return;
+    const delta = prev && s.count === prev.count && s.text.startsWith(prev.text)
+      ? { reset: false, delta: s.text.slice(prev.text.length) }
+      : { reset: true, delta: s.text };
+    prev = s;
+    try {
+      window.%(binding)s({ count: s.count, len: s.len, stop: s.stop, reset: delta.reset, delta: delta.delta });
+    } catch (e) {}
+  };
+  const schedule = () => { if (!timer) timer = setTimeout(() => flush(false), 50); };
+  const start = () => {
+    const obs = new MutationObserver(schedule);
+    obs.observe(document.body || document.documentElement, {
+      childList: true, subtree: true, characterData: true,
+      attributes: true, attributeFilter: ['aria-label', 'disabled', 'data-state', 'style', 'class'],
+    });
+    window.__tccStreamWatch = obs;
+    window.__tccStreamFlush = () => flush(true);
+    flush(true);
+  };
+  if (document.body) start(); else document.addEventListener('DOMContentLoaded', start);
+  return true;
+""" % {"msg": js_list(ASSISTANT_MESSAGES), "stop": js_list(STOP_BUTTONS), "binding": BINDING}
+
+# IIFE: nada vaza para o escopo global (pode rodar 2x no mesmo documento)
+OBSERVER_JS = "(() => {" + JS_HELPERS + _OBSERVER_BODY + "})()"
+
+
+class StreamWatcher:
+    """Estado do streaming de UMA página, alimentado pelo MutationObserver."""
+
+    def __init__(self, page):
+        self.page = page
+        self.installed = False
+        self.count = 0
+        self.text_len = 0
+        self.generating = False
+        self.events = 0
+        self.last_change = time.monotonic()
+        self.first_delta_at: Optional[float] = None
+        self.armed_count = 0  # balões antes do envio (arm)
+        self.on_text: Optional[Callable[[str, bool, int], None]] = None  # (delta, reset, count)
+
+    # ---------- instalação ----------
+    def install(self) -> bool:
+        if self.installed:
+            return True
+        try:
+            self.page.expose_binding(BINDING, self._on_event)
+            self.page.add_init_script(script=OBSERVER_JS)  # reinstala após navegação
+            self.page.evaluate(OBSERVER_JS)                # e no documento atual
+            self.installed = True
+        except Exception:
+            self.installed = False
+        return self.installed
+
+    def _on_event(self, source, payload) -> None:
+        now = time.monotonic()
+        self.events += 1
+        # o balão novo costuma aparecer vazio: o 1º token é o 1º delta acima de armed_count
+        if payload.get("delta") and self.first_delta_at is None and payload.get("count", 0) > self.armed_count:
+            self.first_delta_at = now
+        self.count = int(payload.get("count") or 0)
+        self.text_len = int(payload.get("len") or 0)
+        self.generating = bool(payload.get("stop"))
+        self.last_change = now
+        if self.on_text is not None:
+            try:
+                self.on_text(payload.get("delta") or "", bool(payload.get("reset")), self.count)
+            except Exception:
+                pass
+
+    def flush(self) -> None:
+        """Pede um relatório imediato (ex.: logo depois de enviar)."""
+        try:
+            self.page.evaluate("() => window.__tccStreamFlush && window.__tccStreamFlush()")
+        except Exception:
+            pass
+
+    def arm(self, prev_count: Optional[int] = None) -> None:
+        """Zera marcadores antes de uma nova mensagem (prev_count = balões antes do envio)."""
+        self.armed_count = self.count if prev_count is None else prev_count
+        self.first_delta_at = None
+        self.last_change = time.monotonic()
+
+    # ---------- espera ----------
+    def is_complete(self, prev_count: int, quiet: float = RESPONSE_QUIET_SEC) -> bool:
+        """Há um balão novo com texto, sem Stop, e nada mudou por `quiet` segundos."""
+        return (
+            self.count > prev_count
+            and self.text_len > 0
+            and not self.generating
+            and time.monotonic() - self.last_change >= quiet
+        )
+
+    def wait_complete(
+        self,
+        prev_count: int,
+        timeout: float = 300,
+        quiet: float = RESPONSE_QUIET_SEC,
+        poll_ms: int = 100,
+        on_tick: Optional[Callable[[], bool]] = None,
+    ) -> bool:
+        """
+        Bloqueia até: há um balão novo (count > prev_count) com texto, o botão
+        Stop sumiu e nada mudou por `quiet` segundos. `on_tick` roda a cada
+        iteração e pode encerrar a espera retornando True.
+        Retorna False em timeout.
+        """
+        self.flush()
+        start = time.monotonic()
+        while True:
+            # wait_for_timeout deixa o Playwright despachar os eventos do binding
+            self.page.wait_for_timeout(poll_ms)
+            if on_tick is not None and on_tick():
+                return True
+            if self.is_complete(prev_count, quiet):
+                return True
+            if time.monotonic() - start > timeout:
+                return False
+
+
+_WATCHERS: Dict[int, StreamWatcher] = {}
+
+def watcher_for(page) -> StreamWatcher:
+    """Um watcher por página (expose_binding só pode ser registrado uma vez)."""
+    w = _WATCHERS.get(id(page))
+    if w is None or w.page is not page:
+        w = StreamWatcher(page)
+        _WATCHERS[id(page)] = w
+    return w
@@ -0,0 +1,93 @@
+# src/tabs.py
+"""
+Modo multi-aba (--tabs N): N páginas no mesmo contexto persistente, cada uma
+com a sua conversa, puxando artigos de uma fila comum.
+
+O Playwright síncrono não pode ser usado de várias threads, então o
+paralelismo vem de revezar: enquanto uma aba espera a geração (quase todo o
+tempo), as outras anexam, digitam e enviam. Tudo roda numa thread só, então a
+gravação dos resultados (ledger, results.jsonl, JSON individual) é
+sequencial e não tem corrida.
+"""
+from __future__ import annotations
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, List, Optional
+
+from src.browser_utils import set_tab_label
+from src.chatgpt_runner import ArticleExchange
+
+
+@dataclass
+class TabSlot:
+    page: Any
+    label: str
+    job: Any = None
+    exchange: Optional[ArticleExchange] = None
+    started: float = 0.0
+
+    @property
+    def busy(self) -> bool:
+        return self.exchange is not None
+
+    def clear(self) -> None:
+        self.job, self.exchange, self.started = None, None, 0.0
+
+
+def run_tabs(
+    pages: List[Any],
+    jobs: Iterable[Any],
+    start_job: Callable[[Any, Any], ArticleExchange],
+    on_done: Callable[[TabSlot, float], None],
+    on_error: Callable[[TabSlot, Exception], None],
+    *,
+    min_send_gap: float = 1.0,
+    poll_ms: int = 100,
+) -> None:
+    """
+    Revezamento: a cada volta, aba livre pega o próximo job (start_job envia o
+    prompt e devolve o ArticleExchange) e aba ocupada avança um passo sem
+    bloquear. min_send_gap = intervalo mínimo entre dois envios (qualquer
+    aba), o mesmo respiro que o modo sequencial faz entre artigos.
+    on_done/on_error recebem o slot com .job/.exchange ainda preenchidos.
+    """
+    slots = [TabSlot(page, f"aba {i}") for i, page in enumerate(pages, start=1)]
+    for slot in slots:
+        set_tab_label(slot.page, slot.label)
+    pending = iter(jobs)
+    exhausted = False
+    last_send = 0.0
+
+    while True:
+        for slot in slots:
+            if not slot.busy and not exhausted:
+                job = next(pending, None)
+                if job is None:
+                    exhausted = True
+                else:
+                    gap = min_send_gap - (time.monotonic() - last_send)
+                    if gap > 0:
+                        slot.page.wait_for_timeout(gap * 1000)  # outras abas seguem recebendo eventos
+                    slot.job, slot.started = job, time.monotonic()
+                    try:
+                        slot.exchange = start_job(slot.page, job)
+                    except Exception as e:
+                        on_error(slot, e)
+                        slot.clear()
+                        continue
+                    if not getattr(slot.exchange, "from_cache", False):
+                        last_send = time.monotonic()
+            if slot.busy:
+                try:
+                    finished = slot.exchange.step()
+                except Exception as e:
+                    on_error(slot, e)
+                    slot.clear()
+                    continue
+                if finished:
+                    on_done(slot, time.monotonic() - slot.started)
+                    slot.clear()
+
+        if exhausted and not any(s.busy for s in slots):
+            return
+        slots[0].page.wait_for_timeout(poll_ms)
@@ -0,0 +1,184 @@
+# src/text_compact.py
+"""
+Compactação do texto extraído antes do prompt sem anexo (COMPACT_TEXT=1).
+
+Em vez de cortar o texto cru em TEXT_MAX_CHARS (que leva cabeçalhos, rodapés,
+hifenização quebrada e referências, e muitas vezes perde Results/Limitations):
+
+  1. limpa cada página: ligaduras (ﬁ, ﬂ...), hífen de fim de linha, hífen
+     invisível, linhas de boilerplate (DOI, copyright, "Downloaded from"...);
+  2. tira cabeçalhos/rodapés: linhas do topo/fim que se repetem na maioria
+     das páginas (números ignorados) e números de página soltos;
+  3. divide em seções pelos títulos conhecidos (Abstract, Methods, Results,
+     Discussion, Limitations, Conclusion...) e descarta referências,
+     agradecimentos e apêndices;
+  4. reparte o orçamento de caracteres entre as seções por peso; o que uma
+     seção curta não usa vai para as outras; cada seção é cortada no fim de
+     uma frase.
+
+Sem nenhum título reconhecido, devolve o texto limpo cortado em max_chars.
+"""
+from __future__ import annotations
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+_LIGATURES = str.maketrans({
+    "ﬀ": "ff", "ﬁ": "fi", "ﬂ": "fl", "ﬃ": "ffi", "ﬄ": "ffl",
+    "ﬅ": "st", "ﬆ": "st", "­": "", "​": "", "﻿": "",
+})
+_HYPHEN_BREAK_RE = re.compile(r"(\w)[-‐]\n[ \t]*([a-zà-ÿ])")
+_SPACES_RE = re.compile(r"[ \t ]+")
+_DIGITS_RE = re.compile(r"\d+")
+_PAGE_NUMBER_RE = re.compile(r"^(?:page\s+)?\d{1,4}(?:\s*(?:/|of|de)\s*\d{1,4})?$", re.I)
+_BOILERPLATE_RE = re.compile(
+    r"(?:^|\b)(?:doi\s*:|https?://|www\.|downloaded from|©|\(c\)\s*\d{4}|copyright|all rights reserved"
+    r"|licensed under|creative commons|this article is (?:protected|distributed)|received:?\s+\d"
+    r"|accepted:?\s+\d|published online|corresponding author|e-?mail:)",
+    re.I,
+)
+
+# título (linha inteira, numeração opcional) -> categoria; a ordem importa ("results and discussion")
+_SECTIONS: List[Tuple[str, str]] = [
+    ("abstract", r"abstract|summary|resumo"),
+    ("keywords", r"key\s?words|index terms|palavras-chave"),
+    ("intro", r"introduction|background|motivation|introdução|related work|literature review|theoretical (?:background|framework)"),
+    ("methods", r"(?:materials and |research |study )?methods?|methodology|research design|study design|experimental (?:setup|design)"
+                r"|data collection|(?:data )?analysis|participants|procedure|metodologia|método"),
+    ("results", r"results(?: and discussion)?|findings|evaluation|experiments?|resultados"),
+    ("limitations", r"limitations?(?: and future (?:work|research))?|threats to validity|limitações"),
+    ("discussion", r"discussion|implications|discussão"),
+    ("conclusion", r"conclusions?(?: and future (?:work|research))?|concluding remarks|final (?:remarks|considerations)"
+                   r"|future work|conclusão|considerações finais"),
+    ("drop", r"references|bibliography|referências(?: bibliográficas)?|acknowledge?ments?|agradecimentos"
+             r"|appendix(?:\s+[a-z0-9]{1,3})?|appendices|apêndice|anexo|funding|conflicts? of interest"
+             r"|declaration of (?:competing )?interests?|author contributions|data availability"),
+]
+_NUMBERING = r"(?:(?:\d+(?:\.\d+)*|[ivx]+|[a-h])[.)]?\s+)?"
+_HEADING_RES = [(cat, re.compile(rf"^{_NUMBERING}(?:{pat})\s*[:.]?$", re.I)) for cat, pat in _SECTIONS]
+# "Abstract— This paper..." / "Keywords: a, b": título e texto na mesma linha
+_RUN_IN_RE = re.compile(r"^(abstract|resumo|key\s?words|index terms|palavras-chave)\s*(?:[:.–—-]\s*|\s+(?=(?-i:[A-Z])))(.+)$", re.I)
+
+# pesos do orçamento por categoria; "front" = título/autores antes do 1º título
+WEIGHTS: Dict[str, float] = {
+    "front": 0.04, "abstract": 0.14, "keywords": 0.01, "intro": 0.08, "methods": 0.20,
+    "results": 0.22, "discussion": 0.13, "limitations": 0.09, "conclusion": 0.07, "other": 0.02,
+}
+_MIN_CUT = 200  # seção com menos que isso de orçamento fica de fora
+
+
+def _clean_page(text: str) -> List[str]:
+    text = (text or "").translate(_LIGATURES).replace("\r", "\n")
+    text = _HYPHEN_BREAK_RE.sub(r"\1\2", text)
+    return [_SPACES_RE.sub(" ", ln).strip() for ln in text.split("\n")]
+
+
+def _edge_key(line: str) -> str:
+    return _DIGITS_RE.sub("#", line.lower())
+
+
+def _repeated_edges(pages: List[List[str]], edge: int = 3) -> set:
+    """Linhas do topo/fim que aparecem em metade ou mais das páginas (cabeçalho/rodapé)."""
+    if len(pages) < 3:
+        return set()
+    seen: Counter = Counter()
+    for lines in pages:
+        body = [ln for ln in lines if ln]
+        seen.update({_edge_key(ln) for ln in body[:edge] + body[-edge:]})
+    return {k for k, n in seen.items() if n >= max(2, len(pages) // 2)}
+
+
+def clean_lines(pages: Sequence[str]) -> List[str]:
+    """Linhas limpas do documento inteiro, sem cabeçalhos/rodapés/boilerplate."""
+    cleaned = [_clean_page(p) for p in pages]
+    edges = _repeated_edges(cleaned)
+    out: List[str] = []
+    for lines in cleaned:
+        for ln in lines:
+            if not ln or _PAGE_NUMBER_RE.match(ln) or _edge_key(ln) in edges:
+                continue
+            if len(ln) < 160 and _BOILERPLATE_RE.search(ln):
+                continue
+            out.append(ln)
+    return out
+
+
+def _heading(line: str) -> Optional[str]:
+    if len(line) > 70:
+        return None
+    for cat, rx in _HEADING_RES:
+        if rx.match(line):
+            return cat
+    return None
+
+
+def split_sections(lines: List[str]) -> List[Tuple[str, str, str]]:
+    """[(categoria, título, corpo)] na ordem do documento; corpo em um parágrafo só."""
+    sections: List[Tuple[str, str, List[str]]] = [("front", "", [])]
+    for ln in lines:
+        cat = _heading(ln)
+        if cat is None:
+            m = _RUN_IN_RE.match(ln)
+            if m:
+                cat = _heading(m.group(1))
+                sections.append((cat, m.group(1), [m.group(2)]))
+                continue
+            sections[-1][2].append(ln)
+            continue
+        sections.append((cat, ln, []))
+    return [(cat, title, " ".join(body).strip()) for cat, title, body in sections if body or title]
+
+
+def _allocate(sizes: Dict[str, int], budget: int) -> Dict[str, int]:
+    """Reparte `budget` por peso; quem precisa de menos que a sua parte devolve a sobra."""
+    alloc = {k: 0 for k in sizes}
+    active = {k for k, n in sizes.items() if n > 0}
+    remaining = budget
+    while active and remaining > 0:
+        wsum = sum(WEIGHTS.get(k, WEIGHTS["other"]) for k in active)
+        share = {k: remaining * WEIGHTS.get(k, WEIGHTS["other"]) / wsum for k in active}
+        full = {k for k in active if sizes[k] - alloc[k] <= share[k]}
+        if not full:
+            for k in active:
+                alloc[k] += int(share[k])
+            break
+        for k in full:
+            remaining -= sizes[k] - alloc[k]
+            alloc[k] = sizes[k]
+        active -= full
+    return alloc
+
+
+def _cut(text: str, limit: int) -> str:
+    """Corta no fim da última frase que cabe (ou no limite, se a frase for enorme)."""
+    if len(text) <= limit:
+        return text
+    head = text[:limit]
+    end = max(head.rfind(". "), head.rfind("? "), head.rfind("! "))
+    if end >= limit * 0.6:
+        head = head[:end + 1]
+    return head.rstrip() + " […]"
+
+
+def compact_text(pages: Sequence[str], max_chars: int) -> str:
+    """Texto das páginas limpo, por seções e dentro de max_chars (títulos mantidos em linha própria)."""
+    lines = clean_lines(pages)
+    sections = [s for s in split_sections(lines) if s[0] != "drop"]
+    if not any(title for _, title, _ in sections):
+        return "\n".join(lines)[:max_chars]
+
+    # orçamento do corpo = total - títulos - quebras de linha
+    overhead = sum(len(title) + 2 for _, title, _ in sections)
+    sizes: Dict[str, int] = Counter()
+    for cat, _, body in sections:
+        sizes[cat] += len(body)
+    alloc = _allocate(dict(sizes), max(0, max_chars - overhead))
+
+    parts: List[str] = []
+    for cat, title, body in sections:
+        take = min(len(body), alloc[cat])  # várias seções da mesma categoria: a 1ª tem prioridade
+        alloc[cat] -= take
+        if not body or (take < len(body) and take < _MIN_CUT):
+            continue
+        parts.append(f"{title}\n{_cut(body, take)}" if title else _cut(body, take))
+    return "\n\n".join(parts)[:max_chars]
@@ -0,0 +1,30 @@
+# tests/test_metrics.py
+import time
+
+from src.metrics import ArticleTrace, bind, report
+from src.runner_core import record_answer_times
+from src.stream_watch import StreamWatcher
+
+
+def test_report_has_ttft_row(tmp_path, capsys):
+    """Sequência do stand-in (balão vazio, depois deltas): ttft separado de generation."""
+    w = StreamWatcher(page=None)
+    w.arm(prev_count=0)
+    sent_at = time.monotonic()
+    w._on_event(None, {"count": 1, "len": 0, "stop": True, "reset": True, "delta": ""})
+    time.sleep(0.02)
+    w._on_event(None, {"count": 1, "len": 2, "stop": True, "reset": False, "delta": "{\""})
+    w._on_event(None, {"count": 1, "len": 4, "stop": False, "reset": False, "delta": "}\n"})
+
+    path = tmp_path / "metrics.jsonl"
+    trace = ArticleTrace("run1", "artigo", "sha", "zeroshot", "with")
+    with bind(trace):
+        record_answer_times(w, sent_at)
+    trace.write("done", path=path)
+    stages = trace.stages()
+    assert stages["ttft"] >= 0.02
+    assert "generation" in stages
+
+    report(path=path)
+    rows = [line.split()[0] for line in capsys.readouterr().out.splitlines() if line.startswith("  ")]
+    assert "ttft" in rows and "generation" in rows
@@ -0,0 +1,16 @@
+# tests/test_stream_watch.py
+from src.stream_watch import StreamWatcher
+
+
+def test_first_delta_after_empty_bubble():
+    """O balão novo chega vazio e o texto vem depois, no mesmo count."""
+    w = StreamWatcher(page=None)
+    w._on_event(None, {"count": 1, "len": 40, "stop": False, "reset": True, "delta": "resposta anterior"})
+    w.arm(prev_count=1)
+    w._on_event(None, {"count": 2, "len": 0, "stop": True, "reset": True, "delta": ""})
+    assert w.first_delta_at is None
+    w._on_event(None, {"count": 2, "len": 5, "stop": True, "reset": False, "delta": "{\"ti"})
+    first = w.first_delta_at
+    assert first is not None
+    w._on_event(None, {"count": 2, "len": 9, "stop": True, "reset": False, "delta": "tle\""})
+    assert w.first_delta_at == first